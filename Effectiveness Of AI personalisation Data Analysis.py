@@ -111,9 +111,10 @@ demographic_summary
 df= aidata
 
 # Converting 'Start time' to datetime format and create new columns for date and day of week
-df['Start time'] = pd.to_datetime(df['Start time'], errors='coerce')
-df['Date'] = df['Start time'].dt.date
-df['Day of Week'] = df['Start time'].dt.day_name()
+# (the timestamp format is detected once and each distinct timestamp is parsed only once)
+from ai_personalisation.loading import parse_start_time, add_date_parts
+df['Start time'] = parse_start_time(df['Start time'])
+df = add_date_parts(df)
 
 # Dropping any rows with critical missing data (e.g., demographic variables that are required for analysis)
 df = df.dropna(subset=['What is your age group?', 'What is your monthly income range?'])
@@ -2059,6 +2060,9 @@ model = sm.OLS(y, X).fit()
 # Print the regression results
 print(model.summary())
 
+# Keep the TPB model for the results registry (the TAM cell below reuses `model`)
+tpb_model = model
+
 
 # ## Hypothesis Outcomes:
 # 
@@ -2211,6 +2215,38 @@ print(manova_results)
 # 
 # These findings suggest that economic and cultural contexts may play a role in how users perceive AI recommendations, but further exploration with larger samples or additional contextual factors would be beneficial.
 
+# # Multiple-Testing Correction
+# Every test above is collected into one results table and the p-values are adjusted across the whole battery, so that the hypothesis outcomes do not rest on raw p-values alone.
+
+# In[ ]:
+
+
+from ai_personalisation.results import ResultsRegistry
+
+registry = ResultsRegistry()
+registry.record('pearsonr', p_value, statistic=corr, outcome='Satisfaction_Level', predictor='Engagement_Level', hypothesis='H1')
+registry.record('spearmanr', spearman_p_value, statistic=spearman_corr, outcome='Satisfaction_Level', predictor='Engagement_Level', hypothesis='H2')
+registry.record_scipy('f_oneway', anova_engagement_culture, outcome='Engagement_Level', predictor='Cultural_Relevance', hypothesis='H3')
+registry.record_scipy('f_oneway', anova_satisfaction_economics, outcome='Satisfaction_Level', predictor='Economic_Relevance', hypothesis='H4')
+registry.record_scipy('ttest_ind', ttest_trust_engagement, outcome='Engagement_Level', predictor='Trust_Level', hypothesis='H5')
+registry.record('pearsonr', p_value_engagement, statistic=privacy_engagement_corr, outcome='Engagement_Level', predictor='Privacy_Concern_Level', hypothesis='H6')
+registry.record('pearsonr', p_value_satisfaction, statistic=privacy_satisfaction_corr, outcome='Satisfaction_Level', predictor='Privacy_Concern_Level', hypothesis='H6')
+registry.record_scipy('ttest_ind', ttest_privacy_engagement, outcome='Engagement_Level', predictor='Privacy_Concern_Level', hypothesis='H6')
+registry.record_scipy('ttest_ind', ttest_privacy_satisfaction, outcome='Satisfaction_Level', predictor='Privacy_Concern_Level', hypothesis='H6')
+registry.record_scipy('f_oneway', anova_engagement, outcome='Engagement_Level', predictor='Digital_Literacy_Level', hypothesis='H7')
+registry.record_scipy('f_oneway', anova_satisfaction, outcome='Satisfaction_Level', predictor='Digital_Literacy_Level', hypothesis='H8')
+registry.record_scipy('ttest_ind', ttest_infrastructure_effectiveness, outcome='Effectiveness_Perception', predictor='Infrastructure_Limitation', hypothesis='H9')
+registry.record('chi2_contingency', p, statistic=chi2, df=dof, outcome='Fairness_Perception', predictor='Economic_Segment', hypothesis='H10')
+registry.record_regression(tpb_model, 'Engagement_Level', hypothesis='TPB')
+registry.record_regression(model, 'Engagement_Level', hypothesis='TAM')
+registry.record_manova(manova_results, 'Satisfaction_Level + Relevance_Score', hypothesis='H17')
+
+# Holm (family-wise) and Benjamini-Hochberg (false discovery rate) adjusted p-values
+results_table = registry.table(method='holm')
+results_table['p_bh'] = registry.table(method='bh')['p_adjusted']
+results_table[['hypothesis', 'test', 'outcome', 'predictor', 'statistic', 'p_value', 'p_adjusted', 'p_bh', 'reject']]
+
+
 # # SECTION 5: Thematic Analysis for Qualitative Columns
 
 # # 1. How do you think Jumia’s AI-personalised recommendations could better cater to your needs, considering factors such as your purchasing habits, product preferences, income level, and browsing behaviour?
@@ -0,0 +1 @@
+# Analysis toolkit for the Jumia AI-personalised recommendations survey.
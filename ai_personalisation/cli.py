@@ -0,0 +1,379 @@
+# Command-line entry point for running the analysis headless, e.g.
+#     python -m ai_personalisation run --input export.parquet --stages eda,hypotheses,text --out report/
+# The survey is loaded, cleaned and encoded once and handed to each selected stage,
+# which writes its tables and figures to the output directory. Stage modules and
+# their plotting/statistics libraries are only imported when the stage runs.
+# The exit status is 0 on success, 1 when any stage failed and 2 for usage errors.
+# `python -m ai_personalisation compare --input wave1.xlsx wave2.xlsx ...` compares survey waves.
+# `python -m ai_personalisation sql "SELECT ..." --input export.xlsx` queries the encoded survey.
+# `python -m ai_personalisation search 'privacy AND "repetitive recommendations"' --input export.xlsx`
+# finds matching free-text answers.
+# `python -m ai_personalisation report --input export.xlsx --out report.html` builds the report.
+# `python -m ai_personalisation serve --input export.xlsx` serves aggregates over HTTP.
+# `python -m ai_personalisation validate --input export.xlsx` lists answers missing from the codebook.
+# `python -m ai_personalisation import-time` checks the import-time budgets in lazy.py.
+
+import argparse
+import functools
+import os
+import sys
+import time
+import traceback
+
+STAGE_NAMES = ['eda', 'segments', 'hypotheses', 'text']
+
+
+def _stage_list(value):
+    stages = [stage.strip() for stage in value.split(',') if stage.strip()]
+    if stages == ['all']:
+        return list(STAGE_NAMES)
+    unknown = [stage for stage in stages if stage not in STAGE_NAMES]
+    if unknown or not stages:
+        raise argparse.ArgumentTypeError(f'unknown stages {unknown}, expected a comma-separated list of {STAGE_NAMES} or "all"')
+    return stages
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='ai_personalisation',
+                                     description='Analysis of the AI-personalised recommendations survey.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run analysis stages and write tables and figures')
+    run.add_argument('--input', required=True, help='survey export (.xlsx, .xls, .csv or .parquet)')
+    run.add_argument('--stages', type=_stage_list, default=list(STAGE_NAMES),
+                     help=f'comma-separated stages to run: {",".join(STAGE_NAMES)} or all (default: all)')
+    run.add_argument('--out', default='report', help='output directory (default: report)')
+    run.add_argument('--table-format', choices=['csv', 'parquet', 'json'], default='csv')
+    run.add_argument('--figure-format', choices=['png', 'svg', 'pdf'], default='png')
+    run.add_argument('--cache-dir', default=None,
+                     help='directory of the result store for fitted models (default: ~/.cache/ai_personalisation)')
+    run.add_argument('--no-cache', action='store_true', help='refit every model instead of using the result store')
+    run.add_argument('--keep-going', action='store_true', help='run the remaining stages after a stage fails')
+    run.add_argument('--warehouse', default=None, help='also write the derived scores to this Parquet warehouse')
+    run.add_argument('--wave', default=None, help='wave name in the warehouse (default: input file name)')
+    run.add_argument('--deduplicate', action='store_true',
+                     help='drop exact duplicates and copies (near-identical text and answers) before cleaning')
+    run.add_argument('--impute', type=int, default=0, metavar='M',
+                     help='impute missing answers M times and pool the hypothesis tests instead of dropping rows')
+    run.add_argument('--screen', action='store_true',
+                     help='exclude speeding, straight-lined, duplicate and attention-check-failing responses')
+    run.add_argument('--quality-weights', action='store_true',
+                     help='down-weight flagged responses (see quality.PENALTIES) in the weighted stages (segments)')
+    run.add_argument('--strict', action='store_true',
+                     help='fail before running the stages when answers or columns do not match the codebook')
+
+    compare = commands.add_parser('compare', help='compare survey waves or cities that share the codebook')
+    compare.add_argument('--input', required=True, nargs='+', help='survey exports, one per wave')
+    compare.add_argument('--names', nargs='+', help='wave names in the order of --input (default: file names)')
+    compare.add_argument('--out', default='report', help='output directory (default: report)')
+    compare.add_argument('--table-format', choices=['csv', 'parquet', 'json'], default='csv')
+    compare.add_argument('--figure-format', choices=['png', 'svg', 'pdf'], default='png')
+    compare.add_argument('--cache-dir', default=None, help='directory of the result store for fitted models')
+    compare.add_argument('--no-cache', action='store_true', help='refit every model instead of using the result store')
+    compare.add_argument('--jobs', type=int, default=None, help='worker processes for loading (default: CPU count)')
+    compare.add_argument('--warehouse', default=None, help='also write every wave to this Parquet warehouse')
+
+    sql = commands.add_parser('sql', help='run an SQL query over the encoded survey (requires duckdb)')
+    sql.add_argument('query', help='SQL query over the responses, challenges, relevance_ranking and improvement_ranking tables')
+    sql.add_argument('--input', help='survey export to register')
+    sql.add_argument('--deduplicate', action='store_true',
+                     help='drop duplicate submissions, which share a respondent key, before registering')
+    sql.add_argument('--warehouse', default=None, help='score warehouse to attach as the scores view')
+    sql.add_argument('--out', default=None, help='write the result to this CSV file instead of printing it')
+
+    search = commands.add_parser('search', help='find free-text answers matching a keyword query')
+    search.add_argument('query', help='words combined with AND, OR, NOT and parentheses; "quoted phrases"')
+    search.add_argument('--input', required=True, help='survey export')
+    search.add_argument('--out', default=None, help='write the matching respondents to this CSV file')
+
+    report = commands.add_parser('report', help='build the HTML (and optionally PDF) report')
+    report.add_argument('--input', required=True, help='survey export')
+    report.add_argument('--out', default='report.html', help='HTML file to write (default: report.html)')
+    report.add_argument('--pdf', default=None, help='also convert the report to this PDF file (requires weasyprint)')
+    report.add_argument('--workers', type=int, default=None, help='processes rendering sections (default: CPU count)')
+
+    validate = commands.add_parser('validate', help='check a survey export against the codebook')
+    validate.add_argument('--input', required=True, help='survey export')
+    validate.add_argument('--out', default=None, help='write the problems to this CSV file')
+
+    serve = commands.add_parser('serve', help='serve aggregates and tests over HTTP from a warm dataset')
+    serve.add_argument('--input', required=True, help='survey export to load at startup')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+    serve.add_argument('--workers', type=int, default=None, help='processes for group tests and regressions')
+
+    commands.add_parser('import-time', help='check module import times against their budgets')
+    return parser
+
+
+def _file_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _write_warehouse(root, waves):
+    from .warehouse import ScoreWarehouse
+
+    warehouse = ScoreWarehouse(root)
+    for wave, df in waves.items():
+        print(f'warehouse: wrote {warehouse.write(df, wave)} respondents of wave {wave}')
+
+
+# Print the validation problems of a loaded survey as warnings
+def _warn_problems(problems):
+    for row in problems.itertuples(index=False):
+        value = f' {row.value!r}' if row.value is not None else ''
+        print(f'warning: {row.question}: {row.issue}{value} ({row.count} responses)', file=sys.stderr)
+
+
+def run(args):
+    from .encoding import encode_survey
+    from .loading import clean_survey, load_survey
+    from .stages import STAGES, WEIGHTED_STAGES, Output
+    from .validation import SchemaError, validate_survey
+
+    try:
+        df = load_survey(args.input)
+        _warn_problems(validate_survey(df, strict=args.strict))
+        if args.deduplicate:
+            from .duplicates import drop_duplicate_responses
+            df, dropped = drop_duplicate_responses(df)
+            print(f'deduplicate: dropped {dropped} duplicate submissions')
+        df = encode_survey(clean_survey(df))
+    except SchemaError as error:
+        print(f'error: {args.input}: {error}', file=sys.stderr)
+        return 1
+    except (OSError, ValueError, KeyError) as error:
+        print(f'error: could not load {args.input}: {error}', file=sys.stderr)
+        return 1
+
+    output = Output(args.out, table_format=args.table_format, figure_format=args.figure_format)
+    store = None
+    if not args.no_cache:
+        from .store import ResultStore
+        store = ResultStore(args.cache_dir)
+
+    weights = None
+    if args.screen or args.quality_weights:
+        from .quality import quality_flags, quality_summary, quality_weights, screen
+        flags = quality_flags(df, store)
+        output.table('quality_summary', quality_summary(flags))
+        if args.screen:
+            screened = screen(df, flags)
+            print(f'screen: excluded {len(df) - len(screened)} low-quality responses')
+            df, flags = screened, flags.loc[screened.index]
+        if args.quality_weights:
+            weights = quality_weights(flags)
+            print(f'quality weights: down-weighted {int((weights < 1).sum())} flagged responses')
+
+    if args.warehouse:
+        _write_warehouse(args.warehouse, {args.wave or _file_name(args.input): df})
+
+    stages = dict(STAGES)
+    if weights is not None:
+        for name in WEIGHTED_STAGES:
+            stages[name] = functools.partial(STAGES[name], weights=weights)
+    if args.impute:
+        stages['hypotheses'] = functools.partial(STAGES['hypotheses'], imputations=args.impute)
+
+    failed = []
+    for name in args.stages:
+        started = time.perf_counter()
+        written = len(output.written)
+        try:
+            stages[name](df, output, store)
+        except Exception:
+            failed.append(name)
+            print(f'error: stage {name} failed', file=sys.stderr)
+            traceback.print_exc(file=sys.stderr)
+            if not args.keep_going:
+                break
+            continue
+        print(f'{name}: wrote {len(output.written) - written} files in {time.perf_counter() - started:.1f}s')
+
+    if failed:
+        print(f'error: failed stages: {", ".join(failed)}', file=sys.stderr)
+        return 1
+    return 0
+
+
+def compare(args):
+    from .stages import Output, run_wave_comparison
+    from .waves import WaveComparison, load_waves
+
+    if args.names and len(args.names) != len(args.input):
+        print('error: --names must give one name per --input file', file=sys.stderr)
+        return 2
+    sources = dict(zip(args.names, args.input)) if args.names else args.input
+    try:
+        waves = load_waves(sources, n_jobs=args.jobs)
+    except (OSError, ValueError, KeyError) as error:
+        print(f'error: could not load the waves: {error}', file=sys.stderr)
+        return 1
+    if args.warehouse:
+        _write_warehouse(args.warehouse, waves)
+
+    output = Output(args.out, table_format=args.table_format, figure_format=args.figure_format)
+    store = None
+    if not args.no_cache:
+        from .store import ResultStore
+        store = ResultStore(args.cache_dir)
+    started = time.perf_counter()
+    try:
+        run_wave_comparison(WaveComparison(waves), output, store, n_jobs=args.jobs)
+    except Exception:
+        print('error: wave comparison failed', file=sys.stderr)
+        traceback.print_exc(file=sys.stderr)
+        return 1
+    print(f'compare: {len(waves)} waves, wrote {len(output.written)} files in {time.perf_counter() - started:.1f}s')
+    return 0
+
+
+def sql(args):
+    from .sql import SurveyDatabase
+
+    if not args.input and not args.warehouse:
+        print('error: give --input and/or --warehouse to query', file=sys.stderr)
+        return 2
+    try:
+        database = SurveyDatabase()
+        if args.input:
+            from .encoding import encode_survey
+            from .loading import clean_survey, load_survey
+            df = clean_survey(load_survey(args.input), deduplicate=args.deduplicate)
+            database.register_survey(encode_survey(df))
+        if args.warehouse:
+            database.attach_warehouse(args.warehouse)
+        result = database.query(args.query)
+    except Exception as error:
+        print(f'error: {error}', file=sys.stderr)
+        return 1
+    if args.out:
+        result.to_csv(args.out, index=False)
+    else:
+        print(result.to_string(index=False))
+    return 0
+
+
+def search(args):
+    from . import codebook
+    from .encoding import encode_survey
+    from .loading import clean_survey, load_survey
+    from .text import InvertedIndex, QueryError
+
+    try:
+        df = encode_survey(clean_survey(load_survey(args.input)))
+    except (OSError, ValueError, KeyError) as error:
+        print(f'error: could not load {args.input}: {error}', file=sys.stderr)
+        return 1
+    index = InvertedIndex([c for c in codebook.TEXT_COLUMNS if c in df.columns])
+    index.add(df)
+    try:
+        matches = index.search(args.query)
+    except QueryError as error:
+        print(f'error: {error}', file=sys.stderr)
+        return 2
+    levels = [c for c in codebook.ORDINAL_LEVELS if c in df.columns]
+    result = df.loc[matches, levels + index.columns]
+    if args.out:
+        result.to_csv(args.out)
+    else:
+        print(result[levels].to_string())
+    print(f'{len(result)} of {len(df)} respondents match', file=sys.stderr)
+    return 0
+
+
+def report(args):
+    from .encoding import encode_survey
+    from .loading import clean_survey, load_survey
+    from .report import ReportBuilder, write_pdf
+
+    try:
+        df = encode_survey(clean_survey(load_survey(args.input)))
+    except (OSError, ValueError, KeyError) as error:
+        print(f'error: could not load {args.input}: {error}', file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    builder = ReportBuilder(df, args.out, workers=args.workers)
+    failed = builder.build_sync()
+    print(f'report: wrote {len(builder.sections)} sections to {args.out} in {time.perf_counter() - started:.1f}s')
+    if failed:
+        print(f'error: failed sections: {", ".join(failed)}', file=sys.stderr)
+        return 1
+    if args.pdf:
+        try:
+            write_pdf(args.out, args.pdf)
+        except ImportError as error:
+            print(f'error: {error}', file=sys.stderr)
+            return 1
+    return 0
+
+
+def serve(args):
+    from .encoding import encode_survey
+    from .loading import clean_survey, load_survey
+    from .service import SurveyService, serve as serve_http
+
+    try:
+        df = encode_survey(clean_survey(load_survey(args.input)))
+        serve_http(SurveyService(df, workers=args.workers), host=args.host, port=args.port)
+    except (ImportError, OSError, ValueError) as error:
+        print(f'error: {error}', file=sys.stderr)
+        return 1
+    return 0
+
+
+def validate(args):
+    from .loading import load_survey
+    from .validation import validate_survey
+
+    try:
+        problems = validate_survey(load_survey(args.input))
+    except (OSError, ValueError, KeyError) as error:
+        print(f'error: could not load {args.input}: {error}', file=sys.stderr)
+        return 1
+    if args.out:
+        problems.to_csv(args.out, index=False)
+    elif not problems.empty:
+        print(problems.to_string(index=False))
+    print(f'{len(problems)} problems in {args.input}', file=sys.stderr)
+    return 1 if (problems['issue'] != 'write-in answer').any() else 0
+
+
+def import_time(args):
+    from .lazy import IMPORT_BUDGETS, import_times, unbudgeted_modules
+
+    failed = False
+    for name in unbudgeted_modules():
+        failed = True
+        print(f'{name:<36} no import-time budget in lazy.IMPORT_BUDGETS')
+    for name, seconds in import_times().items():
+        budget = IMPORT_BUDGETS[name]
+        status = 'ok' if seconds <= budget else 'OVER BUDGET'
+        failed = failed or seconds > budget
+        print(f'{name:<36} {seconds:6.3f}s  (budget {budget:.2f}s)  {status}')
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'run':
+        return run(args)
+    if args.command == 'compare':
+        return compare(args)
+    if args.command == 'sql':
+        return sql(args)
+    if args.command == 'search':
+        return search(args)
+    if args.command == 'report':
+        return report(args)
+    if args.command == 'serve':
+        return serve(args)
+    if args.command == 'validate':
+        return validate(args)
+    if args.command == 'import-time':
+        return import_time(args)
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
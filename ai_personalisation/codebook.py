@@ -0,0 +1,200 @@
+# Codebook for the Jumia AI-personalisation survey export.
+# Question texts and answer mappings are taken from the analysis notebook so that
+# every module reads and encodes the survey in exactly the same way.
+
+# Collection metadata
+START_TIME = 'Start time'
+COMPLETION_TIME = 'Completion time'
+
+# Question IDs. Columns are renamed from the exported question text to these short
+# IDs when a survey is loaded (see schema.py); the texts are in QUESTION_TEXTS.
+# Demographics
+AGE = 'age'
+GENDER = 'gender'
+INCOME = 'income'
+SHOPPING_FREQUENCY = 'shopping_frequency'
+
+# Likert-style questions
+SATISFACTION = 'satisfaction'
+PREFERENCE = 'preference'
+DATA_COMFORT = 'data_comfort'
+INTERACTION = 'interaction'
+REPEAT_PURCHASE = 'repeat_purchase'
+CULTURAL_RELEVANCE = 'cultural_relevance'
+ECONOMIC_RELEVANCE = 'economic_relevance'
+PRIVACY_CONCERN = 'privacy_concern'
+TRUST = 'trust'
+LOYALTY = 'loyalty'
+INCOME_RELEVANCE = 'income_relevance'
+ACTUAL_PREFERENCES = 'actual_preferences'
+NOTICE_HABITS = 'notice_habits'
+PURCHASE_FREQUENCY = 'purchase_frequency'
+CHALLENGE_IMPACT = 'challenge_impact'
+
+# Multi-select question (answers separated by ';')
+CHALLENGES = 'challenges'
+
+# Ranking questions
+RELEVANCE_RANKING = 'relevance_ranking'
+IMPROVEMENT_RANKING = 'improvement_ranking'
+
+# Free-text questions
+BETTER_CATER = 'better_cater'
+DATA_CONCERNS = 'data_concerns'
+ADDITIONAL_COMMENTS = 'additional_comments'
+
+DEMOGRAPHIC_COLUMNS = [AGE, GENDER, INCOME, SHOPPING_FREQUENCY]
+TEXT_COLUMNS = [BETTER_CATER, DATA_CONCERNS, ADDITIONAL_COMMENTS]
+
+# Every question column of the instrument, in questionnaire order
+QUESTION_COLUMNS = [
+    AGE, GENDER, INCOME, SHOPPING_FREQUENCY,
+    SATISFACTION, PREFERENCE, DATA_COMFORT, INTERACTION, REPEAT_PURCHASE, CULTURAL_RELEVANCE,
+    ECONOMIC_RELEVANCE, PRIVACY_CONCERN, TRUST, LOYALTY, INCOME_RELEVANCE, ACTUAL_PREFERENCES,
+    NOTICE_HABITS, PURCHASE_FREQUENCY, CHALLENGE_IMPACT, CHALLENGES, RELEVANCE_RANKING,
+    IMPROVEMENT_RANKING, BETTER_CATER, DATA_CONCERNS, ADDITIONAL_COMMENTS,
+]
+
+# Question ID -> question text as exported by Forms (the ranking texts keep their
+# line breaks and the export truncates the improvement question)
+QUESTION_TEXTS = {
+    AGE: 'What is your age group?',
+    GENDER: 'What is your gender?',
+    INCOME: 'What is your monthly income range?',
+    SHOPPING_FREQUENCY: 'How frequently do you shop on Jumia?',
+    SATISFACTION: 'How satisfied are you with the personalised recommendations provided by Jumia?',
+    PREFERENCE: "How well do you think Jumia's personalised recommendations reflect your personal preferences and lifestyle?",
+    DATA_COMFORT: 'Are you comfortable with Jumia using your browsing and purchasing data to provide personalised recommendations?',
+    INTERACTION: 'How often do you interact with Jumia’s AI-personalised product recommendations (e.g., clicking on recommended items, adding items to cart)?',
+    REPEAT_PURCHASE: 'Have Jumia’s personalised recommendations influenced your decision to make repeat purchases on the platform?',
+    CULTURAL_RELEVANCE: "To what extent do you feel that Jumia's personalised recommendations reflect the cultural realities of living in Lagos?",
+    ECONOMIC_RELEVANCE: "To what extent do you feel that Jumia's personalised recommendations reflect the economic realities of living in Lagos?",
+    PRIVACY_CONCERN: "Are you concerned about the privacy of your personal data used for Jumia's personalised recommendations?",
+    TRUST: "Would clearer information on how your data is used improve your trust in Jumia's AI system?",
+    LOYALTY: 'Jumia’s AI-personalised recommendations have made you more loyal to the platform',
+    INCOME_RELEVANCE: 'Do you think that your purchasing power (income) affects the relevance of the personalised recommendations provided to you?',
+    ACTUAL_PREFERENCES: 'The AI personalised recommendations reflect your actual preferences and needs.',
+    NOTICE_HABITS: 'How often do you notice that the product recommendations on Jumia are based on your previous shopping habits?',
+    PURCHASE_FREQUENCY: 'How often do you purchase items based on Jumia’s personalised recommendations?',
+    CHALLENGE_IMPACT: 'How have the challenges you’ve experienced with Jumia’s AI-personalised recommendations (e.g., irrelevant recommendations, privacy concerns) affected your overall interaction with the platform?',
+    CHALLENGES: "What challenges or limitations have you experienced with Jumia's AI-personalised recommendation system? (Select all that apply)",
+    RELEVANCE_RANKING: 'How relevant do you find the personalised recommendations on Jumia?\n\n(Please rank the options below from 1 to 5, where 1 is the highest and 5 is the lowest.)\n',
+    IMPROVEMENT_RANKING: 'To what extent do you believe the AI-personalised recommendations improve your overall shopping experience on Jumia?\n(Please rank the options below from 1 to 5, where 1 is the highest and 5 is the low',
+    BETTER_CATER: 'How do you think Jumia’s AI-personalised recommendations could better cater to your needs, considering factors such as your purchasing habits, product preferences, income level, and browsing behaviour',
+    DATA_CONCERNS: 'What concerns, if any, do you have regarding the use of your personal data for AI-personalised recommendations on Jumia?',
+    ADDITIONAL_COMMENTS: 'Please provide any additional comments you have about Jumia’s AI-personalised recommendation system.',
+}
+
+# Mapping dictionaries for the ordinal columns
+satisfaction_mapping = {
+    "Very dissatisfied": 1, "Dissatisfied": 2, "Neutral": 3, "Satisfied": 4, "Very satisfied": 5
+}
+trust_mapping = {
+    "Not at all": 1, "No, not really": 2, "Neutral": 3, "Yes, somewhat": 4, "Yes, significantly": 5,
+    "No, not at all": 1,  # the form's wording of "Not at all"
+}
+engagement_mapping = {
+    "Never": 1, "Rarely": 2, "Sometimes": 3, "Often": 4, "Always": 5
+}
+loyalty_mapping = {
+    "Strongly disagree": 1, "Disagree": 2, "Neutral": 3, "Agree": 4, "Strongly agree": 5
+}
+preference_mapping = {
+    "Extremely not well": 1, "Somewhat not well": 2, "Neutral": 3, "Somewhat well": 4, "Extremely well": 5
+}
+relevance_mapping = {
+    "Not well at all": 1, "Slightly well": 2, "Moderately well": 3, "Very well": 4, "Extremely well": 5
+}
+privacy_mapping = {
+    "Not at all concerned": 1, "Not concerned": 2, "Neutral": 3, "Somewhat concerned": 4, "Very concerned": 5
+}
+data_comfort_mapping = {
+    "Very uncomfortable": 1, "Somewhat uncomfortable": 2, "Neutral": 3, "Somewhat comfortable": 4, "Very comfortable": 5
+}
+shopping_mapping = {
+    "When needed": 1, "Every month": 2, "Every other week": 3, "Once a week": 4, "Every day": 5
+}
+
+# Derived numeric column -> (question, mapping), in the order the notebook creates them
+ORDINAL_LEVELS = {
+    'Satisfaction_Level': (SATISFACTION, satisfaction_mapping),
+    'Trust_Level': (TRUST, trust_mapping),
+    'Engagement_Level': (INTERACTION, engagement_mapping),
+    'Loyalty_Level': (LOYALTY, loyalty_mapping),
+    'Preference_Level': (PREFERENCE, preference_mapping),
+    'Cultural_Relevance': (CULTURAL_RELEVANCE, relevance_mapping),
+    'Economic_Relevance': (ECONOMIC_RELEVANCE, relevance_mapping),
+    'Digital_Literacy': (INTERACTION, engagement_mapping),
+    'Shopping_Frequency_Level': (SHOPPING_FREQUENCY, shopping_mapping),
+    'Privacy_Concern_Level': (PRIVACY_CONCERN, privacy_mapping),
+    'Data_Comfort_Level': (DATA_COMFORT, data_comfort_mapping),
+    'Interaction_Frequency': (INTERACTION, engagement_mapping),
+    'Effectiveness_Perception': (SATISFACTION, satisfaction_mapping),
+}
+
+# Ranking questions: standard labels in order, and the weight given to each label
+# when turning a respondent's ranking into a single score
+relevance_labels = ['Extremely relevant', 'Very relevant', 'Moderately relevant', 'Slightly relevant', 'Not relevant at all']
+improvement_labels = ['Significantly improve', 'Somewhat improve', 'No effect', 'Somewhat worsen', 'Significantly worsen']
+rank_weights = [5, 4, 3, 2, 1]
+
+RANKINGS = {
+    'Relevance_Score': (RELEVANCE_RANKING, relevance_labels),
+    'Improvement_Score': (IMPROVEMENT_RANKING, improvement_labels),
+}
+
+# Answers to the age question, youngest first
+age_groups = ['18-24', '25-34', '35-44', '45-54', '55+']
+
+# Answer options of the closed questions without an ordinal mapping, as listed in
+# the Forms summary (Data Collection Summary.pdf) and normalized like the answers
+# (straight apostrophes). Income options are the keys of income_mapping.
+ANSWER_OPTIONS = {
+    AGE: age_groups,
+    GENDER: ['Woman', 'Man', 'Non-binary', 'Prefer not to say', 'Other'],
+    REPEAT_PURCHASE: ['Yes, very much', 'Yes, somewhat', "No, they haven't influenced my decision",
+                      'No, they discouraged me from repeat purchases'],
+    INCOME_RELEVANCE: ['Yes, greatly', 'Yes, somewhat', 'No, not really', 'No, not at all'],
+    ACTUAL_PREFERENCES: ['Strongly agree', 'Agree', 'Neutral', 'Disagree', 'Strongly disagree'],
+    NOTICE_HABITS: ['Always', 'Often', 'Sometimes', 'Rarely', 'Never'],
+    PURCHASE_FREQUENCY: ['Never', 'Rarely', 'Occasionally', 'Often', 'Always'],
+    CHALLENGE_IMPACT: ['No Impact', 'Slight Impact', 'Moderate Impact', 'Considerable Impact',
+                       'Significant Negative Impact'],
+    CHALLENGES: ['Irrelevant recommendations', 'Privacy concerns over the use of personal data',
+                 'Recommendations are repetitive', 'Lack of diversity in product recommendations',
+                 'No challenges encountered', 'Other'],
+}
+
+# Questions with an "Other" option: the export holds the respondent's own wording
+# instead, so answers outside the options are write-ins rather than codebook gaps
+WRITE_IN_QUESTIONS = [GENDER, CHALLENGES]
+
+# Categorical groupings used by the hypothesis tests. The keys are the answers as
+# normalized at load time (validation.normalize_survey), so the export's
+# "\xa0₦100,000 - ₦200,000" matches the plain income key.
+gender_mapping = {
+    'Man': 'Male',
+    'Woman': 'Female',
+}
+income_mapping = {
+    "Below ₦50,000": "Low",
+    "₦50,000 - ₦100,000": "Low",
+    "₦100,000 - ₦200,000": "Medium",
+    "₦200,000 - ₦500,000": "High",
+    "Above ₦500,000": "High"
+}
+fairness_mapping = {
+    "Extremely well": "Positive",
+    "Very well": "Positive",
+    "Moderately well": "Neutral",
+    "Slightly well": "Neutral",
+    "Not well at all": "Negative"
+}
+
+# Answers to the challenges question that mean no limitation was experienced
+NO_CHALLENGE_ANSWERS = ['No challenges encountered', 'Nil']
+
+# Attention-check questions and the answers that pass them. The current
+# instrument has none; add the question (its ID, with the text in QUESTION_TEXTS)
+# and accepted answers when a wave includes one (e.g. "Select 'Agree' for this question").
+ATTENTION_CHECKS = {}
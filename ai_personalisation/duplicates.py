@@ -0,0 +1,251 @@
+# Duplicate, near-duplicate and straight-lined responses.
+# Online exports contain repeated submissions and copy-pasted comments, which
+# inflate the value counts and the test statistics. Three checks run on the raw
+# export, before clean_survey drops incomplete rows:
+#   - exact duplicates: rows whose answers (all questionnaire columns, ignoring the
+#     start time and ID) hash to the same 64-bit value;
+#   - near duplicates: respondents whose free-text answers are nearly identical,
+#     found with MinHash signatures over character shingles and locality-sensitive
+#     hashing (only respondents sharing an LSH bucket are compared, so the cost
+#     grows with the number of respondents rather than with its square). Short,
+#     generic comments make different respondents look alike, so near-identical
+#     text alone is only a flag; a response is treated as a copy when its closed
+#     answers also agree with the earlier response's;
+#   - straight-lining: the same scale position on every Likert question.
+# All three are vectorized with NumPy; MinHash signatures are computed in chunks
+# of respondents, in parallel processes for large exports.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from . import codebook
+from .encoding import encode_levels
+from .lazy import lazy_import
+
+csgraph = lazy_import('scipy.sparse.csgraph')
+sparse = lazy_import('scipy.sparse')
+
+# Characters per shingle and MinHash signature layout (bands x rows = permutations).
+# 16 bands of 4 rows make pairs with Jaccard similarity above ~0.5 likely candidates.
+SHINGLE_SIZE = 5
+BANDS = 16
+ROWS = 4
+# Share of matching signature entries (estimated Jaccard similarity) for a near duplicate
+SIMILARITY = 0.8
+# Closed answers that may differ between a near-duplicate and the earlier response
+# for it to count as a copy
+MAX_ANSWER_DIFFERENCES = 2
+# Shorter combined answers ("nil", "no comment", ...) are legitimately repeated and not compared
+MIN_TEXT_LENGTH = 30
+
+# Likert questions checked for straight-lining (each question once) and the
+# number of them that must be answered
+LIKERT_BATTERY = ['Satisfaction_Level', 'Trust_Level', 'Engagement_Level', 'Loyalty_Level', 'Preference_Level',
+                  'Cultural_Relevance', 'Economic_Relevance', 'Privacy_Concern_Level', 'Data_Comfort_Level']
+MIN_ITEMS = 5
+
+# Respondents whose signatures are computed together by one worker
+CHUNK_SIZE = 50000
+
+# Random (odd multiplier, offset) pairs of the multiply-shift hash functions
+# h -> (a * h + b) mod 2^64 >> 32 used as the MinHash permutations
+def _permutations(n, seed):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, size=n, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=n, dtype=np.uint64)
+    return a, b
+
+
+# Lower-case letters and digits separated by single spaces
+def normalize_texts(texts):
+    return (texts.astype('string').str.lower()
+            .str.replace(r'[^\w]+|_', ' ', regex=True).str.strip().fillna(''))
+
+
+# (document, hash) of every k-character shingle of the texts, in document order
+# (repeated shingles are kept, since they don't change a minimum).
+# The texts are laid out as one UTF-32 code array (separated by NUL) and the hash of
+# every window is a polynomial over its code points, so no Python loop runs per text.
+def _shingles(texts, k=SHINGLE_SIZE):
+    texts = list(texts)
+    lengths = np.fromiter(map(len, texts), dtype='int64', count=len(texts))
+    codes = np.frombuffer('\x00'.join(texts).encode('utf-32-le'), dtype='<u4').astype(np.uint64)
+    if len(codes) < k:
+        return np.array([], dtype='int64'), np.array([], dtype=np.uint64)
+    documents = np.repeat(np.arange(len(texts)), lengths + 1)[:len(codes)]
+    n = len(codes) - k + 1
+    hashes = np.zeros(n, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for offset in range(k):
+            hashes = hashes * np.uint64(1000003) + codes[offset:offset + n]
+        hashes ^= hashes >> np.uint64(29)
+        hashes *= np.uint64(0xBF58476D1CE4E5B9)
+    valid = (documents[:n] == documents[k - 1:]) & (codes[k - 1:] != 0)
+    starts = np.flatnonzero(valid)
+    return documents[starts], hashes[starts] >> np.uint64(32)
+
+
+# MinHash signatures (texts x permutations, uint32) of a list of texts. Texts without
+# shingles get the maximum value in every entry.
+def minhash_signatures(texts, n_permutations=BANDS * ROWS, seed=0):
+    documents, hashes = _shingles(texts)
+    signatures = np.full((len(texts), n_permutations), 0xFFFFFFFF, dtype=np.uint32)
+    if len(hashes) == 0:
+        return signatures
+    starts = np.flatnonzero(np.r_[True, documents[1:] != documents[:-1]])
+    present = documents[starts]
+    a, b = _permutations(n_permutations, seed)
+    with np.errstate(over='ignore'):
+        for j in range(n_permutations):
+            permuted = ((hashes * a[j] + b[j]) >> np.uint64(32)).astype(np.uint32)
+            signatures[present, j] = np.minimum.reduceat(permuted, starts)
+    return signatures
+
+
+def _signature_chunk(texts):
+    return minhash_signatures(texts)
+
+
+# MinHash signatures of many texts, computed in chunks (in parallel processes when
+# there is more than one chunk)
+def _signatures(texts, n_jobs=None):
+    if len(texts) <= CHUNK_SIZE:
+        return minhash_signatures(texts)
+    chunks = [texts[start:start + CHUNK_SIZE] for start in range(0, len(texts), CHUNK_SIZE)]
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(chunks))
+    if n_jobs == 1:
+        parts = list(map(_signature_chunk, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            parts = list(pool.map(_signature_chunk, chunks))
+    return np.concatenate(parts)
+
+
+# Candidate pairs (i, j) of signatures sharing at least one LSH band. Within a bucket
+# every member is paired with the bucket's first member only, so a bucket of m
+# identical comments gives m - 1 pairs rather than m(m - 1)/2.
+def lsh_candidates(signatures, bands=BANDS, rows=ROWS):
+    n = len(signatures)
+    pairs = []
+    with np.errstate(over='ignore'):
+        for band in range(bands):
+            block = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+            keys = np.zeros(n, dtype=np.uint64)
+            for column in range(rows):
+                keys = keys * np.uint64(0x9E3779B97F4A7C15) + block[:, column]
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            first = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+            heads = order[np.flatnonzero(first)][np.cumsum(first) - 1]
+            members = ~first
+            pairs.append(np.column_stack([heads[members], order[members]]))
+    pairs = np.concatenate(pairs) if pairs else np.empty((0, 2), dtype='int64')
+    keys = np.sort(pairs.min(axis=1) * n + pairs.max(axis=1))
+    keys = keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) else keys
+    return np.column_stack([keys // n, keys % n])
+
+
+# Estimated Jaccard similarity of each pair (share of equal signature entries)
+def pair_similarity(signatures, pairs, chunk=100000):
+    similarity = np.empty(len(pairs))
+    for start in range(0, len(pairs), chunk):
+        part = pairs[start:start + chunk]
+        similarity[start:start + chunk] = (signatures[part[:, 0]] == signatures[part[:, 1]]).mean(axis=1)
+    return similarity
+
+
+# Cluster of every text: the position of the first text it is (transitively) a near
+# duplicate of, or -1 when it has none. Texts shorter than `min_length` are not compared.
+def near_duplicate_clusters(texts, similarity=SIMILARITY, min_length=MIN_TEXT_LENGTH, n_jobs=None):
+    texts = normalize_texts(pd.Series(texts)).reset_index(drop=True)
+    positions = np.flatnonzero((texts.str.len() >= min_length).to_numpy())
+    clusters = np.full(len(texts), -1, dtype='int64')
+    if len(positions) < 2:
+        return clusters
+    signatures = _signatures(texts.iloc[positions].tolist(), n_jobs=n_jobs)
+    pairs = lsh_candidates(signatures)
+    pairs = pairs[pair_similarity(signatures, pairs) >= similarity]
+    if len(pairs) == 0:
+        return clusters
+    graph = sparse.coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(positions),) * 2)
+    _, labels = csgraph.connected_components(graph, directed=False)
+    sizes = np.bincount(labels)
+    first = np.full(len(sizes), len(positions), dtype='int64')
+    np.minimum.at(first, labels, np.arange(len(positions)))
+    clustered = sizes[labels] > 1
+    clusters[positions[clustered]] = positions[first[labels[clustered]]]
+    return clusters
+
+
+# 64-bit hash of every row's answers to the questionnaire columns present
+def answer_hashes(df, columns=None):
+    columns = [c for c in (columns or codebook.QUESTION_COLUMNS) if c in df.columns]
+    return pd.Series(pd.util.hash_pandas_object(df[columns], index=False).to_numpy(), index=df.index,
+                     name='Answer_Hash')
+
+
+# Standard deviation of each respondent's Likert answers (scale positions 1-5), and
+# whether they gave the same position to at least MIN_ITEMS answered questions
+def straight_lining(df, items=None, min_items=MIN_ITEMS):
+    levels = encode_levels(df)
+    levels = levels[[c for c in (items or LIKERT_BATTERY) if c in levels.columns]]
+    answered = levels.notna().sum(axis=1)
+    spread = levels.std(axis=1, ddof=0)
+    return pd.DataFrame({'Likert_SD': spread, 'Straight_Lining': (spread == 0) & (answered >= min_items)},
+                        index=df.index)
+
+
+# Number of closed questions on which each response's answer differs from the
+# response at `positions` (missing answers compare equal to each other only)
+def answer_differences(df, positions, columns=None):
+    columns = [c for c in (columns or codebook.QUESTION_COLUMNS) if c in df.columns and c not in codebook.TEXT_COLUMNS]
+    codes = np.column_stack([pd.factorize(df[c])[0] for c in columns]) if columns \
+        else np.zeros((len(df), 0), dtype='int64')
+    return (codes != codes[np.asarray(positions)]).sum(axis=1)
+
+
+# Duplicate flags of every response of a raw export:
+#   Answer_Hash, Exact_Duplicate (a previous row has the same answers),
+#   Text_Cluster (label of the first response with near-identical free text, -1 if none),
+#   Near_Duplicate (a previous response has near-identical free text),
+#   Answer_Differences (closed answers differing from that first response, 0 outside a cluster),
+#   Copied_Response (a near duplicate whose closed answers also differ in at most
+#   `max_differences` questions),
+#   Likert_SD and Straight_Lining.
+# The first occurrence of a duplicate is never flagged.
+def duplicate_flags(df, similarity=SIMILARITY, max_differences=MAX_ANSWER_DIFFERENCES, n_jobs=None):
+    hashes = answer_hashes(df)
+    flags = pd.DataFrame({'Answer_Hash': hashes, 'Exact_Duplicate': hashes.duplicated(keep='first')}, index=df.index)
+
+    text_columns = [c for c in codebook.TEXT_COLUMNS if c in df.columns]
+    if text_columns:
+        combined = df[text_columns].fillna('').astype(str).agg(' '.join, axis=1) if len(text_columns) > 1 \
+            else df[text_columns[0]]
+        clusters = near_duplicate_clusters(combined, similarity=similarity, n_jobs=n_jobs)
+    else:
+        clusters = np.full(len(df), -1, dtype='int64')
+    clustered = clusters >= 0
+    labels = np.full(len(df), None, dtype=object)
+    labels[clustered] = np.asarray(df.index)[clusters[clustered]]
+    flags['Text_Cluster'] = labels
+    near = clustered & (clusters != np.arange(len(df)))
+    flags['Near_Duplicate'] = near
+    differences = answer_differences(df, np.where(clustered, clusters, np.arange(len(df))))
+    flags['Answer_Differences'] = differences
+    flags['Copied_Response'] = near & (differences <= max_differences)
+    return flags.join(straight_lining(df))
+
+
+# The responses left after dropping exact duplicates and copied responses (near-identical
+# text and closed answers), with the number of rows dropped. With text_only, every
+# near-identical text is dropped whatever the closed answers; with straight_lining,
+# straight-liners are dropped too.
+def drop_duplicate_responses(df, flags=None, straight_lining=False, text_only=False, n_jobs=None):
+    flags = flags if flags is not None else duplicate_flags(df, n_jobs=n_jobs)
+    drop = flags['Exact_Duplicate'] | flags['Near_Duplicate' if text_only else 'Copied_Response']
+    if straight_lining:
+        drop |= flags['Straight_Lining']
+    return df[~drop.to_numpy()], int(drop.sum())
@@ -0,0 +1,220 @@
+# Effect sizes with confidence intervals for the group comparisons.
+# The notebook splits respondents at the median of Trust_Level or
+# Privacy_Concern_Level and prints only the t-test statistic; these helpers
+# report how large the differences are (Cohen's d, Hedges' g, Cliff's delta /
+# rank-biserial correlation, eta and omega squared, Cramer's V) with analytic and
+# bootstrap confidence intervals. All outcomes and group pairs are handled at once
+# from cached per-group moments and value counts.
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from .lazy import lazy_import
+
+stats = lazy_import('scipy.stats')
+
+# Bootstrap replicates resampled together in one batch; each batch holds a few
+# arrays of BOOTSTRAP_BATCH x respondents values, so memory does not grow with
+# n_boot. Each batch draws from its own seed.
+BOOTSTRAP_BATCH = 25
+
+
+# Label respondents 'High' (at or above the median) or 'Low', as in the notebook's median splits
+def median_split(values):
+    median = values.median()
+    split = pd.Series(np.where(values >= median, 'High', 'Low'), index=values.index)
+    return split.where(values.notna())
+
+
+# Cohen's d with the pooled standard deviation
+def cohens_d(n1, mean1, var1, n2, mean2, var2):
+    pooled = ((n1 - 1) * var1 + (n2 - 1) * var2) / (n1 + n2 - 2)
+    return (mean1 - mean2) / np.sqrt(pooled)
+
+
+# Hedges' g: Cohen's d with the small-sample bias correction
+def hedges_g(d, n1, n2):
+    return d * (1 - 3 / (4 * (n1 + n2) - 9))
+
+
+# Normal-approximation standard error of d
+def d_standard_error(d, n1, n2):
+    return np.sqrt((n1 + n2) / (n1 * n2) + d ** 2 / (2 * (n1 + n2)))
+
+
+# Cliff's delta from value counts of two groups (last axis indexes the sorted distinct
+# values). For two independent groups this equals the rank-biserial correlation.
+def cliffs_delta_from_counts(counts1, counts2):
+    below = np.cumsum(counts2, axis=-1) - counts2
+    above = counts2.sum(axis=-1, keepdims=True) - np.cumsum(counts2, axis=-1)
+    n1 = counts1.sum(axis=-1)
+    n2 = counts2.sum(axis=-1)
+    return (counts1 * (below - above)).sum(axis=-1) / (n1 * n2)
+
+
+# Eta squared and omega squared of a one-way ANOVA from group moments (groups on the last axis)
+def eta_omega_squared(n, mean, var):
+    total_n = n.sum(axis=-1)
+    grand_mean = (n * mean).sum(axis=-1) / total_n
+    between = (n * (mean - grand_mean[..., None]) ** 2).sum(axis=-1)
+    within = ((n - 1) * var).sum(axis=-1)
+    k = (n > 0).sum(axis=-1)
+    mean_square_within = within / (total_n - k)
+    total = between + within
+    return between / total, (between - (k - 1) * mean_square_within) / (total + mean_square_within)
+
+
+# Cramer's V of a contingency table
+def cramers_v(table):
+    table = np.asarray(table, dtype='float64')
+    chi2 = stats.chi2_contingency(table, correction=False)[0]
+    return float(np.sqrt(chi2 / (table.sum() * (min(table.shape) - 1))))
+
+
+# Cramer's V with a percentile bootstrap interval; replicate tables are drawn from the
+# multinomial distribution of the observed cells in one call
+def cramers_v_interval(table, n_boot=2000, level=0.95, seed=None):
+    table = np.asarray(table, dtype='float64')
+    n = int(table.sum())
+    rng = np.random.default_rng(seed)
+    draws = rng.multinomial(n, (table / n).ravel(), size=n_boot).reshape((n_boot,) + table.shape).astype('float64')
+    rows = draws.sum(axis=2, keepdims=True)
+    columns = draws.sum(axis=1, keepdims=True)
+    expected = rows * columns / n
+    with np.errstate(invalid='ignore', divide='ignore'):
+        chi2 = np.nansum(np.where(expected > 0, (draws - expected) ** 2 / expected, 0.0), axis=(1, 2))
+    values = np.sqrt(chi2 / (n * (min(table.shape) - 1)))
+    tail = (1 - level) / 2 * 100
+    lower, upper = np.percentile(values, [tail, 100 - tail])
+    return pd.Series({'cramers_v': cramers_v(table), 'lower': lower, 'upper': upper})
+
+
+class GroupEffects:
+    # Per-group counts, sums and sums of squares of every outcome, and per-group
+    # counts of every distinct outcome value, are accumulated once with np.bincount.
+    # All effect sizes below are computed from these arrays, and the bootstrap reuses
+    # the same bincount layout with the replicate number folded into the key.
+
+    def __init__(self, df, group, outcomes):
+        self.outcomes = list(outcomes)
+        codes, groups = pd.factorize(df[group], sort=True)
+        keep = codes >= 0
+        self.groups = list(groups)
+        self._codes = codes[keep]
+        self._values = df.loc[keep, self.outcomes].to_numpy(dtype='float64')
+        self._value_codes = []
+        self._distinct = []
+        for j in range(len(self.outcomes)):
+            column = self._values[:, j]
+            distinct, value_codes = np.unique(column[~np.isnan(column)], return_inverse=True)
+            full = np.full(len(column), -1)
+            full[~np.isnan(column)] = value_codes
+            self._value_codes.append(full)
+            self._distinct.append(len(distinct))
+        self._moments = None
+
+    # Counts, means and variances with shape (outcomes, groups), plus value counts per outcome
+    def _accumulate(self, rows, replicates=1):
+        G = len(self.groups)
+        key = np.arange(replicates)[:, None] * G + self._codes[rows] if rows.ndim == 2 else self._codes[rows]
+        key = key.ravel()
+        size = replicates * G
+        n, mean, var, counts = [], [], [], []
+        for j in range(len(self.outcomes)):
+            values = self._values[rows, j].ravel()
+            present = ~np.isnan(values)
+            filled = np.where(present, values, 0.0)
+            count = np.bincount(key, weights=present, minlength=size)
+            total = np.bincount(key, weights=filled, minlength=size)
+            squares = np.bincount(key, weights=filled ** 2, minlength=size)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                m = total / count
+                v = (squares - total * m) / (count - 1)
+            U = self._distinct[j]
+            value_codes = self._value_codes[j][rows].ravel()
+            cell = key[value_codes >= 0] * U + value_codes[value_codes >= 0]
+            n.append(count.reshape(replicates, G))
+            mean.append(m.reshape(replicates, G))
+            var.append(v.reshape(replicates, G))
+            counts.append(np.bincount(cell, minlength=size * U).reshape(replicates, G, U))
+        return np.stack(n, 1), np.stack(mean, 1), np.stack(var, 1), counts
+
+    @property
+    def moments(self):
+        if self._moments is None:
+            n, mean, var, counts = self._accumulate(np.arange(len(self._codes)))
+            self._moments = (n[0], mean[0], var[0], [c[0] for c in counts])
+        return self._moments
+
+    def _pair_effects(self, n, mean, var, counts, i, j):
+        d = cohens_d(n[..., i], mean[..., i], var[..., i], n[..., j], mean[..., j], var[..., j])
+        delta = np.stack([cliffs_delta_from_counts(c[..., i, :], c[..., j, :]) for c in counts], axis=-1)
+        return d, hedges_g(d, n[..., i], n[..., j]), delta
+
+    def _index(self, group):
+        try:
+            return self.groups.index(group)
+        except ValueError:
+            raise KeyError(f"Unknown group '{group}', expected one of {self.groups}") from None
+
+    # Effect sizes of first minus second for every outcome, with analytic intervals for d and g
+    def compare(self, first, second, level=0.95):
+        i, j = self._index(first), self._index(second)
+        n, mean, var, counts = self.moments
+        d, g, delta = self._pair_effects(n, mean, var, counts, i, j)
+        z = stats.norm.ppf(1 - (1 - level) / 2)
+        se = d_standard_error(d, n[:, i], n[:, j])
+        correction = hedges_g(1.0, n[:, i], n[:, j])
+        return pd.DataFrame({
+            'n1': n[:, i].astype('int64'), 'n2': n[:, j].astype('int64'),
+            'mean_difference': mean[:, i] - mean[:, j],
+            'cohens_d': d, 'd_lower': d - z * se, 'd_upper': d + z * se,
+            'hedges_g': g, 'g_lower': (d - z * se) * correction, 'g_upper': (d + z * se) * correction,
+            'cliffs_delta': delta, 'rank_biserial': delta,
+        }, index=self.outcomes)
+
+    # compare() for every pair of groups
+    def compare_all(self, level=0.95):
+        tables = {(a, b): self.compare(a, b, level) for a, b in combinations(self.groups, 2)}
+        return pd.concat(tables, names=['group1', 'group2', 'outcome'])
+
+    # Eta squared and omega squared across all groups for every outcome
+    def anova(self):
+        n, mean, var, _ = self.moments
+        eta, omega = eta_omega_squared(n, mean, var)
+        return pd.DataFrame({'eta_squared': eta, 'omega_squared': omega}, index=self.outcomes)
+
+    # Effect sizes of one batch of bootstrap replicates
+    def _bootstrap_batch(self, size, seed, pair):
+        rows = np.random.default_rng(seed).integers(0, len(self._codes), size=(size, len(self._codes)))
+        n, mean, var, counts = self._accumulate(rows, replicates=size)
+        eta, omega = eta_omega_squared(n, mean, var)
+        draws = {'eta_squared': eta, 'omega_squared': omega}
+        if pair is not None:
+            d, g, delta = self._pair_effects(n, mean, var, counts, *pair)
+            draws.update({'cohens_d': d, 'hedges_g': g, 'cliffs_delta': delta})
+        return draws
+
+    # Percentile bootstrap intervals. Replicates are resampled BOOTSTRAP_BATCH at a
+    # time and the group moments of a batch come from one bincount per outcome and
+    # statistic; only the effect sizes of each replicate are kept.
+    def bootstrap(self, first=None, second=None, n_boot=2000, level=0.95, seed=None):
+        pair = (self._index(first), self._index(second)) if first is not None else None
+        sizes = np.diff(np.append(np.arange(0, n_boot, BOOTSTRAP_BATCH), n_boot))
+        batches = [self._bootstrap_batch(size, batch_seed, pair)
+                   for size, batch_seed in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes)))]
+        draws = {effect: np.concatenate([batch[effect] for batch in batches]) for effect in batches[0]}
+
+        tail = (1 - level) / 2 * 100
+        estimates = self.anova()
+        if first is not None:
+            estimates = estimates.join(self.compare(first, second)[['cohens_d', 'hedges_g', 'cliffs_delta']])
+        rows = []
+        for effect, values in draws.items():
+            lower, upper = np.nanpercentile(values, [tail, 100 - tail], axis=0)
+            for k, outcome in enumerate(self.outcomes):
+                rows.append({'outcome': outcome, 'effect': effect, 'estimate': estimates.loc[outcome, effect],
+                             'lower': lower[k], 'upper': upper[k]})
+        return pd.DataFrame(rows).set_index(['outcome', 'effect']).sort_index()
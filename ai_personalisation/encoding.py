@@ -0,0 +1,92 @@
+# Encoding of the survey answers into the numeric columns used by the analysis.
+
+import numpy as np
+import pandas as pd
+
+from . import codebook
+
+
+# Apply every ordinal mapping from the codebook whose question is present in the data
+def encode_levels(df):
+    encoded = {}
+    for name, (question, mapping) in codebook.ORDINAL_LEVELS.items():
+        if question in df.columns:
+            encoded[name] = df[question].map(mapping).astype('float64')
+    return pd.DataFrame(encoded, index=df.index)
+
+
+# Turn ';'-separated ranking answers into a respondent x label matrix of ranks.
+# Ranks are positions in the answer (1 is highest); labels missing from an answer
+# get the lowest unused rank, as in the notebook's fill_missing_rank.
+def ranking_matrix(responses, labels):
+    answered = responses.dropna()
+    items = answered.astype(str).str.split(';').explode()
+    position = items.groupby(level=0).cumcount() + 1
+    items = items.str.strip()
+    frame = pd.DataFrame({'label': items.to_numpy(), 'rank': position.to_numpy()}, index=items.index)
+    frame = frame[frame['label'].isin(labels)]
+    frame = frame[~frame.set_index('label', append=True).index.duplicated(keep='last')]
+    ranks = frame.reset_index().pivot(index='index', columns='label', values='rank')
+    ranks = ranks.reindex(index=answered.index, columns=labels).astype('float64')
+
+    values = ranks.to_numpy()
+    candidates = np.arange(1, len(labels) + 1)
+    unused = (values[:, :, None] != candidates[None, None, :]).all(axis=1)
+    first_unused = np.where(unused.any(axis=1), unused.argmax(axis=1) + 1, np.nan)
+    values = np.where(np.isnan(values), first_unused[:, None], values)
+    return pd.DataFrame(values, index=answered.index, columns=labels)
+
+
+# Weighted score of a ranking matrix, with the highest rank getting the largest weight
+def ranking_score(ranks, weights=None):
+    weights = np.asarray(weights or codebook.rank_weights, dtype='float64')
+    return pd.Series(ranks.to_numpy() @ weights / weights.sum(), index=ranks.index)
+
+
+# Attach the weighted ranking scores (Relevance_Score, Improvement_Score)
+def encode_rankings(df):
+    scores = {}
+    for name, (question, labels) in codebook.RANKINGS.items():
+        if question in df.columns:
+            scores[name] = ranking_score(ranking_matrix(df[question], labels)).reindex(df.index)
+    return pd.DataFrame(scores, index=df.index)
+
+
+# Flag respondents reporting at least one challenge (missing answers count as none)
+def infrastructure_limitation(challenges):
+    pattern = '|'.join(codebook.NO_CHALLENGE_ANSWERS)
+    no_challenge = challenges.fillna(codebook.NO_CHALLENGE_ANSWERS[0]).astype(str).str.contains(pattern, regex=True)
+    return (~no_challenge).astype('int64')
+
+
+# Respondent x challenge indicator matrix of the multi-select challenges question.
+# Options are cleaned as in the notebook's challenge counts ('Nil' and blanks dropped).
+def challenge_matrix(challenges):
+    items = challenges.dropna().astype(str).str.split(';').explode().str.strip(' -')
+    items = items[(items != '') & (items.str.lower() != 'nil')]
+    if items.empty:
+        return pd.DataFrame(index=challenges.index, dtype='int8')
+    matrix = pd.crosstab(items.index, items).clip(upper=1)
+    matrix = matrix.reindex(challenges.index, fill_value=0).astype('int8')
+    matrix.index.name = challenges.index.name
+    matrix.columns.name = None
+    return matrix
+
+
+# Attach the categorical segments used by the hypothesis tests
+def encode_segments(df):
+    segments = {}
+    if codebook.INCOME in df.columns:
+        segments['Economic_Segment'] = df[codebook.INCOME].map(codebook.income_mapping)
+    if codebook.CHALLENGES in df.columns:
+        segments['Infrastructure_Limitation'] = infrastructure_limitation(df[codebook.CHALLENGES])
+    if codebook.PREFERENCE in df.columns:
+        segments['Fairness_Perception'] = df[codebook.PREFERENCE].map(codebook.fairness_mapping)
+    return pd.DataFrame(segments, index=df.index)
+
+
+# Return a copy of the survey with all derived columns attached
+def encode_survey(df):
+    derived = pd.concat([encode_levels(df), encode_rankings(df), encode_segments(df)], axis=1)
+    df = df.drop(columns=[c for c in derived.columns if c in df.columns])
+    return pd.concat([df, derived], axis=1)
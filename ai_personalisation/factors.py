@@ -0,0 +1,270 @@
+# Factor analysis of the Likert items.
+# Replaces eyeballing the correlation heatmaps with polychoric correlations (the
+# items are ordinal), exploratory factor analysis with parallel analysis to choose
+# the number of factors, and a lightweight confirmatory factor analysis.
+
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from .lazy import lazy_import
+
+optimize = lazy_import('scipy.optimize')
+special = lazy_import('scipy.special')
+
+# Encoded Likert items analysed by default (each question appears once; the
+# notebook's Digital_Literacy and Interaction_Frequency duplicate Engagement_Level)
+LIKERT_ITEMS = [
+    'Satisfaction_Level', 'Trust_Level', 'Engagement_Level', 'Loyalty_Level', 'Preference_Level',
+    'Cultural_Relevance', 'Economic_Relevance', 'Privacy_Concern_Level', 'Data_Comfort_Level',
+    'Shopping_Frequency_Level',
+]
+
+# Thresholds beyond this many standard deviations are treated as infinite
+THRESHOLD_LIMIT = 8.0
+
+# Gauss-Legendre nodes for the bivariate normal integral
+_NODES, _WEIGHTS = np.polynomial.legendre.leggauss(20)
+
+# Polychoric estimates kept in memory, keyed by the contingency table (the
+# sufficient statistic)
+CACHE_SIZE = 4096
+_CACHE = OrderedDict()
+
+# Uncached tables below which a matrix is fitted inline: each fit takes a few
+# milliseconds, less than starting a pool of worker processes
+PARALLEL_MIN_TABLES = 200
+
+
+def _norm_cdf(x):
+    return special.ndtr(x)
+
+
+# Bivariate standard normal CDF, vectorized over h and k, using
+#   Phi2(h, k; rho) = Phi(h) Phi(k) + 1/(2 pi) * int_0^rho exp(-(h^2 - 2rhk + k^2) / (2(1 - r^2))) / sqrt(1 - r^2) dr
+# with the integral evaluated by Gauss-Legendre quadrature
+def bivariate_normal_cdf(h, k, rho):
+    h = np.clip(np.asarray(h, dtype='float64'), -THRESHOLD_LIMIT, THRESHOLD_LIMIT)[..., None]
+    k = np.clip(np.asarray(k, dtype='float64'), -THRESHOLD_LIMIT, THRESHOLD_LIMIT)[..., None]
+    r = rho * (_NODES + 1) / 2
+    one_minus = 1 - r * r
+    integrand = np.exp(-(h * h - 2 * r * h * k + k * k) / (2 * one_minus)) / np.sqrt(one_minus)
+    integral = (integrand * _WEIGHTS).sum(axis=-1) * rho / 2
+    return _norm_cdf(h[..., 0]) * _norm_cdf(k[..., 0]) + integral / (2 * np.pi)
+
+
+# Thresholds of the latent normal variable from the marginal category counts
+def _thresholds(counts):
+    cumulative = np.cumsum(counts)[:-1] / counts.sum()
+    return np.concatenate([[-np.inf], special.ndtri(cumulative), [np.inf]])
+
+
+# Maximum-likelihood polychoric correlation of one contingency table
+def _fit_polychoric(table_bytes, shape):
+    table = np.frombuffer(table_bytes, dtype='float64').reshape(shape)
+    if shape[0] < 2 or shape[1] < 2:
+        return np.nan
+    row_tau = _thresholds(table.sum(axis=1))
+    col_tau = _thresholds(table.sum(axis=0))
+    upper_h, upper_k = np.meshgrid(row_tau[1:], col_tau[1:], indexing='ij')
+    lower_h, lower_k = np.meshgrid(row_tau[:-1], col_tau[:-1], indexing='ij')
+
+    def negative_log_likelihood(rho):
+        probabilities = (bivariate_normal_cdf(upper_h, upper_k, rho) - bivariate_normal_cdf(lower_h, upper_k, rho)
+                         - bivariate_normal_cdf(upper_h, lower_k, rho) + bivariate_normal_cdf(lower_h, lower_k, rho))
+        return -(table * np.log(np.maximum(probabilities, 1e-300))).sum()
+
+    return float(optimize.minimize_scalar(negative_log_likelihood, bounds=(-0.995, 0.995), method='bounded').x)
+
+
+def _fit_table(table):
+    return _fit_polychoric(*table)
+
+
+def _remember(key, rho):
+    _CACHE[key] = rho
+    if len(_CACHE) > CACHE_SIZE:
+        _CACHE.popitem(last=False)
+
+
+# Cache key of the contingency table of two ordinal series (pairwise complete observations)
+def _table_key(x, y):
+    table = pd.crosstab(x, y).to_numpy(dtype='float64')
+    return table.tobytes(), table.shape
+
+
+# Polychoric correlation of two ordinal series (pairwise complete observations)
+def polychoric(x, y):
+    key = _table_key(x, y)
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key]
+    rho = _fit_polychoric(*key)
+    _remember(key, rho)
+    return rho
+
+
+# Polychoric correlation matrix of the given items. The contingency tables are built
+# here and looked up in the cache; the missing likelihood maximizations (pure
+# Python/SciPy, bound by the GIL) run inline, or in worker processes when there are
+# at least PARALLEL_MIN_TABLES of them and n_jobs allows.
+def polychoric_matrix(df, items=None, n_jobs=None):
+    items = list(items or [c for c in LIKERT_ITEMS if c in df.columns])
+    pairs = list(combinations(range(len(items)), 2))
+    keys = [_table_key(df[items[i]], df[items[j]]) for i, j in pairs]
+    estimates = {}
+    for key in keys:
+        if key in _CACHE:
+            _CACHE.move_to_end(key)
+            estimates[key] = _CACHE[key]
+    missing = [key for key in dict.fromkeys(keys) if key not in estimates]
+    n_jobs = min(n_jobs or os.cpu_count() or 1, max(len(missing), 1))
+    if n_jobs == 1 or len(missing) < PARALLEL_MIN_TABLES:
+        fitted = list(map(_fit_table, missing))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            fitted = list(pool.map(_fit_table, missing, chunksize=max(len(missing) // (4 * n_jobs), 1)))
+    for key, rho in zip(missing, fitted):
+        estimates[key] = rho
+        _remember(key, rho)
+    matrix = np.eye(len(items))
+    for (i, j), key in zip(pairs, keys):
+        matrix[i, j] = matrix[j, i] = estimates[key]
+    return pd.DataFrame(matrix, index=items, columns=items)
+
+
+# Horn's parallel analysis: keep factors whose eigenvalues exceed the chosen
+# percentile of eigenvalues from uncorrelated normal data of the same size.
+# The random samples are drawn one iteration at a time and only their eigenvalues
+# kept, so memory does not grow with n_iter x n_obs.
+def parallel_analysis(corr, n_obs, n_iter=100, percentile=95, seed=None):
+    corr = np.asarray(corr, dtype='float64')
+    k = corr.shape[0]
+    rng = np.random.default_rng(seed)
+    random_eigen = np.empty((n_iter, k))
+    for iteration in range(n_iter):
+        sample = rng.standard_normal((n_obs, k))
+        random_eigen[iteration] = np.linalg.eigvalsh(np.corrcoef(sample, rowvar=False))[::-1]
+    observed = np.linalg.eigvalsh(corr)[::-1]
+    reference = np.percentile(random_eigen, percentile, axis=0)
+    exceeds = observed > reference
+    n_factors = int(np.argmin(exceeds)) if not exceeds.all() else k
+    table = pd.DataFrame({'observed': observed, 'random': reference}, index=np.arange(1, k + 1))
+    return max(n_factors, 1), table
+
+
+# Varimax rotation of a loading matrix
+def varimax(loadings, max_iter=100, tol=1e-6):
+    p, k = loadings.shape
+    rotation = np.eye(k)
+    criterion = 0.0
+    for _ in range(max_iter):
+        rotated = loadings @ rotation
+        u, s, vt = np.linalg.svd(loadings.T @ (rotated ** 3 - rotated @ np.diag((rotated ** 2).sum(axis=0)) / p))
+        rotation = u @ vt
+        previous, criterion = criterion, s.sum()
+        if criterion - previous < tol * criterion:
+            break
+    return loadings @ rotation
+
+
+# Principal-axis factor extraction of a correlation matrix
+def principal_axis(corr, n_factors, max_iter=200, tol=1e-6):
+    corr = np.asarray(corr, dtype='float64')
+    communalities = 1 - 1 / np.diag(np.linalg.pinv(corr))
+    for _ in range(max_iter):
+        reduced = corr.copy()
+        np.fill_diagonal(reduced, communalities)
+        values, vectors = np.linalg.eigh(reduced)
+        values, vectors = values[::-1][:n_factors], vectors[:, ::-1][:, :n_factors]
+        loadings = vectors * np.sqrt(np.maximum(values, 0.0))
+        updated = np.minimum((loadings ** 2).sum(axis=1), 0.995)
+        if np.abs(updated - communalities).max() < tol:
+            communalities = updated
+            break
+        communalities = updated
+    return loadings
+
+
+# Exploratory factor analysis: parallel analysis picks the number of factors unless
+# given, then principal-axis extraction with varimax rotation
+def exploratory_factor_analysis(corr, n_obs, n_factors=None, rotate=True, seed=None):
+    corr = pd.DataFrame(corr)
+    retained, eigen_table = parallel_analysis(corr.to_numpy(), n_obs, seed=seed)
+    n_factors = n_factors or retained
+    loadings = principal_axis(corr.to_numpy(), n_factors)
+    if rotate and n_factors > 1:
+        loadings = varimax(loadings)
+    loadings = loadings * np.where(loadings.sum(axis=0) < 0, -1.0, 1.0)
+    columns = [f'Factor_{i + 1}' for i in range(n_factors)]
+    return {
+        'n_factors': n_factors,
+        'eigenvalues': eigen_table,
+        'loadings': pd.DataFrame(loadings, index=corr.index, columns=columns),
+        'communalities': pd.Series((loadings ** 2).sum(axis=1), index=corr.index, name='communality'),
+    }
+
+
+# Confirmatory factor analysis by maximum likelihood on a correlation matrix.
+# `model` maps factor names to their items; factor variances are fixed at one and
+# factor correlations, loadings and unique variances are estimated.
+def confirmatory_factor_analysis(corr, n_obs, model):
+    corr = pd.DataFrame(corr)
+    items = [item for factor_items in model.values() for item in factor_items]
+    sample = corr.loc[items, items].to_numpy()
+    p, m = len(items), len(model)
+    pattern = np.zeros((p, m), dtype=bool)
+    row = 0
+    for j, factor_items in enumerate(model.values()):
+        pattern[row:row + len(factor_items), j] = True
+        row += len(factor_items)
+    n_loadings = pattern.sum()
+    lower = np.tril_indices(m, -1)
+    _, log_det_sample = np.linalg.slogdet(sample)
+
+    def unpack(theta):
+        loadings = np.zeros((p, m))
+        loadings[pattern] = theta[:n_loadings]
+        phi = np.eye(m)
+        phi[lower] = np.tanh(theta[n_loadings:n_loadings + len(lower[0])])
+        phi = phi + np.tril(phi, -1).T
+        uniqueness = np.exp(theta[n_loadings + len(lower[0]):])
+        return loadings, phi, uniqueness
+
+    def implied(theta):
+        loadings, phi, uniqueness = unpack(theta)
+        return loadings @ phi @ loadings.T + np.diag(uniqueness)
+
+    def discrepancy(theta):
+        sigma = implied(theta)
+        sign, log_det = np.linalg.slogdet(sigma)
+        if sign <= 0:
+            return 1e10
+        return log_det + np.trace(sample @ np.linalg.inv(sigma)) - log_det_sample - p
+
+    start = np.concatenate([np.full(n_loadings, 0.6), np.zeros(len(lower[0])), np.log(np.full(p, 0.6))])
+    fit = optimize.minimize(discrepancy, start, method='L-BFGS-B')
+    loadings, phi, uniqueness = unpack(fit.x)
+
+    n_params = len(start)
+    dof = p * (p + 1) // 2 - n_params
+    chi2 = (n_obs - 1) * fit.fun
+    baseline_chi2 = (n_obs - 1) * (np.log(np.diag(sample)).sum() - log_det_sample)
+    baseline_dof = p * (p - 1) // 2
+    rmsea = np.sqrt(max(chi2 - dof, 0) / (dof * (n_obs - 1))) if dof > 0 else np.nan
+    cfi = 1 - max(chi2 - dof, 0) / max(baseline_chi2 - baseline_dof, chi2 - dof, 1e-12)
+    residual = sample - implied(fit.x)
+    srmr = np.sqrt((residual[np.tril_indices(p)] ** 2).mean())
+
+    factors = list(model)
+    return {
+        'loadings': pd.DataFrame(loadings, index=items, columns=factors),
+        'factor_correlations': pd.DataFrame(phi, index=factors, columns=factors),
+        'uniqueness': pd.Series(uniqueness, index=items, name='uniqueness'),
+        'fit': pd.Series({'chi2': chi2, 'df': dof, 'rmsea': rmsea, 'cfi': cfi, 'srmr': srmr,
+                          'converged': bool(fit.success)}),
+    }
@@ -0,0 +1,119 @@
+# Lazy module proxies and import-time budgets.
+# scipy.stats alone takes about a second to import, so modules that only need it
+# for a few functions bind it through a proxy that imports the real module on
+# first attribute access. A run that only produces demographic summaries then
+# never imports scipy, statsmodels or sklearn.
+
+import importlib
+import os
+import pkgutil
+import re
+import subprocess
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    # Stands in for a module until one of its attributes is used
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+# The module itself when it is already imported, otherwise a proxy that imports it on first use
+def lazy_import(name):
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+# Cumulative import time budgets in seconds. The entry point and the modules used
+# by a demographics-only run are bounded by the cost of pandas itself; modules
+# that need scipy must not pull it in at import time.
+IMPORT_BUDGETS = {
+    'ai_personalisation': 0.05,
+    'ai_personalisation.lazy': 0.05,
+    'ai_personalisation.codebook': 0.05,
+    'ai_personalisation.schema': 0.05,
+    'ai_personalisation.cli': 0.05,
+    'ai_personalisation.stages': 0.05,
+    'ai_personalisation.report': 0.1,
+    'ai_personalisation.store': 0.75,
+    'ai_personalisation.loading': 0.75,
+    'ai_personalisation.encoding': 0.75,
+    'ai_personalisation.timeseries': 0.75,
+    'ai_personalisation.segments': 0.75,
+    'ai_personalisation.results': 0.75,
+    'ai_personalisation.effect_sizes': 0.75,
+    'ai_personalisation.paths': 0.75,
+    'ai_personalisation.factors': 0.75,
+    'ai_personalisation.duplicates': 0.75,
+    'ai_personalisation.quality': 0.75,
+    'ai_personalisation.missing': 0.75,
+    'ai_personalisation.validation': 0.75,
+    'ai_personalisation.weighting': 0.75,
+    'ai_personalisation.reliability': 0.75,
+    'ai_personalisation.text': 0.75,
+    'ai_personalisation.sentiment': 0.75,
+    'ai_personalisation.waves': 0.75,
+    'ai_personalisation.warehouse': 0.75,
+    'ai_personalisation.sql': 0.75,
+    'ai_personalisation.service': 0.75,
+}
+
+# Modules not measured: __main__ runs the command line when imported
+UNMEASURED = {'ai_personalisation.__main__'}
+
+_IMPORT_TIME = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)\s*$')
+
+
+# Cumulative import time (seconds) of each module, measured in fresh interpreters with
+# `python -X importtime`; the best of `repeat` runs is kept so cold disk caches do not count
+def import_times(modules=None, repeat=3):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    times = {}
+    for name in modules or IMPORT_BUDGETS:
+        for _ in range(repeat):
+            completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {name}'],
+                                       capture_output=True, text=True, env=env)
+            if completed.returncode != 0:
+                raise ImportError(f'Could not import {name}: {completed.stderr.strip().splitlines()[-1]}')
+            for line in completed.stderr.splitlines():
+                match = _IMPORT_TIME.match(line)
+                if match and match.group(2) == name:
+                    times[name] = min(times.get(name, float('inf')), int(match.group(1)) / 1e6)
+    return times
+
+
+# Package modules without an entry in IMPORT_BUDGETS
+def unbudgeted_modules():
+    package = os.path.dirname(os.path.abspath(__file__))
+    names = {f'{__package__}.{info.name}' for info in pkgutil.iter_modules([package])}
+    return sorted(names - set(IMPORT_BUDGETS) - UNMEASURED)
+
+
+# Modules whose import time exceeds their budget, as {module: (seconds, budget)}
+def over_budget(budgets=None):
+    budgets = budgets or IMPORT_BUDGETS
+    times = import_times(list(budgets))
+    return {name: (seconds, budgets[name]) for name, seconds in times.items() if seconds > budgets[name]}
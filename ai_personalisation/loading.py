@@ -0,0 +1,144 @@
+# Loading and first-pass cleaning of the survey export.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import codebook
+from .schema import rename_columns, resolve
+from .validation import normalize_survey
+
+# Timestamp layouts seen in Microsoft Forms exports, tried in order.
+# Month-first comes before day-first because that is what Forms writes by default.
+TIME_FORMATS = [
+    '%m/%d/%y %H:%M:%S',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%y %H:%M',
+    '%m/%d/%Y %H:%M',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+]
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Number of distinct timestamps checked when detecting the format
+FORMAT_SAMPLE_SIZE = 500
+
+
+# Pick the format that parses the most sampled timestamps (stopping early if one
+# parses all of them), or None if no format parses any
+def detect_time_format(values, formats=None):
+    sample = pd.Series(values).dropna().astype(str).str.strip()
+    sample = sample[sample != ''].drop_duplicates().head(FORMAT_SAMPLE_SIZE)
+    if sample.empty:
+        return None
+    best_format, best_count = None, 0
+    for fmt in formats or TIME_FORMATS:
+        parsed = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+        if parsed > best_count:
+            best_format, best_count = fmt, parsed
+        if best_count == len(sample):
+            break
+    return best_format
+
+
+# Parse 'Start time' values with one detected format.
+# Each distinct string is parsed once and the result broadcast back with the
+# factorized codes, since a Forms export repeats timestamps heavily.
+def parse_start_time(values, fmt=None):
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    codes, uniques = pd.factorize(values.astype('string').str.strip(), use_na_sentinel=True)
+    if fmt is None:
+        fmt = detect_time_format(uniques)
+    if fmt is None:
+        # Unknown layout: fall back to per-value inference, still only once per distinct value
+        parsed = pd.to_datetime(pd.Series(uniques, dtype=object), errors='coerce')
+    else:
+        parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format=fmt, errors='coerce')
+    parsed = parsed.to_numpy(dtype='datetime64[ns]')
+    result = np.full(len(codes), np.datetime64('NaT'), dtype='datetime64[ns]')
+    present = codes >= 0
+    result[present] = parsed[codes[present]]
+    return pd.Series(result, index=values.index, name=values.name)
+
+
+# Add 'Date' and 'Day of Week' derived from a parsed 'Start time'.
+# 'Date' stays a datetime64 column (midnight of the day) rather than Python date
+# objects, and 'Day of Week' is an ordered categorical backed by int8 codes.
+def add_date_parts(df):
+    times = df[codebook.START_TIME]
+    df['Date'] = times.dt.normalize()
+    weekday = times.dt.dayofweek.fillna(-1).astype('int8').to_numpy()
+    df['Day of Week'] = pd.Categorical.from_codes(weekday, categories=WEEKDAYS, ordered=True)
+    return df
+
+
+# Read a Parquet file, parsing 'Start time' inside Arrow when it is stored as text
+def _read_parquet(path, columns=None):
+    try:
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError:
+        df = pd.read_parquet(path)
+        return df[[c for c in df.columns if columns(c)]] if columns is not None else df
+
+    if columns is not None:
+        columns = [name for name in pq.read_schema(path).names if columns(name)]
+    table = pq.read_table(path, columns=columns)
+    if codebook.START_TIME in table.column_names:
+        index = table.column_names.index(codebook.START_TIME)
+        column = table.column(index)
+        if column.type in ('string', 'large_string'):
+            fmt = detect_time_format(column.slice(0, FORMAT_SAMPLE_SIZE * 10).to_pandas())
+            if fmt is not None:
+                parsed = pc.strptime(column, format=fmt, unit='s', error_is_null=True)
+                table = table.set_column(index, codebook.START_TIME, parsed)
+    return table.to_pandas()
+
+
+# Load the survey export from Excel, CSV or Parquet, with question columns renamed
+# to their IDs and the categorical answers normalized (see validation.py).
+# `columns` selects columns by question ID or text.
+def load_survey(path, columns=None):
+    extension = os.path.splitext(str(path))[1].lower()
+    selected = None
+    if columns is not None:
+        wanted = {resolve(column) for column in columns}
+        selected = lambda header: resolve(header) in wanted
+    if extension in ('.xlsx', '.xls'):
+        df = pd.read_excel(path, usecols=selected)
+    elif extension == '.csv':
+        df = pd.read_csv(path, usecols=selected)
+    elif extension in ('.parquet', '.pq'):
+        df = _read_parquet(path, columns=selected)
+    else:
+        raise ValueError(f"Unsupported survey file type: '{extension}'")
+    df = normalize_survey(rename_columns(df))
+
+    if codebook.START_TIME in df.columns:
+        df[codebook.START_TIME] = parse_start_time(df[codebook.START_TIME])
+    return df
+
+
+# Preliminary cleaning from the notebook: derive date parts, harmonise the gender
+# labels and drop rows missing the demographic variables required for the analysis.
+# Answers are normalized as in load_survey, for frames that were not loaded with it.
+# With `deduplicate`, exact and near-duplicate submissions (see duplicates.py) are
+# dropped first.
+def clean_survey(df, deduplicate=False):
+    df = normalize_survey(rename_columns(df))
+    if deduplicate:
+        from .duplicates import drop_duplicate_responses
+        df, _ = drop_duplicate_responses(df)
+    df = df.copy()
+    if codebook.START_TIME in df.columns:
+        df[codebook.START_TIME] = parse_start_time(df[codebook.START_TIME])
+        df = add_date_parts(df)
+    if codebook.GENDER in df.columns:
+        df[codebook.GENDER] = df[codebook.GENDER].replace(codebook.gender_mapping)
+    return df.dropna(subset=[codebook.AGE, codebook.INCOME])
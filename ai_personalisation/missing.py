@@ -0,0 +1,323 @@
+# Missing data: summaries, an MCAR diagnostic and multiple imputation.
+# The notebook drops incomplete rows before every test (and once permanently, for
+# the TAM regression), so each result is computed on a different subset. Instead,
+# the derived numeric columns can be imputed m times by chained equations and each
+# analysis run on every completed dataset, with the results pooled by Rubin's rules:
+#
+#     datasets = multiple_imputation(df, m=20)
+#     pooled_ols(datasets, 'Engagement_Level', ['Satisfaction_Level', 'Trust_Level'])
+#     pool_registries([hypothesis_tests(d)[0] for d in datasets])
+#
+# Every column is imputed by predictive mean matching on a Bayesian linear
+# regression of the other columns, so imputed values are always answers that were
+# actually given (levels 1-5 of an ordinal question stay on the scale). Columns
+# derived from the same question (e.g. Engagement_Level and Digital_Literacy) are
+# imputed once and copied. Imputations run in parallel processes.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from . import codebook
+from .lazy import lazy_import
+from .results import ResultsRegistry
+
+stats = lazy_import('scipy.stats')
+
+
+def _aliases():
+    first, aliases = {}, {}
+    for name, (question, _) in codebook.ORDINAL_LEVELS.items():
+        if question in first:
+            aliases[name] = first[question]
+        else:
+            first[question] = name
+    return aliases
+
+
+# Derived column -> the column with the same source question that is imputed in its place
+ALIASES = _aliases()
+
+# Columns imputed by default: one ordinal level per question and the ranking scores
+IMPUTATION_COLUMNS = [name for name in codebook.ORDINAL_LEVELS if name not in ALIASES] + list(codebook.RANKINGS)
+
+# Chained-equation settings: passes over the columns, donors for predictive mean
+# matching and the ridge added to the normal equations for stability
+ITERATIONS = 10
+DONORS = 5
+RIDGE = 1e-6
+
+
+# Missing count and share of every column
+def missingness_summary(df, columns=None):
+    data = df[columns] if columns is not None else df
+    missing = data.isna().sum()
+    return pd.DataFrame({'missing': missing, 'share': missing / max(len(data), 1),
+                         'observed': len(data) - missing, 'dtype': data.dtypes.astype(str)})
+
+
+# Distinct patterns of missing columns with the number of rows showing each, most common first
+def missingness_patterns(df, columns=None):
+    data = df[columns] if columns is not None else df
+    patterns = data.isna().value_counts().rename('rows').reset_index()
+    patterns.insert(0, 'missing_columns', patterns[data.columns].sum(axis=1))
+    return patterns
+
+
+# Group the rows of a NaN-containing matrix by missingness pattern:
+# (distinct observed masks, pattern of every row)
+def _patterns(x):
+    observed = ~np.isnan(x)
+    _, first, inverse = np.unique(np.packbits(observed, axis=1), axis=0, return_index=True, return_inverse=True)
+    return observed[first], inverse.ravel()
+
+
+# Maximum-likelihood mean and covariance of a multivariate normal sample with missing
+# values, by the EM algorithm (rows are processed one missingness pattern at a time)
+def em_estimates(x, max_iter=500, tol=1e-8):
+    n, p = x.shape
+    masks, inverse = _patterns(x)
+    groups = [x[inverse == k] for k in range(len(masks))]
+    mu = np.nanmean(x, axis=0)
+    sigma = np.diag(np.nanvar(x, axis=0))
+    for _ in range(max_iter):
+        total = np.zeros(p)
+        products = np.zeros((p, p))
+        for observed, rows in zip(masks, groups):
+            missing = ~observed
+            filled = rows.copy()
+            if missing.any():
+                correction = np.zeros((p, p))
+                if observed.any():
+                    coefficients = np.linalg.solve(sigma[np.ix_(observed, observed)], sigma[np.ix_(observed, missing)])
+                    filled[:, missing] = mu[missing] + (rows[:, observed] - mu[observed]) @ coefficients
+                    correction[np.ix_(missing, missing)] = (sigma[np.ix_(missing, missing)]
+                                                            - sigma[np.ix_(missing, observed)] @ coefficients)
+                else:
+                    filled[:, missing] = mu[missing]
+                    correction[np.ix_(missing, missing)] = sigma[np.ix_(missing, missing)]
+                products += len(rows) * correction
+            total += filled.sum(axis=0)
+            products += filled.T @ filled
+        new_mu = total / n
+        new_sigma = products / n - np.outer(new_mu, new_mu)
+        change = max(np.abs(new_mu - mu).max(), np.abs(new_sigma - sigma).max())
+        mu, sigma = new_mu, new_sigma
+        if change < tol:
+            break
+    return mu, sigma
+
+
+# Little's test of the hypothesis that the values are missing completely at random.
+# A small p-value means the missingness depends on the data (MCAR rejected), so
+# complete-case analysis is likely biased and imputation is preferable.
+def little_mcar_test(df, columns=None):
+    columns = [c for c in (columns or IMPUTATION_COLUMNS) if c in df.columns and df[c].notna().any()]
+    x = df[columns].to_numpy(dtype='float64')
+    x = x[~np.isnan(x).all(axis=1)]
+    mu, sigma = em_estimates(x)
+    masks, inverse = _patterns(x)
+    statistic, dof = 0.0, -len(columns)
+    for k, observed in enumerate(masks):
+        rows = x[inverse == k][:, observed]
+        difference = rows.mean(axis=0) - mu[observed]
+        statistic += len(rows) * difference @ np.linalg.solve(sigma[np.ix_(observed, observed)], difference)
+        dof += observed.sum()
+    p_value = stats.chi2.sf(statistic, dof) if dof > 0 else np.nan
+    return pd.Series({'statistic': statistic, 'df': dof, 'p_value': p_value, 'patterns': len(masks), 'n': len(x)},
+                     name='little_mcar')
+
+
+# Values of the donors nearest each missing row's prediction: the `donors` observed
+# rows with the closest predicted values are found through a sorted search, and one
+# of them is drawn at random for every missing row
+def _match(rng, predicted_observed, values_observed, predicted_missing, donors):
+    order = np.argsort(predicted_observed, kind='stable')
+    ranked = predicted_observed[order]
+    position = np.searchsorted(ranked, predicted_missing)
+    candidates = np.clip(position[:, None] + np.arange(-donors, donors), 0, len(ranked) - 1)
+    nearest = np.argsort(np.abs(ranked[candidates] - predicted_missing[:, None]), axis=1, kind='stable')[:, :donors]
+    chosen = nearest[np.arange(len(candidates)), rng.integers(0, nearest.shape[1], len(candidates))]
+    return values_observed[order[candidates[np.arange(len(candidates)), chosen]]]
+
+
+class ChainedImputer:
+    # Multiple imputation by chained equations with predictive mean matching.
+    # Each pass regresses every incomplete column on all the others (with their
+    # current imputations), draws the coefficients from their posterior and refills
+    # the column's missing values from observed donors with similar predictions.
+
+    def __init__(self, df, columns=None, iterations=ITERATIONS, donors=DONORS):
+        columns = [c for c in (columns or IMPUTATION_COLUMNS) if c in df.columns and df[c].notna().any()]
+        self.columns = columns
+        self.index = df.index
+        self.values = df[columns].to_numpy(dtype='float64')
+        self.missing = np.isnan(self.values)
+        self.iterations = iterations
+        self.donors = donors
+        # Least-missing columns are filled first
+        counts = self.missing.sum(axis=0)
+        self.order = [j for j in np.argsort(counts, kind='stable') if counts[j] > 0]
+
+    # One completed copy of the imputed columns
+    def impute(self, seed=None):
+        rng = np.random.default_rng(seed)
+        x = self.values.copy()
+        n, p = x.shape
+        for j in self.order:
+            observed = x[~self.missing[:, j], j]
+            x[self.missing[:, j], j] = rng.choice(observed, size=self.missing[:, j].sum())
+        design = np.ones((n, p))
+        for _ in range(self.iterations):
+            for j in self.order:
+                missing = self.missing[:, j]
+                design[:, 1:] = np.delete(x, j, axis=1)
+                a_obs, a_mis, y = design[~missing], design[missing], x[~missing, j]
+                gram = a_obs.T @ a_obs
+                gram[np.diag_indices(p)] += RIDGE * np.maximum(np.diag(gram), 1.0)
+                covariance = np.linalg.inv(gram)
+                beta = covariance @ (a_obs.T @ y)
+                residuals = y - a_obs @ beta
+                scale = np.sqrt(residuals @ residuals / rng.chisquare(max(len(y) - p, 1)))
+                factor = np.linalg.cholesky((covariance + covariance.T) / 2)
+                drawn = beta + scale * factor @ rng.standard_normal(p)
+                x[missing, j] = _match(rng, a_obs @ beta, y, a_mis @ drawn, min(self.donors, len(y)))
+        return pd.DataFrame(x, index=self.index, columns=self.columns)
+
+
+# The survey with its imputed columns replaced and their aliases copied from them
+def complete(df, imputed):
+    completed = df.copy()
+    completed[imputed.columns] = imputed
+    for alias, source in ALIASES.items():
+        if alias in completed.columns and source in imputed.columns:
+            completed[alias] = imputed[source]
+    return completed
+
+
+# Imputer of the worker processes, set once by the pool initializer
+_WORKER_IMPUTER = None
+
+
+def _init_worker(imputer):
+    global _WORKER_IMPUTER
+    _WORKER_IMPUTER = imputer
+
+
+def _impute(seed):
+    return _WORKER_IMPUTER.impute(seed)
+
+
+# m completed copies of the survey, imputed in parallel processes with independent
+# random streams (reproducible for a given seed)
+def multiple_imputation(df, m=5, columns=None, iterations=ITERATIONS, seed=0, n_jobs=None):
+    imputer = ChainedImputer(df, columns, iterations=iterations)
+    seeds = np.random.SeedSequence(seed).spawn(m)
+    n_jobs = min(n_jobs or os.cpu_count() or 1, m)
+    if n_jobs == 1 or not imputer.order:
+        frames = [imputer.impute(s) for s in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(imputer,)) as pool:
+            frames = list(pool.map(_impute, seeds))
+    return [complete(df, frame) for frame in frames]
+
+
+# Rubin's rules for m estimates (rows) of k parameters (columns) and their squared
+# standard errors. `dof` is the complete-data degrees of freedom, used for the
+# Barnard-Rubin small-sample correction; without it the large-sample df is used.
+def rubin(estimates, variances, dof=None):
+    q = np.atleast_2d(np.asarray(estimates, dtype='float64'))
+    u = np.atleast_2d(np.asarray(variances, dtype='float64'))
+    m = q.shape[0]
+    estimate = q.mean(axis=0)
+    within = u.mean(axis=0)
+    between = q.var(axis=0, ddof=1) if m > 1 else np.zeros(q.shape[1])
+    total = within + (1 + 1 / m) * between
+    with np.errstate(divide='ignore', invalid='ignore'):
+        riv = (1 + 1 / m) * between / within
+        lam = (1 + 1 / m) * between / total
+        df = (m - 1) / lam ** 2
+        if dof is not None:
+            observed = (dof + 1) / (dof + 3) * dof * (1 - lam)
+            df = 1 / (1 / df + 1 / observed)
+        fmi = (riv + 2 / (df + 3)) / (riv + 1)
+        statistic = estimate / np.sqrt(total)
+    p_value = 2 * stats.t.sf(np.abs(statistic), df)
+    return pd.DataFrame({'estimate': estimate, 'std_error': np.sqrt(total), 'statistic': statistic, 'df': df,
+                         'p_value': p_value, 'riv': riv, 'fmi': fmi})
+
+
+# Pooled test of m chi-square statistics with `dof` degrees of freedom (the D2
+# statistic of Li, Meng, Raghunathan and Rubin, 1991): (F statistic, denominator df,
+# p-value, relative increase in variance)
+def pool_chi2(statistics, dof):
+    d = np.asarray(statistics, dtype='float64')
+    m = len(d)
+    riv = (1 + 1 / m) * np.var(np.sqrt(d), ddof=1) if m > 1 else 0.0
+    if riv == 0:
+        # Identical statistics (the test does not involve imputed values)
+        return d.mean() / dof, np.inf, stats.chi2.sf(d.mean(), dof), 0.0
+    statistic = max((d.mean() / dof - (m + 1) / (m - 1) * riv) / (1 + riv), 0.0)
+    denominator = dof ** (-3 / m) * (m - 1) * (1 + 1 / riv) ** 2
+    return statistic, denominator, stats.f.sf(statistic, dof, denominator), riv
+
+
+# OLS fitted on every completed dataset and pooled by Rubin's rules
+def pooled_ols(datasets, outcome, predictors):
+    import statsmodels.api as sm
+
+    models = [sm.OLS(d[outcome], sm.add_constant(d[predictors]), missing='drop').fit() for d in datasets]
+    pooled = rubin([model.params for model in models], [model.bse ** 2 for model in models],
+                   dof=np.mean([model.df_resid for model in models]))
+    pooled.index = models[0].params.index
+    return pooled.rename(columns={'estimate': 'coefficient', 'statistic': 't_value'})
+
+
+def _pool_row(rows):
+    first = rows.iloc[0]
+    test = first['test']
+    n = rows['n'].mean() if rows['n'].notna().any() else None
+    if test == 'OLS':
+        effect = rows['effect'].to_numpy(dtype='float64')
+        se = effect / rows['statistic'].to_numpy(dtype='float64')
+        pooled = rubin(effect[:, None], se[:, None] ** 2, dof=first['df']).iloc[0]
+        return dict(statistic=pooled['statistic'], df=pooled['df'], p_value=pooled['p_value'],
+                    effect=pooled['estimate'], n=n, riv=pooled['riv'])
+    if test in ('pearsonr', 'spearmanr'):
+        z = np.arctanh(rows['statistic'].to_numpy(dtype='float64').clip(-0.999999, 0.999999))
+        pooled = rubin(z[:, None], 1 / (rows['n'].to_numpy(dtype='float64')[:, None] - 3)).iloc[0]
+        return dict(statistic=np.tanh(pooled['estimate']), df=pooled['df'], p_value=pooled['p_value'],
+                    effect=rows['effect'].mean(), n=n, riv=pooled['riv'])
+    # Other tests are pooled as chi-square statistics: t^2 on 1 df, F x numerator df
+    statistics = rows['statistic'].to_numpy(dtype='float64')
+    if test == 'ttest_ind':
+        dof, chi2 = 1, statistics ** 2
+    elif test == 'chi2_contingency':
+        dof, chi2 = first['df'], statistics
+    else:
+        dof, chi2 = first['df'], statistics * first['df']
+    if dof is None or not np.isfinite(dof):
+        return dict(statistic=statistics.mean(), df=None, p_value=np.nan, effect=rows['effect'].mean(), n=n, riv=np.nan)
+    statistic, _, p_value, riv = pool_chi2(chi2, dof)
+    return dict(statistic=statistic, df=dof, p_value=p_value, effect=rows['effect'].mean(), n=n, riv=riv)
+
+
+# One registry pooling the same test battery run on every completed dataset.
+# Regression coefficients and correlations (on Fisher's z) are pooled by Rubin's
+# rules; t, F and chi-square tests by the D2 statistic (recorded as an F statistic).
+def pool_registries(registries):
+    frames = [registry.frame() for registry in registries]
+    keys = ['test', 'hypothesis', 'outcome', 'predictor', 'segment']
+    if any(len(frame) != len(frames[0]) for frame in frames) or \
+            any(not frame[keys].equals(frames[0][keys]) for frame in frames):
+        raise ValueError('The registries do not hold the same tests')
+    stacked = pd.concat(frames, keys=range(len(frames)), names=['imputation', 'row'])
+    pooled = ResultsRegistry()
+    for row, rows in stacked.groupby(level='row', sort=True):
+        first = rows.iloc[0]
+        pooled.record(first['test'], hypothesis=first['hypothesis'], outcome=first['outcome'],
+                      predictor=first['predictor'], segment=first['segment'], imputations=len(frames),
+                      **_pool_row(rows))
+    return pooled
@@ -0,0 +1,193 @@
+# Path analysis of the privacy -> trust -> engagement -> satisfaction -> loyalty chain.
+# The hypotheses in the notebook test each link with a separate pearsonr, t-test or
+# OLS fit; here the links are estimated together as a recursive path model, with
+# direct, indirect (mediated) and total effects and bootstrap confidence intervals.
+# Every equation is solved from one covariance matrix of the encoded columns.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .lazy import lazy_import
+
+stats = lazy_import('scipy.stats')
+
+# Outcome -> predictors. The model must be recursive (no feedback loops).
+PATH_MODEL = {
+    'Trust_Level': ['Privacy_Concern_Level'],
+    'Engagement_Level': ['Trust_Level', 'Privacy_Concern_Level'],
+    'Satisfaction_Level': ['Engagement_Level', 'Trust_Level'],
+    'Loyalty_Level': ['Satisfaction_Level', 'Engagement_Level', 'Trust_Level'],
+}
+
+
+# Variables of the model in causal order (exogenous first)
+def _ordered_variables(model):
+    remaining = {outcome: set(predictors) for outcome, predictors in model.items()}
+    ordered = []
+    for predictors in model.values():
+        for variable in predictors:
+            if variable not in remaining and variable not in ordered:
+                ordered.append(variable)
+    while remaining:
+        ready = [outcome for outcome, predictors in remaining.items() if predictors <= set(ordered)]
+        if not ready:
+            raise ValueError(f'Path model is not recursive: {sorted(remaining)} depend on each other')
+        for outcome in ready:
+            ordered.append(outcome)
+            del remaining[outcome]
+    return ordered
+
+
+# Direct-effect matrices B (B[..., y, x] is the path x -> y) for a stack of covariance matrices
+def _direct_effects(cov, model, variables):
+    position = {v: i for i, v in enumerate(variables)}
+    direct = np.zeros(cov.shape[:-2] + (len(variables), len(variables)))
+    for outcome, predictors in model.items():
+        y = position[outcome]
+        x = [position[p] for p in predictors]
+        s_xx = cov[..., x, :][..., :, x]
+        s_xy = cov[..., x, y]
+        direct[..., y, x] = np.linalg.solve(s_xx, s_xy[..., None])[..., 0]
+    return direct
+
+
+# Total effects (I - B)^-1 - I, which sums the products of coefficients along every path
+def _total_effects(direct):
+    identity = np.eye(direct.shape[-1])
+    return np.linalg.inv(identity - direct) - identity
+
+
+# Bootstrap replicates resampled together in one batch (bounds the memory per batch).
+# Each batch draws from its own seed, so the intervals for a seed do not depend on
+# how the batches are shared between workers.
+BOOTSTRAP_BATCH = 100
+
+
+# Sizes and seeds of the bootstrap batches (BOOTSTRAP_BATCH replicates per seed)
+def _bootstrap_batches(n_boot, seed):
+    sizes = np.diff(np.append(np.arange(0, n_boot, BOOTSTRAP_BATCH), n_boot))
+    return list(zip(sizes.tolist(), np.random.SeedSequence(seed).spawn(len(sizes))))
+
+
+def _bootstrap_chunk(values, model, variables, batches):
+    covariances = []
+    for size, seed in batches:
+        rng = np.random.default_rng(seed)
+        samples = values[rng.integers(0, values.shape[0], size=(size, values.shape[0]))]
+        centred = samples - samples.mean(axis=1, keepdims=True)
+        covariances.append(np.einsum('bni,bnj->bij', centred, centred) / (values.shape[0] - 1))
+    direct = _direct_effects(np.concatenate(covariances), model, variables)
+    return direct, _total_effects(direct)
+
+
+class PathModel:
+
+    def __init__(self, df, model=None):
+        self.model = {outcome: list(predictors) for outcome, predictors in (model or PATH_MODEL).items()}
+        self.variables = _ordered_variables(self.model)
+        missing = [v for v in self.variables if v not in df.columns]
+        if missing:
+            raise KeyError(f'Path model variables not found in the data: {missing}')
+        # Listwise deletion, as the notebook does before each test
+        self.values = df[self.variables].dropna().to_numpy(dtype='float64')
+        self.n = self.values.shape[0]
+        self._cov = None
+        self._direct = None
+        self._bootstrap = {}
+
+        # Pairs (source, target) connected by at least one directed path
+        position = {v: i for i, v in enumerate(self.variables)}
+        structure = np.zeros((len(self.variables), len(self.variables)))
+        for outcome, predictors in self.model.items():
+            structure[position[outcome], [position[p] for p in predictors]] = 1
+        reachable = _total_effects(structure) > 0
+        self._pairs = [(j, i) for j in range(len(self.variables)) for i in range(len(self.variables))
+                       if reachable[i, j]]
+
+    # Covariance matrix of the model variables, computed once and shared by all equations
+    @property
+    def cov(self):
+        if self._cov is None:
+            self._cov = np.cov(self.values, rowvar=False)
+        return self._cov
+
+    @property
+    def direct(self):
+        if self._direct is None:
+            self._direct = _direct_effects(self.cov, self.model, self.variables)
+        return self._direct
+
+    # Unstandardized and standardized path coefficients with OLS standard errors
+    def coefficients(self):
+        position = {v: i for i, v in enumerate(self.variables)}
+        sd = np.sqrt(np.diag(self.cov))
+        rows = []
+        for outcome, predictors in self.model.items():
+            y = position[outcome]
+            x = [position[p] for p in predictors]
+            beta = self.direct[y, x]
+            residual_var = (self.cov[y, y] - beta @ self.cov[x, y]) * (self.n - 1) / (self.n - len(x) - 1)
+            std_error = np.sqrt(np.diag(residual_var * np.linalg.inv(self.cov[np.ix_(x, x)])) / (self.n - 1))
+            t_value = beta / std_error
+            p_value = 2 * stats.t.sf(np.abs(t_value), self.n - len(x) - 1)
+            r_squared = 1 - residual_var * (self.n - len(x) - 1) / (self.n - 1) / self.cov[y, y]
+            for predictor, b, se, t, p in zip(predictors, beta, std_error, t_value, p_value):
+                rows.append({'outcome': outcome, 'predictor': predictor, 'estimate': b, 'std_error': se,
+                             't_value': t, 'p_value': p, 'standardized': b * sd[position[predictor]] / sd[y],
+                             'r_squared': r_squared})
+        return pd.DataFrame(rows)
+
+    # Direct, indirect and total effect of every variable on every later variable
+    def effects(self):
+        total = _total_effects(self.direct)
+        return self._effect_table(self.direct, total).astype('float64')
+
+    def _effect_table(self, direct, total):
+        rows = []
+        for j, i in self._pairs:
+            rows.append({'from': self.variables[j], 'to': self.variables[i], 'direct': direct[..., i, j],
+                         'indirect': total[..., i, j] - direct[..., i, j], 'total': total[..., i, j]})
+        return pd.DataFrame(rows).set_index(['from', 'to'])
+
+    # Simple mediation x -> m -> y: a path, b path, specific indirect effect a*b and the direct path
+    def mediation(self, x, m, y):
+        position = {v: i for i, v in enumerate(self.variables)}
+        a = self.direct[position[m], position[x]]
+        b = self.direct[position[y], position[m]]
+        return pd.Series({'a': a, 'b': b, 'indirect': a * b, 'direct': self.direct[position[y], position[x]]})
+
+    # Percentile bootstrap intervals for the direct, indirect and total effects.
+    # The replicate batches are split across worker processes; each worker resamples
+    # its batches and solves every equation for all of its replicates at once.
+    def bootstrap(self, n_boot=2000, level=0.95, seed=None, n_jobs=None):
+        key = (n_boot, level, seed)
+        if key in self._bootstrap:
+            return self._bootstrap[key]
+
+        batches = _bootstrap_batches(n_boot, seed)
+        n_jobs = min(n_jobs or os.cpu_count() or 1, len(batches))
+        chunks = [batches[start::n_jobs] for start in range(n_jobs)]
+        arguments = ([self.values] * n_jobs, [self.model] * n_jobs, [self.variables] * n_jobs, chunks)
+        if n_jobs == 1:
+            parts = list(map(_bootstrap_chunk, *arguments))
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                parts = list(pool.map(_bootstrap_chunk, *arguments))
+        direct = np.concatenate([part[0] for part in parts])
+        total = np.concatenate([part[1] for part in parts])
+
+        replicates = self._effect_table(direct, total)
+        estimates = self.effects()
+        tail = (1 - level) / 2 * 100
+        columns = {}
+        for effect in ['direct', 'indirect', 'total']:
+            draws = np.vstack(replicates[effect].to_numpy())
+            columns[effect] = estimates[effect]
+            columns[f'{effect}_lower'] = np.percentile(draws, tail, axis=1)
+            columns[f'{effect}_upper'] = np.percentile(draws, 100 - tail, axis=1)
+        result = pd.DataFrame(columns, index=estimates.index)
+        self._bootstrap[key] = result
+        return result
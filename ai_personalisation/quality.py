@@ -0,0 +1,210 @@
+# Response-quality screening.
+# Every response gets a set of quality flags packed into one uint8 bit field
+# (see QualityFlag), together with its completion duration and the spread of its
+# Likert answers. The flags are computed once per dataset and cached (in memory
+# and, given a result store, on disk), then used to exclude or down-weight
+# low-quality responses in the downstream statistics:
+#
+#     flags = quality_flags(df, store)
+#     df = screen(df, flags)                                   # exclude
+#     cube = SegmentCube(df, weights=quality_weights(flags))   # or down-weight
+#
+# The export only records when a response was started and completed, so the
+# timing checks compare the total duration with the sample median and with the
+# minimum effort of each section: reading the closed questions that were answered,
+# and typing the free-text answers.
+
+import enum
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import codebook
+from .loading import parse_start_time
+from .store import fingerprint
+
+
+class QualityFlag(enum.IntFlag):
+    SPEEDING = 1            # completed in less than SPEED_RATIO x the median duration
+    FAST_READING = 2        # closed questions answered faster than they can be read
+    FAST_TYPING = 4         # free text longer than could have been typed in the time
+    STRAIGHT_LINING = 8     # same scale position on every Likert question
+    ATTENTION_CHECK = 16    # failed an attention check
+    INCONSISTENT = 32       # contradictory answers (see inconsistent_answers)
+    DUPLICATE = 64          # same answers as an earlier response, or near-identical text and closed answers
+    NEAR_DUPLICATE = 128    # near-identical free text to an earlier response (may be a generic comment)
+
+
+# Flags that exclude a response in screen() by default. NEAR_DUPLICATE is reported
+# but not excluded: short generic comments are shared by unrelated respondents.
+DEFAULT_EXCLUDE = (QualityFlag.SPEEDING | QualityFlag.FAST_READING | QualityFlag.STRAIGHT_LINING
+                   | QualityFlag.ATTENTION_CHECK | QualityFlag.DUPLICATE)
+
+# Weight multiplier of each flag in quality_weights()
+PENALTIES = {
+    QualityFlag.SPEEDING: 0.5,
+    QualityFlag.FAST_READING: 0.25,
+    QualityFlag.FAST_TYPING: 0.75,
+    QualityFlag.STRAIGHT_LINING: 0.5,
+    QualityFlag.ATTENTION_CHECK: 0.0,
+    QualityFlag.INCONSISTENT: 0.75,
+    QualityFlag.DUPLICATE: 0.0,
+    QualityFlag.NEAR_DUPLICATE: 1.0,
+}
+
+# Timing thresholds: share of the median duration below which a response is
+# speeding, fastest plausible reading (words per second) and typing (characters
+# per second) speeds
+SPEED_RATIO = 0.5
+MAX_READING_RATE = 10.0
+MAX_TYPING_RATE = 8.0
+
+# Quality frames kept in memory, keyed by the fingerprint of the answers
+CACHE_SIZE = 8
+_CACHE = OrderedDict()
+
+
+# Completion duration in seconds (NaN without a completion time or with a
+# completion before the start)
+def completion_duration(df):
+    if codebook.START_TIME not in df.columns or codebook.COMPLETION_TIME not in df.columns:
+        return pd.Series(np.nan, index=df.index, name='Duration')
+    start = parse_start_time(df[codebook.START_TIME])
+    end = parse_start_time(df[codebook.COMPLETION_TIME])
+    seconds = (end - start).dt.total_seconds()
+    return seconds.where(seconds >= 0).rename('Duration')
+
+
+# Words each respondent had to read: the question texts of the closed questions they answered
+def words_read(df):
+    closed = [c for c in codebook.QUESTION_COLUMNS if c in df.columns and c not in codebook.TEXT_COLUMNS]
+    words = np.array([len(codebook.QUESTION_TEXTS[c].split()) for c in closed], dtype='float64')
+    return pd.Series(df[closed].notna().to_numpy() @ words, index=df.index)
+
+
+# Characters each respondent typed into the free-text questions
+def characters_typed(df):
+    columns = [c for c in codebook.TEXT_COLUMNS if c in df.columns]
+    if not columns:
+        return pd.Series(0.0, index=df.index)
+    lengths = [df[c].astype('string').str.strip().str.len().fillna(0).to_numpy(dtype='float64') for c in columns]
+    return pd.Series(np.sum(lengths, axis=0), index=df.index)
+
+
+# Responses failing any attention check in codebook.ATTENTION_CHECKS
+def failed_attention_checks(df, checks=None):
+    failed = np.zeros(len(df), dtype=bool)
+    for question, accepted in (checks if checks is not None else codebook.ATTENTION_CHECKS).items():
+        if question in df.columns:
+            failed |= ~df[question].isin(list(accepted)).to_numpy()
+    return pd.Series(failed, index=df.index)
+
+
+# Responses contradicting themselves: a "no challenges" answer selected together
+# with a challenge, or a ranking that lists the same option twice
+def inconsistent_answers(df):
+    inconsistent = np.zeros(len(df), dtype=bool)
+    if codebook.CHALLENGES in df.columns:
+        answers = df[codebook.CHALLENGES].astype('string').str.split(';').explode().str.strip()
+        answers = answers[answers.fillna('') != '']
+        none = answers.isin(codebook.NO_CHALLENGE_ANSWERS).groupby(level=0).any()
+        count = answers.groupby(level=0).size()
+        mixed = (none & (count > 1)).reindex(df.index, fill_value=False)
+        inconsistent |= mixed.to_numpy(dtype=bool)
+    for question, _ in codebook.RANKINGS.values():
+        if question in df.columns:
+            options = df[question].astype('string').str.split(';').explode().str.strip()
+            options = options[options.fillna('') != ''].reset_index()
+            repeated = options.duplicated().groupby(options.iloc[:, 0]).any()
+            inconsistent |= repeated.reindex(df.index, fill_value=False).to_numpy(dtype=bool)
+    return pd.Series(inconsistent, index=df.index)
+
+
+def _set(flags, flag, mask):
+    flags[np.asarray(mask, dtype=bool)] |= np.uint8(flag)
+
+
+# Quality frame of a survey: Quality_Flags (uint8 bit field of QualityFlag),
+# Duration (seconds) and Likert_SD. Duplicate checks are skipped with duplicates=False.
+def compute_quality(df, duplicates=True):
+    from .duplicates import duplicate_flags, straight_lining
+
+    flags = np.zeros(len(df), dtype=np.uint8)
+    duration = completion_duration(df)
+    seconds = duration.to_numpy(dtype='float64')
+    timed = np.isfinite(seconds)
+    if timed.any():
+        median = np.median(seconds[timed])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            _set(flags, QualityFlag.SPEEDING, timed & (seconds < SPEED_RATIO * median))
+            _set(flags, QualityFlag.FAST_READING, timed & (words_read(df).to_numpy() / seconds > MAX_READING_RATE))
+            _set(flags, QualityFlag.FAST_TYPING, timed & (characters_typed(df).to_numpy() / seconds > MAX_TYPING_RATE))
+
+    likert = straight_lining(df)
+    _set(flags, QualityFlag.STRAIGHT_LINING, likert['Straight_Lining'])
+    _set(flags, QualityFlag.ATTENTION_CHECK, failed_attention_checks(df))
+    _set(flags, QualityFlag.INCONSISTENT, inconsistent_answers(df))
+    if duplicates:
+        repeated = duplicate_flags(df)
+        _set(flags, QualityFlag.DUPLICATE, repeated['Exact_Duplicate'] | repeated['Copied_Response'])
+        _set(flags, QualityFlag.NEAR_DUPLICATE, repeated['Near_Duplicate'])
+
+    return pd.DataFrame({'Quality_Flags': flags, 'Duration': duration.astype('float32'),
+                         'Likert_SD': likert['Likert_SD'].astype('float32')}, index=df.index)
+
+
+# Cached quality frame of a survey. The key is the fingerprint of the questionnaire
+# and timing columns, so flags are computed once per dataset version; with a result
+# store they are also kept on disk between runs.
+def quality_flags(df, store=None, duplicates=True):
+    columns = [c for c in [codebook.START_TIME, codebook.COMPLETION_TIME] + codebook.QUESTION_COLUMNS
+               + list(codebook.ATTENTION_CHECKS) if c in df.columns]
+    data = df[list(dict.fromkeys(columns))]
+    key = fingerprint('quality', data, duplicates=duplicates)
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key]
+    if store is not None:
+        quality = store.fetch('quality', compute_quality, data, duplicates=duplicates)
+    else:
+        quality = compute_quality(data, duplicates=duplicates)
+    _CACHE[key] = quality
+    if len(_CACHE) > CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return quality
+
+
+def _bits(flags):
+    return flags['Quality_Flags'].to_numpy() if isinstance(flags, pd.DataFrame) else np.asarray(flags)
+
+
+# One boolean column per QualityFlag
+def decode_flags(flags):
+    bits = _bits(flags)
+    index = flags.index if isinstance(flags, (pd.DataFrame, pd.Series)) else None
+    return pd.DataFrame({flag.name: (bits & flag) != 0 for flag in QualityFlag}, index=index)
+
+
+# Number and share of responses raising each flag
+def quality_summary(flags):
+    decoded = decode_flags(flags)
+    return pd.DataFrame({'responses': decoded.sum(), 'share': decoded.mean()})
+
+
+# Responses raising none of the `exclude` flags
+def screen(df, flags=None, exclude=DEFAULT_EXCLUDE, store=None):
+    flags = flags if flags is not None else quality_flags(df, store)
+    keep = (_bits(flags) & np.uint8(exclude)) == 0
+    return df[keep]
+
+
+# Weight of every response: the product of the penalties of the flags it raises.
+# Multiply with survey weights (see weighting.Raker) to combine both.
+def quality_weights(flags, penalties=None):
+    bits = _bits(flags)
+    weights = np.ones(len(bits))
+    for flag, penalty in (penalties or PENALTIES).items():
+        weights[(bits & flag) != 0] *= penalty
+    index = flags.index if isinstance(flags, (pd.DataFrame, pd.Series)) else None
+    return pd.Series(weights, index=index, name='Quality_Weight')
@@ -0,0 +1,182 @@
+# Internal-consistency checks for multi-item constructs.
+# The notebook treats single Likert items as constructs; these helpers report
+# Cronbach's alpha, McDonald's omega, corrected item-total correlations and
+# alpha-if-item-deleted for configurable groupings of the encoded items.
+# Every statistic is derived from the item covariance matrix, and the functions
+# accept a stack of covariance matrices so bootstrap replicates run as one batch.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Construct name -> encoded items (see encoding.encode_survey)
+CONSTRUCTS = {
+    'Perceived_Relevance': ['Preference_Level', 'Cultural_Relevance', 'Economic_Relevance'],
+    'Satisfaction_Loyalty': ['Satisfaction_Level', 'Engagement_Level', 'Loyalty_Level'],
+}
+
+# Principal-axis iterations used for the one-factor omega loadings
+FACTOR_ITERATIONS = 50
+
+# Bootstrap replicates resampled together in one batch. Each batch draws from its
+# own seed, so the intervals for a seed do not depend on the number of workers.
+BOOTSTRAP_BATCH = 100
+
+
+# Cronbach's alpha from covariance matrices of shape (..., k, k)
+def cronbach_alpha(cov):
+    k = cov.shape[-1]
+    total = cov.sum(axis=(-2, -1))
+    trace = np.trace(cov, axis1=-2, axis2=-1)
+    return k / (k - 1) * (1 - trace / total)
+
+
+# Corrected item-total correlation of each item with the sum of the other items
+def item_total_correlations(cov):
+    variances = np.diagonal(cov, axis1=-2, axis2=-1)
+    row_sums = cov.sum(axis=-1)
+    total = cov.sum(axis=(-2, -1))[..., None]
+    rest_var = total - 2 * row_sums + variances
+    return (row_sums - variances) / np.sqrt(variances * rest_var)
+
+
+# Alpha of the construct with each item removed in turn
+def alpha_if_deleted(cov):
+    k = cov.shape[-1]
+    variances = np.diagonal(cov, axis1=-2, axis2=-1)
+    row_sums = cov.sum(axis=-1)
+    total = cov.sum(axis=(-2, -1))[..., None]
+    trace = np.trace(cov, axis1=-2, axis2=-1)[..., None]
+    return (k - 1) / (k - 2) * (1 - (trace - variances) / (total - 2 * row_sums + variances))
+
+
+# One-factor loadings by iterated principal-axis factoring of the covariance matrix
+def factor_loadings(cov, iterations=FACTOR_ITERATIONS):
+    variances = np.diagonal(cov, axis1=-2, axis2=-1)
+    # Start the communalities from the squared multiple correlations
+    communalities = variances - 1.0 / np.diagonal(np.linalg.pinv(cov), axis1=-2, axis2=-1)
+    k = cov.shape[-1]
+    eye = np.eye(k, dtype=bool)
+    for _ in range(iterations):
+        reduced = np.where(eye, communalities[..., None, :] * np.eye(k), cov)
+        values, vectors = np.linalg.eigh(reduced)
+        loadings = vectors[..., -1] * np.sqrt(np.maximum(values[..., -1:], 0.0))
+        communalities = np.minimum(loadings ** 2, variances)
+    # Orient the factor so loadings are mostly positive
+    sign = np.where(loadings.sum(axis=-1, keepdims=True) < 0, -1.0, 1.0)
+    return loadings * sign
+
+
+# McDonald's omega (total) from a one-factor model
+def mcdonald_omega(cov):
+    loadings = factor_loadings(cov)
+    uniqueness = np.maximum(np.diagonal(cov, axis1=-2, axis2=-1) - loadings ** 2, 0.0)
+    common = loadings.sum(axis=-1) ** 2
+    return common / (common + uniqueness.sum(axis=-1))
+
+
+# Covariance matrices of a batch of bootstrap resamples, shape (replicates, k, k)
+def _bootstrap_covariances(values, indices):
+    samples = values[indices]
+    centred = samples - samples.mean(axis=1, keepdims=True)
+    return np.einsum('bni,bnj->bij', centred, centred) / (values.shape[0] - 1)
+
+
+# Sizes and seeds of the bootstrap batches (BOOTSTRAP_BATCH replicates per seed)
+def _bootstrap_batches(n_boot, seed):
+    sizes = np.diff(np.append(np.arange(0, n_boot, BOOTSTRAP_BATCH), n_boot))
+    return list(zip(sizes.tolist(), np.random.SeedSequence(seed).spawn(len(sizes))))
+
+
+def _bootstrap_batch(values, batch):
+    size, seed = batch
+    indices = np.random.default_rng(seed).integers(0, values.shape[0], size=(size, values.shape[0]))
+    cov = _bootstrap_covariances(values, indices)
+    return np.column_stack([cronbach_alpha(cov), mcdonald_omega(cov)])
+
+
+class ReliabilityAnalysis:
+    # Results are cached per (construct items, segment), so recomputing a construct
+    # for the same dataset, or revisiting a segment, does not touch the data again.
+
+    def __init__(self, df, constructs=None):
+        self.df = df
+        self.constructs = dict(constructs or CONSTRUCTS)
+        self._cache = {}
+
+    def _items(self, construct):
+        items = self.constructs[construct] if isinstance(construct, str) else list(construct)
+        if len(items) < 3:
+            raise ValueError('A construct needs at least three items for alpha-if-item-deleted')
+        missing = [item for item in items if item not in self.df.columns]
+        if missing:
+            raise KeyError(f'Items not found in the data: {missing}')
+        return items
+
+    def _values(self, items, segment):
+        data = self.df if segment is None else self.df[self.df[segment[0]] == segment[1]]
+        return data[items].dropna().to_numpy(dtype='float64')
+
+    def _compute(self, items, segment):
+        key = (tuple(items), segment)
+        if key not in self._cache:
+            values = self._values(items, segment)
+            cov = np.cov(values, rowvar=False)
+            self._cache[key] = {
+                'n': values.shape[0],
+                'cov': cov,
+                'alpha': float(cronbach_alpha(cov)),
+                'omega': float(mcdonald_omega(cov)),
+                'items': pd.DataFrame({
+                    'item_total_r': item_total_correlations(cov),
+                    'alpha_if_deleted': alpha_if_deleted(cov),
+                    'loading': factor_loadings(cov),
+                }, index=items),
+            }
+        return self._cache[key]
+
+    # Alpha, omega, item count and complete-case sample size for one construct
+    def summary(self, construct, segment=None):
+        result = self._compute(self._items(construct), segment)
+        return pd.Series({'k': len(result['items']), 'n': result['n'],
+                          'alpha': result['alpha'], 'omega': result['omega']})
+
+    # Item-level statistics for one construct
+    def item_statistics(self, construct, segment=None):
+        return self._compute(self._items(construct), segment)['items']
+
+    # Summary of every configured construct
+    def table(self):
+        return pd.DataFrame({name: self.summary(name) for name in self.constructs}).T
+
+    # Summary of one construct within each level of a segmenting column
+    def by_segment(self, construct, column):
+        levels = self.df[column].dropna().unique()
+        return pd.DataFrame({level: self.summary(construct, (column, level)) for level in levels}).T
+
+    # Percentile bootstrap confidence intervals for alpha and omega. Replicates are
+    # resampled in batches of BOOTSTRAP_BATCH that run on a thread pool; each batch
+    # is one batched covariance computation, and NumPy releases the GIL for the
+    # heavy lifting.
+    def bootstrap(self, construct, n_boot=1000, level=0.95, seed=None, n_jobs=None, segment=None):
+        key = ('bootstrap', tuple(self._items(construct)), segment, n_boot, level, seed)
+        if key in self._cache:
+            return self._cache[key]
+        values = self._values(self._items(construct), segment)
+        batches = _bootstrap_batches(n_boot, seed)
+        n_jobs = min(n_jobs or os.cpu_count() or 1, len(batches))
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            replicates = np.vstack(list(pool.map(_bootstrap_batch, [values] * len(batches), batches)))
+
+        tail = (1 - level) / 2 * 100
+        lower, upper = np.nanpercentile(replicates, [tail, 100 - tail], axis=0)
+        point = self.summary(construct, segment)
+        result = pd.DataFrame({
+            'estimate': [point['alpha'], point['omega']],
+            'lower': lower,
+            'upper': upper,
+        }, index=['alpha', 'omega'])
+        self._cache[key] = result
+        return result
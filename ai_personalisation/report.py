@@ -0,0 +1,242 @@
+# Report builder: renders the charts, tests and text analysis of the survey into a
+# single self-contained HTML document (optionally converted to PDF).
+# Every section is an independent task run on a process pool; worker processes get
+# the encoded survey once through the pool initializer. Sections are appended to
+# the HTML file as soon as they and the sections before them have finished, so the
+# report fills in, in a fixed order, while it is being built and its total time is
+# bounded by the slowest section rather than their sum.
+
+import asyncio
+import base64
+import html
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import codebook
+
+DEFAULT_TITLE = 'Impact of AI-Personalised Recommendations: Survey Report'
+
+_STYLE = """
+body { font-family: Helvetica, Arial, sans-serif; margin: 2em auto; max-width: 1100px; color: #222; }
+section { margin-bottom: 2.5em; border-top: 1px solid #ddd; padding-top: 1em; }
+table { border-collapse: collapse; font-size: 0.85em; margin: 0.5em 0 1em; }
+th, td { border: 1px solid #ccc; padding: 0.25em 0.5em; text-align: right; }
+th { background: #f3f3f3; }
+img { max-width: 100%; }
+.error { color: #a00; }
+"""
+
+# Dataset of the worker processes, set once by the pool initializer
+_WORKER_DATA = None
+
+
+def _init_worker(df):
+    global _WORKER_DATA
+    _WORKER_DATA = df
+
+
+def _png(figure):
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close(figure)
+    return buffer.getvalue()
+
+
+def _table(frame, caption, digits=4):
+    return ('table', caption, frame.to_html(float_format=lambda x: f'{x:.{digits}g}', na_rep=''))
+
+
+# Sections. Each returns a list of blocks (kind, caption, content) where kind is
+# 'figure' (PNG bytes), 'table' (HTML) or 'text'.
+
+def chart_section(df, name):
+    from .stages import CHARTS, distribution_figure
+
+    column, title = CHARTS[name]
+    counts = df[column].value_counts()
+    return [('figure', title, _png(distribution_figure(counts, title))),
+            _table(counts.rename('Count').to_frame(), title)]
+
+
+def collection_section(df):
+    from .stages import _pyplot
+    from .timeseries import CollectionMonitor
+
+    plt = _pyplot()
+    monitor = CollectionMonitor().update(df)
+    weekdays = monitor.weekday_counts()
+    figure, axis = plt.subplots(figsize=(10, 6))
+    weekdays.plot(kind='bar', ax=axis)
+    axis.set_title('Data Collection Trends by Day of Week')
+    axis.set_ylabel('Count of Responses')
+    return [('figure', 'Responses by day of week', _png(figure)),
+            _table(monitor.counts('day').to_frame(), 'Responses by day')]
+
+
+def segments_section(df):
+    from .segments import DIMENSIONS, SegmentCube
+
+    cube = SegmentCube(df)
+    return [_table(cube.table(name), f'Average outcomes by {name.replace("_", " ").lower()}') for name in DIMENSIONS]
+
+
+def hypotheses_section(df):
+    from .stages import corrected_results, hypothesis_tests
+
+    registry, tables = hypothesis_tests(df)
+    columns = ['hypothesis', 'test', 'outcome', 'predictor', 'statistic', 'p_value', 'p_adjusted', 'p_bh', 'reject']
+    blocks = [_table(corrected_results(registry)[columns], 'Hypothesis tests (Holm and Benjamini-Hochberg adjusted)')]
+    blocks += [_table(table, name.replace('_', ' ').capitalize()) for name, table in tables.items()]
+    return blocks
+
+
+def reliability_section(df):
+    from .reliability import ReliabilityAnalysis
+
+    return [_table(ReliabilityAnalysis(df).table(), 'Internal consistency of the constructs')]
+
+
+def paths_section(df):
+    from .paths import PathModel
+
+    model = PathModel(df)
+    return [_table(model.coefficients(), 'Path coefficients'),
+            _table(model.bootstrap(n_boot=1000, seed=0, n_jobs=1), 'Direct, indirect and total effects (bootstrap 95% CI)')]
+
+
+def text_section(df, column):
+    from .stages import wordcloud_figure
+    from .text import document_term_matrix
+
+    dtm = document_term_matrix(df[column])
+    frequencies = dtm.frequencies()
+    blocks = [_table(frequencies.head(30).rename('Count').to_frame(), 'Most frequent words'),
+              _table(dtm.cooccurrence(top=15), 'Answers in which the most frequent words appear together')]
+    figure = wordcloud_figure(frequencies) if len(frequencies) else None
+    if figure is not None:
+        blocks.insert(0, ('figure', 'Word cloud', _png(figure)))
+    return blocks
+
+
+def sentiment_section(df):
+    from .sentiment import encode_sentiment, sentiment_correlations
+
+    sentiment = encode_sentiment(df)
+    summary = sentiment.describe().T[['count', 'mean', 'std', 'min', 'max']]
+    return [_table(summary, 'Sentiment and aspect mentions of the free-text answers'),
+            _table(sentiment_correlations(df, sentiment=sentiment), 'Spearman correlation of sentiment with the outcomes')]
+
+
+# (key, title, function, arguments) of every section the data supports, in report order
+def report_sections(df):
+    from .stages import CHARTS, TEXT_NAMES
+
+    sections = [(name, title, chart_section, (name,)) for name, (column, title) in CHARTS.items() if column in df.columns]
+    if codebook.START_TIME in df.columns:
+        sections.append(('collection', 'Data collection trends', collection_section, ()))
+    sections += [
+        ('segments', 'Outcomes by segment', segments_section, ()),
+        ('hypotheses', 'Hypothesis tests', hypotheses_section, ()),
+        ('reliability', 'Reliability of the constructs', reliability_section, ()),
+        ('paths', 'Path analysis', paths_section, ()),
+    ]
+    if any(column in df.columns for column in TEXT_NAMES):
+        sections.append(('sentiment', 'Sentiment of the free-text answers', sentiment_section, ()))
+    sections += [(f'text_{name}', f'Thematic analysis: {codebook.QUESTION_TEXTS[column]}', text_section, (column,))
+                 for column, name in TEXT_NAMES.items() if column in df.columns]
+    return sections
+
+
+def _run_section(function, arguments):
+    started = time.perf_counter()
+    blocks = function(_WORKER_DATA, *arguments)
+    return blocks, time.perf_counter() - started
+
+
+def _section_html(key, title, blocks, seconds):
+    parts = [f'<section id="{html.escape(key)}"><h2>{html.escape(title)}</h2>']
+    for kind, caption, content in blocks:
+        if kind == 'figure':
+            data = base64.b64encode(content).decode('ascii')
+            parts.append(f'<figure><img alt="{html.escape(caption)}" src="data:image/png;base64,{data}">'
+                         f'<figcaption>{html.escape(caption)}</figcaption></figure>')
+        elif kind == 'table':
+            parts.append(f'<h3>{html.escape(caption)}</h3>{content}')
+        elif caption == 'error':
+            parts.append(f'<p class="error">{html.escape(content)}</p>')
+        else:
+            parts.append(f'<p>{html.escape(content)}</p>')
+    parts.append(f'<p><small>Computed in {seconds:.1f}s</small></p></section>\n')
+    return ''.join(parts)
+
+
+class ReportBuilder:
+
+    def __init__(self, df, path, title=DEFAULT_TITLE, sections=None, workers=None):
+        self.df = df
+        self.path = path
+        self.title = title
+        self.sections = sections if sections is not None else report_sections(df)
+        self.workers = workers or os.cpu_count() or 1
+        self.failed = []
+
+    # Run every section on the process pool and stream the sections into the HTML file
+    # in the order of self.sections: a finished section is held back until all the
+    # sections before it have been written. Returns the list of sections that failed.
+    async def build(self):
+        loop = asyncio.get_running_loop()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self.failed = []
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.df,)) as pool, \
+                open(self.path, 'w', encoding='utf-8') as output:
+            contents = ''.join(f'<li><a href="#{html.escape(key)}">{html.escape(title)}</a></li>'
+                               for key, title, _, _ in self.sections)
+            output.write(f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(self.title)}</title>'
+                         f'<style>{_STYLE}</style></head><body><h1>{html.escape(self.title)}</h1>\n'
+                         f'<p>{len(self.df)} respondents.</p>\n'
+                         f'<section><h2>Contents</h2><ol>{contents}</ol></section>\n')
+            output.flush()
+
+            async def run(position, key, title, function, arguments):
+                try:
+                    blocks, seconds = await loop.run_in_executor(pool, _run_section, function, arguments)
+                except Exception as error:
+                    return position, key, title, [('text', 'error', f'{type(error).__name__}: {error}')], 0.0, error
+                return position, key, title, blocks, seconds, None
+
+            tasks = [run(position, *section) for position, section in enumerate(self.sections)]
+            finished, written = {}, 0
+            for task in asyncio.as_completed(tasks):
+                result = await task
+                finished[result[0]] = result
+                while written in finished:
+                    _, key, title, blocks, seconds, error = finished.pop(written)
+                    if error is not None:
+                        self.failed.append(key)
+                        title = f'{title} (failed)'
+                    output.write(_section_html(key, title, blocks, seconds))
+                    output.flush()
+                    written += 1
+
+            output.write(f'<p><small>Report built in {time.perf_counter() - started:.1f}s</small></p>'
+                         '</body></html>\n')
+        return self.failed
+
+    def build_sync(self):
+        return asyncio.run(self.build())
+
+
+# Convert an HTML report to PDF with WeasyPrint (optional dependency)
+def write_pdf(html_path, pdf_path):
+    try:
+        from weasyprint import HTML
+    except ImportError:
+        raise ImportError('PDF output requires weasyprint (pip install weasyprint)') from None
+    HTML(html_path).write_pdf(pdf_path)
+    return pdf_path
@@ -0,0 +1,140 @@
+# Registry of hypothesis-test results with multiple-testing correction.
+# Every test (correlations, ANOVAs, t-tests, chi-square, regression coefficients,
+# MANOVA terms) is recorded as one row of a columnar table, and p-values are
+# adjusted over the whole battery (or within families of tests) in one vectorized
+# step instead of being read off individual print statements.
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['test', 'hypothesis', 'outcome', 'predictor', 'segment', 'statistic', 'df', 'p_value', 'effect', 'n']
+
+METHODS = ['bonferroni', 'holm', 'bh', 'by']
+
+
+# Adjust a vector of p-values for multiple testing. Missing p-values stay missing.
+#   bonferroni: p * m
+#   holm:       step-down Bonferroni (controls the family-wise error rate)
+#   bh:         Benjamini-Hochberg step-up (controls the false discovery rate)
+#   by:         Benjamini-Yekutieli, BH under arbitrary dependence
+def adjust_pvalues(p_values, method='holm'):
+    if method not in METHODS:
+        raise ValueError(f"Unknown correction method '{method}', expected one of {METHODS}")
+    p_values = np.asarray(p_values, dtype='float64')
+    adjusted = np.full(p_values.shape, np.nan)
+    valid = ~np.isnan(p_values)
+    p = p_values[valid]
+    m = len(p)
+    if m == 0:
+        return adjusted
+
+    if method == 'bonferroni':
+        result = p * m
+    else:
+        order = np.argsort(p, kind='mergesort')
+        ranked = p[order]
+        rank = np.arange(1, m + 1)
+        if method == 'holm':
+            stepped = np.maximum.accumulate(ranked * (m - rank + 1))
+        else:
+            scale = m / rank
+            if method == 'by':
+                scale = scale * np.sum(1.0 / rank)
+            stepped = np.minimum.accumulate((ranked * scale)[::-1])[::-1]
+        result = np.empty(m)
+        result[order] = stepped
+
+    adjusted[valid] = np.minimum(result, 1.0)
+    return adjusted
+
+
+class ResultsRegistry:
+    # Results are appended to per-column lists; the DataFrame view is rebuilt only
+    # when something new has been recorded since it was last requested.
+
+    def __init__(self):
+        self._columns = {column: [] for column in COLUMNS}
+        self._extra = []
+        self._frame = None
+
+    def __len__(self):
+        return len(self._columns['test'])
+
+    # Record one test result
+    def record(self, test, p_value, statistic=None, outcome=None, predictor=None, segment=None,
+               hypothesis=None, df=None, effect=None, n=None, **extra):
+        row = {'test': test, 'hypothesis': hypothesis, 'outcome': outcome, 'predictor': predictor,
+               'segment': segment, 'statistic': statistic, 'df': df, 'p_value': p_value,
+               'effect': effect, 'n': n}
+        for column in COLUMNS:
+            value = row[column]
+            if column in ('statistic', 'df', 'p_value', 'effect') and value is not None:
+                value = float(value)
+            self._columns[column].append(value)
+        self._extra.append(extra)
+        self._frame = None
+        return self
+
+    # Record a scipy.stats result (pearsonr, spearmanr, f_oneway, ttest_ind, chi2_contingency, ...)
+    def record_scipy(self, test, result, **meta):
+        statistic = getattr(result, 'statistic', None)
+        p_value = getattr(result, 'pvalue', None)
+        if statistic is None or p_value is None:
+            statistic, p_value = result[0], result[1]
+        meta.setdefault('df', getattr(result, 'dof', getattr(result, 'df', None)))
+        return self.record(test, p_value, statistic=statistic, **meta)
+
+    # Record every coefficient of a fitted statsmodels regression (except the constant)
+    def record_regression(self, model, outcome, test='OLS', **meta):
+        for name in model.params.index:
+            if name == 'const':
+                continue
+            self.record(test, model.pvalues[name], statistic=model.tvalues[name], outcome=outcome,
+                        predictor=name, df=model.df_resid, effect=model.params[name], n=int(model.nobs), **meta)
+        return self
+
+    # Record Wilks' lambda for every term of a statsmodels MANOVA mv_test() result
+    def record_manova(self, mv_results, outcome, statistic="Wilks' lambda", test='MANOVA', **meta):
+        for term, result in mv_results.results.items():
+            if term == 'Intercept':
+                continue
+            row = result['stat'].loc[statistic]
+            self.record(test, row['Pr > F'], statistic=row['F Value'], outcome=outcome, predictor=term,
+                        df=row['Num DF'], effect=row['Value'], **meta)
+        return self
+
+    # Append every result of another registry, optionally tagging them with a segment
+    def merge(self, other, segment=None):
+        for column in COLUMNS:
+            values = other._columns[column]
+            self._columns[column].extend([segment] * len(values) if segment is not None and column == 'segment'
+                                         else values)
+        self._extra.extend(other._extra)
+        self._frame = None
+        return self
+
+    # All recorded results as a DataFrame, one row per test
+    def frame(self):
+        if self._frame is None:
+            frame = pd.DataFrame(self._columns, columns=COLUMNS)
+            extra = pd.DataFrame(self._extra, index=frame.index)
+            self._frame = pd.concat([frame, extra], axis=1) if len(extra.columns) else frame
+        return self._frame
+
+    # Results with adjusted p-values and reject decisions, sorted by p-value.
+    # `family` names a column (e.g. 'hypothesis') to correct within its groups
+    # instead of across the whole battery.
+    def table(self, method='holm', alpha=0.05, family=None):
+        frame = self.frame().copy()
+        if family is None:
+            frame['p_adjusted'] = adjust_pvalues(frame['p_value'].to_numpy(), method)
+        else:
+            frame['p_adjusted'] = frame.groupby(family, dropna=False)['p_value'].transform(
+                lambda p: adjust_pvalues(p.to_numpy(), method))
+        frame['reject'] = frame['p_adjusted'] < alpha
+        return frame.sort_values('p_value', kind='mergesort', na_position='last')
+
+    # Only the results that remain significant after correction
+    def significant(self, method='holm', alpha=0.05, family=None):
+        table = self.table(method, alpha, family)
+        return table[table['reject']]
@@ -0,0 +1,91 @@
+# Question schema: every question of the instrument under a short, stable ID with
+# its exported text and answer metadata.
+# Columns are renamed from the (up to 200-character) question text to the ID when a
+# survey is loaded, so the analysis modules look columns up by IDs such as
+# 'satisfaction' or 'relevance_ranking' through the codebook constants. Either form
+# can still be given wherever a column is named (resolve() maps texts to IDs), and
+# original_columns() restores the exported headers.
+
+import re
+
+from . import codebook
+
+# Question kinds
+SINGLE = 'single'      # one answer from a list
+ORDINAL = 'ordinal'    # one answer from an ordered scale (scale maps answers to 1-5)
+MULTI = 'multi'        # ';'-separated selection of answers
+RANKING = 'ranking'    # ';'-separated ordering of all the options
+TEXT = 'text'          # free text
+
+
+class Question:
+
+    def __init__(self, id, text, kind, options=None, scale=None, write_in=False):
+        self.id = id
+        self.text = text
+        self.kind = kind
+        self.options = list(options) if options is not None else None
+        self.scale = scale
+        self.write_in = write_in    # an "Other" option exports the respondent's own wording
+
+    def __repr__(self):
+        return f'Question({self.id!r}, kind={self.kind!r})'
+
+
+def _questions():
+    scales = {question: mapping for question, mapping in codebook.ORDINAL_LEVELS.values()}
+    rankings = {question: labels for question, labels in codebook.RANKINGS.values()}
+    questions = {}
+    for question in codebook.QUESTION_COLUMNS:
+        text = codebook.QUESTION_TEXTS[question]
+        if question in scales:
+            entry = Question(question, text, ORDINAL, options=scales[question], scale=scales[question])
+        elif question in rankings:
+            entry = Question(question, text, RANKING, options=rankings[question])
+        elif question in codebook.TEXT_COLUMNS:
+            entry = Question(question, text, TEXT)
+        elif question == codebook.INCOME:
+            entry = Question(question, text, SINGLE, options=codebook.income_mapping)
+        else:
+            kind = MULTI if question == codebook.CHALLENGES else SINGLE
+            entry = Question(question, text, kind, options=codebook.ANSWER_OPTIONS.get(question),
+                             write_in=question in codebook.WRITE_IN_QUESTIONS)
+        questions[question] = entry
+    return questions
+
+
+# Question ID -> Question, in questionnaire order
+QUESTIONS = _questions()
+
+
+def _header_key(header):
+    return re.sub(r'\s+', ' ', header).strip()
+
+
+# Exported header (with whitespace collapsed) -> question ID
+HEADERS = {_header_key(question.text): question.id for question in QUESTIONS.values()}
+
+
+# Question ID of a column named by ID or by question text; other names are returned unchanged
+def resolve(name):
+    if name in QUESTIONS or not isinstance(name, str):
+        return name
+    return HEADERS.get(_header_key(name), name)
+
+
+def question_text(name):
+    question = QUESTIONS.get(resolve(name))
+    return question.text if question is not None else name
+
+
+# Rename question-text headers to question IDs (headers are compared with runs of
+# whitespace collapsed, so re-saved exports with changed line breaks still match)
+def rename_columns(df):
+    renames = {column: resolve(column) for column in df.columns if isinstance(column, str) and column not in QUESTIONS}
+    renames = {column: name for column, name in renames.items() if name != column}
+    return df.rename(columns=renames) if renames else df
+
+
+# Question-ID headers back to the exported question texts
+def original_columns(df):
+    return df.rename(columns={column: QUESTIONS[column].text for column in df.columns if column in QUESTIONS})
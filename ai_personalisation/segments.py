@@ -0,0 +1,149 @@
+# Segment-level analysis of the outcome metrics across the demographic strata.
+# Replaces the one-off groupbys in the notebook (e.g. average relevance by income
+# level, satisfaction boxplots by income) with a single cube over every combination
+# of age group, gender, income range and economic segment.
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from . import codebook
+
+# Dimension name -> column the segments are formed from
+DIMENSIONS = {
+    'Age': codebook.AGE,
+    'Gender': codebook.GENDER,
+    'Income': codebook.INCOME,
+    'Economic_Segment': 'Economic_Segment',
+}
+
+# Outcome metrics summarised in every segment (encoded with encoding.encode_survey)
+OUTCOMES = [
+    'Satisfaction_Level', 'Engagement_Level', 'Trust_Level', 'Loyalty_Level', 'Preference_Level',
+    'Relevance_Score', 'Improvement_Score', 'Privacy_Concern_Level', 'Data_Comfort_Level',
+    'Cultural_Relevance', 'Economic_Relevance',
+]
+
+STATISTICS = ['n', 'mean', 'std']
+
+
+# Means and sample standard deviations from stacked (count, sum, sum of squares)
+def _moments(stats):
+    n, total, squares = stats[..., 0], stats[..., 1], stats[..., 2]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n
+        var = (squares - total * mean) / (n - 1)
+    mean = np.where(n > 0, mean, np.nan)
+    std = np.sqrt(np.where(n > 1, np.maximum(var, 0.0), np.nan))
+    return n, mean, std
+
+
+class SegmentCube:
+    # Every respondent is given one integer cell key (the mixed-radix combination of
+    # their dimension codes), and counts, sums and sums of squares of all outcomes are
+    # accumulated per cell with np.bincount in a single pass over the data. Any
+    # combination of dimensions is then a sum over the other axes of that base
+    # cuboid; these roll-ups are cached so a slice lookup is a plain array index.
+    # Respondents missing a dimension are kept in a hidden slot on that axis, so they
+    # still count towards roll-ups where the dimension is aggregated away.
+    # With survey weights (see weighting.Raker) 'n' is the weighted count.
+
+    def __init__(self, df, dimensions=None, outcomes=None, rollups=True, weights=None):
+        self.dimensions = dict(dimensions or DIMENSIONS)
+        self.outcomes = [o for o in (outcomes or OUTCOMES) if o in df.columns]
+        self.levels = {}
+        codes = []
+        for name, column in self.dimensions.items():
+            dim_codes, uniques = pd.factorize(df[column], sort=True)
+            codes.append(np.where(dim_codes < 0, len(uniques), dim_codes))
+            self.levels[name] = list(uniques)
+        self._codes = {name: {level: i for i, level in enumerate(levels)}
+                       for name, levels in self.levels.items()}
+        self._shape = tuple(len(levels) + 1 for levels in self.levels.values())
+
+        cells = int(np.prod(self._shape))
+        key = np.ravel_multi_index(codes, self._shape) if codes else np.zeros(len(df), dtype='int64')
+        values = df[self.outcomes].to_numpy(dtype='float64')
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        self.weighted = weights is not None
+        w = np.ones(len(df)) if weights is None else np.asarray(weights, dtype='float64')
+
+        stats = np.empty((cells, len(self.outcomes), 3))
+        for j in range(len(self.outcomes)):
+            stats[:, j, 0] = np.bincount(key, weights=w * present[:, j], minlength=cells)
+            stats[:, j, 1] = np.bincount(key, weights=w * filled[:, j], minlength=cells)
+            stats[:, j, 2] = np.bincount(key, weights=w * filled[:, j] ** 2, minlength=cells)
+        self._base = stats.reshape(self._shape + (len(self.outcomes), 3))
+        self._respondents = np.bincount(key, minlength=cells).reshape(self._shape)
+
+        self._cuboids = {}
+        if rollups:
+            names = list(self.levels)
+            for size in range(len(names) + 1):
+                for dims in combinations(names, size):
+                    self._cuboid(dims)
+
+    def _canonical(self, dims):
+        unknown = [d for d in dims if d not in self.levels]
+        if unknown:
+            raise KeyError(f"Unknown dimension(s) {unknown}, expected some of {list(self.levels)}")
+        return tuple(d for d in self.levels if d in dims)
+
+    # Aggregate over every dimension not in `dims` and drop the missing-value slots
+    def _cuboid(self, dims):
+        dims = self._canonical(dims)
+        if dims not in self._cuboids:
+            axes = [i for i, d in enumerate(self.levels) if d not in dims]
+            keep = tuple(slice(0, -1) for _ in dims)
+            stats = self._base.sum(axis=tuple(axes))[keep]
+            respondents = self._respondents.sum(axis=tuple(axes))[keep]
+            self._cuboids[dims] = (stats, respondents)
+        return self._cuboids[dims]
+
+    # Statistics of every outcome in one segment, e.g. lookup(Income='Below ₦50,000', Gender='Female')
+    def lookup(self, **segment):
+        dims = self._canonical(segment)
+        try:
+            index = tuple(self._codes[d][segment[d]] for d in dims)
+        except KeyError as error:
+            raise KeyError(f"Unknown segment level {error} for {segment}") from None
+        stats, _ = self._cuboid(dims)
+        n, mean, std = _moments(stats[index])
+        n = n if self.weighted else n.astype('int64')
+        return pd.DataFrame({'n': n, 'mean': mean, 'std': std}, index=self.outcomes)
+
+    # Number of respondents in the segment
+    def size(self, **segment):
+        dims = self._canonical(segment)
+        _, respondents = self._cuboid(dims)
+        return int(respondents[tuple(self._codes[d][segment[d]] for d in dims)])
+
+    # One statistic for every outcome across all segments of the given dimensions,
+    # e.g. table('Income') for the average outcomes by income range
+    def table(self, *dims, stat='mean'):
+        if stat not in STATISTICS:
+            raise ValueError(f"Unknown statistic '{stat}', expected one of {STATISTICS}")
+        dims = self._canonical(dims)
+        stats, _ = self._cuboid(dims)
+        values = _moments(stats)[STATISTICS.index(stat)].reshape(-1, len(self.outcomes))
+        if dims:
+            index = pd.MultiIndex.from_product([self.levels[d] for d in dims], names=list(dims))
+            if len(dims) == 1:
+                index = index.get_level_values(0)
+        else:
+            index = pd.Index(['All'])
+        table = pd.DataFrame(values, index=index, columns=self.outcomes)
+        return table.astype('int64') if stat == 'n' and not self.weighted else table
+
+    # Respondent counts across all segments of the given dimensions
+    def sizes(self, *dims):
+        dims = self._canonical(dims)
+        _, respondents = self._cuboid(dims)
+        if not dims:
+            return pd.Series([int(respondents)], index=['All'], name='Respondents')
+        index = pd.MultiIndex.from_product([self.levels[d] for d in dims], names=list(dims))
+        if len(dims) == 1:
+            index = index.get_level_values(0)
+        return pd.Series(respondents.reshape(-1), index=index, name='Respondents')
@@ -0,0 +1,167 @@
+# Lexicon-based sentiment and aspect scoring of the free-text questions.
+# The notebook only counts words in the open-ended answers; these helpers score
+# each answer offline with a small domain lexicon (with negation and intensifiers)
+# and count mentions of the recurring aspects (price, privacy, relevance, ...), so
+# the text can be correlated with Satisfaction_Level and Trust_Level.
+# The lexicon is looked up once per vocabulary entry and then gathered over the
+# token-ID arrays (see text.py); per-answer totals are np.bincount sums over the rows.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from . import codebook
+from .lazy import lazy_import
+from .text import document_term_matrix
+
+stats = lazy_import('scipy.stats')
+
+# Word -> valence (-3 very negative ... +3 very positive)
+LEXICON = {
+    'good': 2, 'great': 3, 'excellent': 3, 'amazing': 3, 'awesome': 3, 'love': 3, 'like': 1, 'nice': 2,
+    'helpful': 2, 'useful': 2, 'relevant': 2, 'accurate': 2, 'satisfied': 2, 'happy': 2, 'easy': 1,
+    'convenient': 2, 'interesting': 1, 'impressive': 2, 'better': 1, 'best': 3, 'fine': 1, 'okay': 1,
+    'ok': 1, 'perfect': 3, 'recommend': 1, 'enjoy': 2, 'affordable': 2, 'cheap': 1, 'fast': 1,
+    'reliable': 2, 'trust': 1, 'secure': 2, 'safe': 2, 'improve': 1, 'improved': 1, 'personalised': 1,
+    'personalized': 1, 'thanks': 1, 'appreciate': 2, 'diverse': 1, 'variety': 1,
+    'bad': -2, 'poor': -2, 'terrible': -3, 'awful': -3, 'hate': -3, 'annoying': -2, 'irritating': -2,
+    'irrelevant': -2, 'repetitive': -2, 'repeated': -1, 'same': -1, 'boring': -2, 'useless': -2,
+    'expensive': -2, 'costly': -2, 'overpriced': -2, 'slow': -1, 'fake': -3, 'scam': -3, 'fraud': -3,
+    'concern': -1, 'concerns': -1, 'concerned': -2, 'worried': -2, 'worry': -2, 'fear': -2, 'afraid': -2,
+    'risk': -2, 'risky': -2, 'unsafe': -2, 'misuse': -3, 'breach': -3, 'leak': -3, 'hack': -3,
+    'hacked': -3, 'stolen': -3, 'theft': -3, 'spam': -2, 'intrusive': -2, 'invasive': -2, 'creepy': -2,
+    'uncomfortable': -2, 'disappointed': -2, 'frustrating': -2, 'problem': -1, 'problems': -1,
+    'issue': -1, 'issues': -1, 'wrong': -2, 'inaccurate': -2, 'unnecessary': -1, 'difficult': -1,
+}
+
+# Words that flip the valence of the next few words
+NEGATORS = {'not', 'no', 'never', 'nothing', 'none', 'nor', 'without', 'hardly', 'barely', 'dont',
+            'doesnt', 'didnt', 'isnt', 'arent', 'wasnt', 'werent', 'cant', 'cannot', 'wont', 'wouldnt',
+            'shouldnt', 'havent', 'hasnt'}
+NEGATION_WINDOW = 3
+NEGATION_SCALE = -0.74
+
+# Words that scale the valence of the following word
+INTENSIFIERS = {'very': 1.3, 'really': 1.3, 'extremely': 1.5, 'so': 1.2, 'too': 1.2, 'highly': 1.3,
+                'quite': 1.1, 'slightly': 0.7, 'somewhat': 0.8, 'little': 0.8}
+
+# Normalization constant of the compound score s / sqrt(s^2 + alpha), as in VADER
+ALPHA = 15.0
+
+# Aspect -> words that signal it
+ASPECTS = {
+    'Price': {'price', 'prices', 'cost', 'costs', 'expensive', 'cheap', 'affordable', 'budget', 'income',
+              'discount', 'discounts', 'money', 'overpriced', 'costly'},
+    'Privacy': {'privacy', 'private', 'data', 'personal', 'information', 'consent', 'secure', 'security',
+                'breach', 'leak', 'hack', 'hacked', 'misuse', 'share', 'sharing', 'tracking', 'track'},
+    'Relevance': {'relevant', 'irrelevant', 'relevance', 'preference', 'preferences', 'needs', 'interest',
+                  'interests', 'accurate', 'inaccurate', 'match', 'suited', 'tailored', 'personalised',
+                  'personalized'},
+    'Variety': {'repetitive', 'repeated', 'same', 'variety', 'diverse', 'diversity', 'different', 'options',
+                'new', 'boring'},
+    'Trust': {'trust', 'transparent', 'transparency', 'honest', 'reliable', 'fake', 'scam', 'fraud',
+              'authentic', 'genuine', 'original'},
+    'Delivery': {'delivery', 'deliver', 'delivered', 'shipping', 'late', 'delay', 'delays', 'logistics'},
+}
+
+# Short prefixes of the sentiment columns for each free-text question
+TEXT_PREFIXES = {
+    codebook.BETTER_CATER: 'Better_Cater',
+    codebook.DATA_CONCERNS: 'Data_Concerns',
+    codebook.ADDITIONAL_COMMENTS: 'Additional_Comments',
+}
+
+# Answers scored together by one worker
+CHUNK_SIZE = 5000
+
+
+def _lookup(vocabulary, table, default):
+    return pd.Series(vocabulary, dtype='object').map(table).fillna(default).to_numpy(dtype='float64')
+
+
+# Sentiment and aspect columns from the token-ID arrays of a Series of answers
+def _score_tokens(texts, rows, token_ids, vocabulary):
+    n = len(texts)
+    valence = _lookup(vocabulary, LEXICON, 0.0)[token_ids]
+    negator = np.isin(vocabulary, list(NEGATORS))[token_ids]
+    intensity = _lookup(vocabulary, INTENSIFIERS, 1.0)[token_ids]
+
+    # A negator or intensifier applies to the words after it in the same answer
+    scale = np.ones(len(token_ids))
+    for k in range(1, NEGATION_WINDOW + 1):
+        same = np.zeros(len(token_ids), dtype=bool)
+        same[k:] = rows[k:] == rows[:-k]
+        flipped = np.zeros(len(token_ids), dtype=bool)
+        flipped[k:] = negator[:-k]
+        scale = np.where(same & flipped, scale * NEGATION_SCALE, scale)
+    boosted = np.ones(len(token_ids))
+    if len(token_ids) > 1:
+        boosted[1:] = np.where(rows[1:] == rows[:-1], intensity[:-1], 1.0)
+    scores = valence * scale * boosted
+
+    total = np.bincount(rows, weights=scores, minlength=n)
+    result = {
+        'Sentiment': total / np.sqrt(total ** 2 + ALPHA),
+        'Positive': np.bincount(rows, weights=scores > 0, minlength=n),
+        'Negative': np.bincount(rows, weights=scores < 0, minlength=n),
+    }
+    for aspect, words in ASPECTS.items():
+        mentions = np.isin(vocabulary, list(words))[token_ids]
+        result[f'Aspect_{aspect}'] = np.bincount(rows, weights=mentions, minlength=n)
+    frame = pd.DataFrame(result, index=texts.index)
+    answered = (texts.astype('string').str.strip() != '').fillna(False).to_numpy(dtype=bool)
+    frame.loc[~answered] = np.nan
+    return frame
+
+
+def _score_chunk(chunk):
+    return _score_tokens(*chunk)
+
+
+# Sentiment of every answer in a Series: compound score in [-1, 1], counts of positive
+# and negative words and mention counts per aspect (NaN for unanswered rows).
+# The answers are tokenized once, into the cached document-term matrix; larger
+# columns are scored in chunks of rows (slices of its token-ID arrays) in parallel processes.
+def score_texts(texts, n_jobs=None):
+    dtm = document_term_matrix(texts)
+    if len(texts) <= CHUNK_SIZE:
+        return _score_tokens(texts, dtm.rows, dtm.token_ids, dtm.vocabulary)
+    starts = np.arange(0, len(texts), CHUNK_SIZE)
+    bounds = np.searchsorted(dtm.rows, np.r_[starts, len(texts)])
+    chunks = [(texts.iloc[start:start + CHUNK_SIZE], dtm.rows[bounds[i]:bounds[i + 1]] - start,
+               dtm.token_ids[bounds[i]:bounds[i + 1]], dtm.vocabulary) for i, start in enumerate(starts)]
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(chunks))
+    if n_jobs == 1:
+        parts = list(map(_score_chunk, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            parts = list(pool.map(_score_chunk, chunks))
+    return pd.concat(parts)
+
+
+# Sentiment columns for every free-text question in the survey, named like
+# Data_Concerns_Sentiment or Data_Concerns_Aspect_Privacy
+def encode_sentiment(df, n_jobs=None):
+    frames = []
+    for question, prefix in TEXT_PREFIXES.items():
+        if question in df.columns:
+            scores = score_texts(df[question], n_jobs=n_jobs)
+            frames.append(scores.add_prefix(f'{prefix}_'))
+    return pd.concat(frames, axis=1) if frames else pd.DataFrame(index=df.index)
+
+
+# Spearman correlation (with p-value and n) of every sentiment column with the outcomes
+def sentiment_correlations(df, outcomes=('Satisfaction_Level', 'Trust_Level'), sentiment=None):
+    sentiment = sentiment if sentiment is not None else encode_sentiment(df)
+    rows = []
+    for column in [c for c in sentiment.columns if c.endswith('_Sentiment')]:
+        for outcome in outcomes:
+            data = pd.concat([sentiment[column], df[outcome]], axis=1).dropna()
+            if len(data) < 3:
+                continue
+            result = stats.spearmanr(data.iloc[:, 0], data.iloc[:, 1])
+            rows.append({'sentiment': column, 'outcome': outcome, 'rho': result.statistic,
+                         'p_value': result.pvalue, 'n': len(data)})
+    return pd.DataFrame(rows, columns=['sentiment', 'outcome', 'rho', 'p_value', 'n'])
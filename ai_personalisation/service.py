@@ -0,0 +1,283 @@
+# Long-running HTTP analytics service over a warm, encoded dataset.
+# The app is a plain ASGI callable (run it with any ASGI server, e.g.
+# `python -m ai_personalisation serve --input Aldata.xlsx`, which uses uvicorn).
+# The survey is loaded and encoded once at startup. Responses are cached by
+# endpoint and query, concurrent identical requests share one computation, and
+# the CPU-heavy group tests and regression fits run on a bounded process pool whose
+# workers hold their own copy of the dataset.
+#
+# Endpoints (GET, JSON):
+#   /health
+#   /columns
+#   /value_counts?column=Income&normalize=true
+#   /crosstab?rows=Economic_Segment&columns=Fairness_Perception&normalize=index
+#   /correlations?columns=Satisfaction_Level,Trust_Level&method=spearman
+#   /group_test?outcome=Satisfaction_Level&group=Income
+#   /regression?outcome=Engagement_Level&predictors=Satisfaction_Level,Trust_Level
+# Columns can be given by derived name, question ID or text, or by dimension name
+# (Age, Gender, Income, ...).
+
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs
+
+import numpy as np
+import pandas as pd
+
+from .schema import resolve
+from .segments import DIMENSIONS
+
+# Responses kept in the result cache before the oldest are dropped
+CACHE_SIZE = 4096
+
+CORRELATION_METHODS = ['pearson', 'spearman', 'kendall']
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _jsonable(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return json.loads(value.to_json(orient='split' if isinstance(value, pd.DataFrame) else 'index'))
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _resolve(df, name):
+    column = DIMENSIONS.get(name, resolve(name))
+    if column not in df.columns:
+        raise BadRequest(f'Unknown column {name!r}')
+    return column
+
+
+def _numeric(df, names):
+    columns = [_resolve(df, name) for name in names]
+    for name, column in zip(names, columns):
+        if not pd.api.types.is_numeric_dtype(df[column]):
+            raise BadRequest(f'Column {name!r} is not numeric')
+    return columns
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+# Dataset of the worker processes, set once by the pool initializer
+_WORKER_DATA = None
+
+
+def _init_worker(df):
+    global _WORKER_DATA
+    _WORKER_DATA = df
+
+
+def group_test(df, outcome, group):
+    from scipy import stats
+
+    from .effect_sizes import GroupEffects
+
+    outcome = _numeric(df, [outcome])[0]
+    group_column = _resolve(df, group)
+    if group_column == outcome:
+        raise BadRequest('The outcome and group must be different columns')
+    data = df[[outcome, group_column]].dropna()
+    groups = [values.to_numpy() for _, values in data.groupby(group_column)[outcome]]
+    if len(groups) < 2:
+        raise BadRequest(f'{group!r} has fewer than two groups with {outcome!r} answered')
+    effects = GroupEffects(data, group_column, [outcome])
+    n, mean, var, _ = effects.moments
+    result = {'n': int(len(data)), 'groups': {str(g): {'n': int(n[0, i]), 'mean': mean[0, i], 'std': np.sqrt(var[0, i])}
+                                             for i, g in enumerate(effects.groups)}}
+    if len(groups) == 2:
+        test = stats.ttest_ind(*groups)
+        result.update(test='ttest_ind', statistic=test.statistic, p_value=test.pvalue,
+                      cohens_d=effects.compare(effects.groups[0], effects.groups[1]).loc[outcome, 'cohens_d'])
+    else:
+        test = stats.f_oneway(*groups)
+        result.update(test='f_oneway', statistic=test.statistic, p_value=test.pvalue)
+    result.update(effects.anova().loc[outcome].to_dict())
+    return result
+
+
+def regression(df, outcome, predictors):
+    import statsmodels.api as sm
+
+    outcome = _numeric(df, [outcome])[0]
+    predictors = _numeric(df, predictors)
+    data = df[[outcome] + predictors].dropna()
+    if len(data) <= len(predictors) + 1:
+        raise BadRequest('Not enough complete responses for this model')
+    model = sm.OLS(data[outcome], sm.add_constant(data[predictors])).fit()
+    return {'n': int(model.nobs), 'r_squared': model.rsquared, 'adj_r_squared': model.rsquared_adj,
+            'f_pvalue': model.f_pvalue,
+            'coefficients': pd.DataFrame({'coefficient': model.params, 'std_error': model.bse,
+                                          't_value': model.tvalues, 'p_value': model.pvalues})}
+
+
+def _worker_task(function, *args):
+    return _jsonable(function(_WORKER_DATA, *args))
+
+
+class SurveyService:
+
+    def __init__(self, df, workers=None):
+        self.df = df
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self._pool = None
+        self._cache = {}
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.routes = {
+            '/health': self._health,
+            '/columns': self._columns,
+            '/value_counts': self._value_counts,
+            '/crosstab': self._crosstab,
+            '/correlations': self._correlations,
+            '/group_test': self._group_test,
+            '/regression': self._regression,
+        }
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(self.df,))
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    # Cached result of one request. The first caller computes it; identical requests
+    # arriving meanwhile await the same future instead of computing it again.
+    async def _cached(self, key, compute):
+        if key in self._cache:
+            self.hits += 1
+            return self._cache[key]
+        if key in self._pending:
+            self.hits += 1
+            return await asyncio.shield(self._pending[key])
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            result = await compute()
+        except BaseException as error:
+            future.set_exception(error)
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            self._cache[key] = result
+            if len(self._cache) > CACHE_SIZE:
+                del self._cache[next(iter(self._cache))]
+            return result
+        finally:
+            del self._pending[key]
+
+    async def _in_pool(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, _worker_task, function, *args)
+
+    async def _health(self, query):
+        return {'status': 'ok', 'respondents': len(self.df), 'cache_entries': len(self._cache),
+                'hits': self.hits, 'misses': self.misses}
+
+    async def _columns(self, query):
+        return {'dimensions': DIMENSIONS, 'columns': [str(c) for c in self.df.columns]}
+
+    async def _value_counts(self, query):
+        column = _resolve(self.df, self._required(query, 'column'))
+        counts = self.df[column].value_counts(normalize=query.get('normalize') == 'true', dropna=False)
+        return {'column': column, 'counts': counts}
+
+    async def _crosstab(self, query):
+        rows = _resolve(self.df, self._required(query, 'rows'))
+        columns = _resolve(self.df, self._required(query, 'columns'))
+        normalize = query.get('normalize', False)
+        if normalize not in (False, 'all', 'index', 'columns'):
+            raise BadRequest("normalize must be 'all', 'index' or 'columns'")
+        return {'table': pd.crosstab(self.df[rows], self.df[columns], normalize=normalize)}
+
+    async def _correlations(self, query):
+        method = query.get('method', 'pearson')
+        if method not in CORRELATION_METHODS:
+            raise BadRequest(f'method must be one of {CORRELATION_METHODS}')
+        columns = _numeric(self.df, _split(self._required(query, 'columns')))
+        return {'method': method, 'matrix': self.df[columns].corr(method=method)}
+
+    async def _group_test(self, query):
+        return await self._in_pool(group_test, self._required(query, 'outcome'), self._required(query, 'group'))
+
+    async def _regression(self, query):
+        predictors = _split(self._required(query, 'predictors'))
+        return await self._in_pool(regression, self._required(query, 'outcome'), predictors)
+
+    @staticmethod
+    def _required(query, name):
+        if not query.get(name):
+            raise BadRequest(f'Missing query parameter {name!r}')
+        return query[name]
+
+    # Handle one request; returns (status, JSON-serializable body)
+    async def handle(self, path, query_string=''):
+        route = self.routes.get(path.rstrip('/') or '/')
+        if route is None:
+            return 404, {'error': f'Unknown endpoint {path!r}', 'endpoints': sorted(self.routes)}
+        query = {k: v[-1] for k, v in parse_qs(query_string).items()}
+        if route == self._health:
+            return 200, await route(query)
+        key = (path, tuple(sorted(query.items())))
+        try:
+            body = await self._cached(key, lambda: self._compute(route, query))
+        except BadRequest as error:
+            return 400, {'error': str(error)}
+        return 200, body
+
+    async def _compute(self, route, query):
+        return _jsonable(await route(query))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    self.pool
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    self.close()
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+        if scope['method'] != 'GET':
+            status, body = 405, {'error': 'Only GET is supported'}
+        else:
+            try:
+                status, body = await self.handle(scope['path'], scope.get('query_string', b'').decode())
+            except Exception as error:
+                status, body = 500, {'error': f'{type(error).__name__}: {error}'}
+        payload = json.dumps(body).encode()
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]})
+        await send({'type': 'http.response.body', 'body': payload})
+
+
+# Serve the app with uvicorn (optional dependency)
+def serve(service, host='127.0.0.1', port=8000):
+    try:
+        import uvicorn
+    except ImportError:
+        raise ImportError('Serving over HTTP requires an ASGI server such as uvicorn (pip install uvicorn)') from None
+    uvicorn.run(service, host=host, port=port, log_level='info')
@@ -0,0 +1,124 @@
+# Embedded SQL over the encoded survey, using DuckDB (optional dependency).
+# The encoded responses, the challenge indicator matrix and the ranking matrices
+# are registered as Arrow-backed tables keyed by Respondent, so ad-hoc questions are
+# one query instead of new pandas code, e.g. satisfaction by income among
+# respondents citing repetitive recommendations:
+#
+#     SELECT r.Income, avg(r.Satisfaction_Level) AS satisfaction, count(*) AS n
+#     FROM responses r JOIN challenges c USING (Respondent)
+#     WHERE c."Recommendations are repetitive" = 1
+#     GROUP BY r.Income ORDER BY satisfaction DESC
+#
+# A score warehouse (see warehouse.py) can be attached as the `scores` view and is
+# scanned in place with partition pruning.
+
+import os
+
+import pandas as pd
+
+from . import codebook
+from .encoding import challenge_matrix, ranking_matrix
+from .lazy import lazy_import
+from .segments import DIMENSIONS
+from .warehouse import DERIVED_COLUMNS, RESPONDENT, respondent_keys
+
+pa = lazy_import('pyarrow')
+
+# Table name -> ranking question and labels
+RANKING_TABLES = {
+    'relevance_ranking': codebook.RANKINGS['Relevance_Score'],
+    'improvement_ranking': codebook.RANKINGS['Improvement_Score'],
+}
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError('The SQL interface requires duckdb (pip install duckdb)') from None
+    return duckdb
+
+
+# The encoded responses with SQL-friendly column names: respondent key, start time,
+# demographic dimensions by their short names and every derived column
+def response_table(df):
+    keys = respondent_keys(df).to_numpy()
+    columns = {RESPONDENT: keys}
+    if codebook.START_TIME in df.columns:
+        columns['Start_Time'] = df[codebook.START_TIME].to_numpy()
+    for name, column in DIMENSIONS.items():
+        if column in df.columns:
+            columns[name] = df[column].to_numpy()
+    for column in DERIVED_COLUMNS:
+        if column in df.columns and column not in columns:
+            columns[column] = df[column].to_numpy()
+    return pd.DataFrame(columns)
+
+
+def _keyed(frame, keys):
+    frame = frame.reset_index(drop=True)
+    frame.insert(0, RESPONDENT, keys)
+    return frame
+
+
+class SurveyDatabase:
+    # One in-memory DuckDB connection. Tables are registered from Arrow tables, which
+    # DuckDB scans directly without copying them into its own storage.
+
+    def __init__(self, df=None, database=':memory:'):
+        self.connection = _duckdb().connect(database)
+        self._tables = {}
+        if df is not None:
+            self.register_survey(df)
+
+    def register(self, name, frame):
+        table = frame if isinstance(frame, pa.Table) else pa.Table.from_pandas(frame, preserve_index=False)
+        self._tables[name] = table
+        self.connection.register(name, table)
+        return self
+
+    # Register responses, challenges and the ranking matrices of an encoded survey.
+    # Duplicate submissions hash to the same respondent key and would multiply rows
+    # in every join, so they are rejected as in ScoreWarehouse.write.
+    def register_survey(self, df):
+        keys = respondent_keys(df)
+        duplicated = keys.duplicated()
+        if duplicated.any():
+            raise ValueError(f'{int(duplicated.sum())} duplicate respondent keys; drop duplicate responses first '
+                             '(duplicates.drop_duplicate_responses or sql --deduplicate)')
+        keys = keys.to_numpy()
+        self.register('responses', response_table(df))
+        if codebook.CHALLENGES in df.columns:
+            self.register('challenges', _keyed(challenge_matrix(df[codebook.CHALLENGES]), keys))
+        for name, (question, labels) in RANKING_TABLES.items():
+            if question in df.columns:
+                ranks = ranking_matrix(df[question], labels).reindex(df.index)
+                self.register(name, _keyed(ranks, keys))
+        return self
+
+    # Expose a score warehouse directory as the `scores` view (read in place)
+    def attach_warehouse(self, root, name='scores'):
+        pattern = os.path.join(root, '**', '*.parquet').replace("'", "''")
+        self.connection.execute(f"CREATE OR REPLACE VIEW {name} AS "
+                                f"SELECT * FROM read_parquet('{pattern}', hive_partitioning = true)")
+        return self
+
+    def tables(self):
+        return self.connection.execute('SHOW TABLES').df()['name'].tolist()
+
+    # Run a query and return the result as a DataFrame
+    def query(self, sql, parameters=None):
+        return self.connection.execute(sql, parameters or []).df()
+
+    # Run a query and return the result as an Arrow table
+    def arrow(self, sql, parameters=None):
+        return self.connection.execute(sql, parameters or []).fetch_arrow_table()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
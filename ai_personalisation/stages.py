@@ -0,0 +1,362 @@
+# Headless analysis stages used by the command-line entry point.
+# Each stage takes the encoded survey and writes its tables and figures to the
+# output directory. Heavy libraries (matplotlib, scipy, statsmodels, sklearn,
+# wordcloud) are imported inside the stage that needs them, so a run that only
+# asks for some stages does not pay for the others.
+
+import os
+import sys
+
+from . import codebook
+
+TABLE_FORMATS = ['csv', 'parquet', 'json']
+
+
+class Output:
+    # Writes tables and figures for a run and keeps the list of written files
+
+    def __init__(self, directory, table_format='csv', figure_format='png'):
+        if table_format not in TABLE_FORMATS:
+            raise ValueError(f"Unknown table format '{table_format}', expected one of {TABLE_FORMATS}")
+        self.directory = directory
+        self.table_format = table_format
+        self.figure_format = figure_format
+        self.written = []
+        os.makedirs(directory, exist_ok=True)
+
+    def table(self, name, frame):
+        path = os.path.join(self.directory, f'{name}.{self.table_format}')
+        if self.table_format == 'csv':
+            frame.to_csv(path)
+        elif self.table_format == 'parquet':
+            frame.rename(columns=str).to_parquet(path)
+        else:
+            frame.to_json(path, orient='table', indent=2)
+        self.written.append(path)
+        return path
+
+    def figure(self, name, figure):
+        import matplotlib.pyplot as plt
+
+        path = os.path.join(self.directory, f'{name}.{self.figure_format}')
+        figure.savefig(path, bbox_inches='tight')
+        plt.close(figure)
+        self.written.append(path)
+        return path
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.style.use('ggplot')
+    return plt
+
+
+# Chart name -> (question, title) of the distribution charts in the notebook
+CHARTS = {
+    'age_distribution': (codebook.AGE, 'Age Group Distribution'),
+    'gender_distribution': (codebook.GENDER, 'Gender Distribution'),
+    'income_distribution': (codebook.INCOME, 'Monthly Income Range Distribution'),
+    'shopping_frequency': (codebook.SHOPPING_FREQUENCY, 'Shopping Frequency Distribution'),
+    'satisfaction': (codebook.SATISFACTION, 'Satisfaction with Personalised Recommendations'),
+    'interaction_frequency': (codebook.INTERACTION, 'Interaction Frequency with AI Recommendations'),
+    'privacy_concern': (codebook.PRIVACY_CONCERN, 'Privacy Concerns about AI Recommendations'),
+    'trust_transparency': (codebook.TRUST, 'Trust Improvement with Data Transparency'),
+    'loyalty': (codebook.LOYALTY, 'Customer Loyalty Influenced by AI Personalisation'),
+}
+
+
+# Horizontal bar chart of answer counts
+def distribution_figure(counts, title):
+    plt = _pyplot()
+    figure, axis = plt.subplots(figsize=(10, 6))
+    counts.sort_values().plot(kind='barh', ax=axis)
+    axis.set_title(title)
+    axis.set_xlabel('Count')
+    return figure
+
+
+# Demographic summaries and collection trends (Sections 1-3 of the notebook)
+def run_eda(df, output, store=None):
+    import pandas as pd
+
+    from .timeseries import CollectionMonitor
+
+    plt = _pyplot()
+    summary = []
+    for name, (column, title) in CHARTS.items():
+        if column not in df.columns:
+            continue
+        counts = df[column].value_counts()
+        summary.append(pd.DataFrame({'question': name, 'answer': counts.index, 'count': counts.to_numpy()}))
+        output.figure(name, distribution_figure(counts, title))
+    output.table('demographic_summary', pd.concat(summary, ignore_index=True))
+
+    if codebook.START_TIME in df.columns:
+        monitor = CollectionMonitor().update(df)
+        weekdays = monitor.weekday_counts()
+        output.table('responses_by_weekday', weekdays.to_frame())
+        figure, axis = plt.subplots(figsize=(10, 6))
+        weekdays.plot(kind='bar', ax=axis)
+        axis.set_title('Data Collection Trends by Day of Week')
+        axis.set_ylabel('Count of Responses')
+        output.figure('responses_by_weekday', figure)
+        output.table('responses_by_day', monitor.counts('day').to_frame())
+
+
+# Outcome metrics by age, gender, income and economic segment, optionally with
+# response weights (e.g. quality.quality_weights); 'n' is then the weighted count
+def run_segments(df, output, store=None, weights=None):
+    from .segments import DIMENSIONS, SegmentCube
+
+    cube = SegmentCube(df, weights=weights)
+    for name in DIMENSIONS:
+        output.table(f'outcomes_by_{name.lower()}', cube.table(name))
+        output.table(f'respondents_by_{name.lower()}', cube.sizes(name).to_frame())
+
+
+def _fit_ols(data, outcome, predictors):
+    import statsmodels.api as sm
+
+    return sm.OLS(data[outcome], sm.add_constant(data[predictors])).fit()
+
+
+def _fit_manova(data, formula):
+    from statsmodels.multivariate.manova import MANOVA
+
+    return MANOVA.from_formula(formula, data=data).mv_test()
+
+
+def _cached(store, stage, compute, data, **params):
+    if store is None:
+        return compute(data, **params)
+    return store.fetch(stage, compute, data, **params)
+
+
+# Outcome and predictors of the TPB and TAM regressions
+REGRESSION_MODELS = {
+    'TPB': ('Engagement_Level', ['Satisfaction_Level', 'Trust_Level', 'Privacy_Concern_Level', 'Data_Comfort_Level']),
+    'TAM': ('Engagement_Level', ['Relevance_Score', 'Interaction_Frequency']),
+}
+
+
+# The hypothesis battery of Section 5. Returns the registry of test results and
+# the supporting tables (effect sizes and regression coefficients) by name.
+def hypothesis_tests(df, store=None):
+    import pandas as pd
+    from scipy.stats import chi2_contingency, f_oneway, pearsonr, spearmanr, ttest_ind
+
+    from .effect_sizes import GroupEffects, median_split
+    from .results import ResultsRegistry
+
+    registry = ResultsRegistry()
+    tables = {}
+
+    def groups_of(data, outcome, group):
+        return [values.to_numpy() for _, values in data.groupby(group)[outcome] if len(values) > 0]
+
+    # H1/H2: engagement and satisfaction
+    data = df[['Engagement_Level', 'Satisfaction_Level']].dropna()
+    registry.record_scipy('pearsonr', pearsonr(data['Engagement_Level'], data['Satisfaction_Level']),
+                          outcome='Satisfaction_Level', predictor='Engagement_Level', hypothesis='H1', n=len(data))
+    registry.record_scipy('spearmanr', spearmanr(data['Engagement_Level'], data['Satisfaction_Level']),
+                          outcome='Satisfaction_Level', predictor='Engagement_Level', hypothesis='H2', n=len(data))
+
+    # H3/H4: cultural and economic relevance
+    data = df.dropna(subset=['Cultural_Relevance', 'Economic_Relevance'])
+    for outcome, group, hypothesis in [('Engagement_Level', 'Cultural_Relevance', 'H3'),
+                                       ('Satisfaction_Level', 'Economic_Relevance', 'H4')]:
+        subset = data.dropna(subset=[outcome])
+        groups = groups_of(subset, outcome, group)
+        registry.record_scipy('f_oneway', f_oneway(*groups), outcome=outcome, predictor=group,
+                              hypothesis=hypothesis, df=len(groups) - 1, n=len(subset))
+
+    # H5/H6: median splits of trust and privacy concern, with effect sizes
+    effect_tables = []
+    for split_column, outcomes, hypothesis in [('Trust_Level', ['Engagement_Level'], 'H5'),
+                                               ('Privacy_Concern_Level', ['Engagement_Level', 'Satisfaction_Level'], 'H6')]:
+        data = df.assign(Split=median_split(df[split_column]))
+        effects = GroupEffects(data, 'Split', outcomes).compare('High', 'Low')
+        effect_tables.append(effects.assign(split=split_column))
+        for outcome in outcomes:
+            high = data.loc[data['Split'] == 'High', outcome].dropna()
+            low = data.loc[data['Split'] == 'Low', outcome].dropna()
+            registry.record_scipy('ttest_ind', ttest_ind(high, low), outcome=outcome, predictor=split_column,
+                                  hypothesis=hypothesis, effect=effects.loc[outcome, 'cohens_d'], n=len(high) + len(low))
+    data = df.dropna(subset=['Privacy_Concern_Level', 'Engagement_Level', 'Satisfaction_Level'])
+    for outcome in ['Engagement_Level', 'Satisfaction_Level']:
+        registry.record_scipy('pearsonr', pearsonr(data['Privacy_Concern_Level'], data[outcome]),
+                              outcome=outcome, predictor='Privacy_Concern_Level', hypothesis='H6', n=len(data))
+    tables['median_split_effect_sizes'] = pd.concat(effect_tables)
+
+    # H7/H8: digital literacy levels
+    data = df.dropna(subset=['Digital_Literacy', 'Engagement_Level', 'Satisfaction_Level']).copy()
+    data['Digital_Literacy_Level'] = pd.cut(data['Digital_Literacy'], bins=[0, 2, 3, 5], labels=['Low', 'Medium', 'High'])
+    for outcome, hypothesis in [('Engagement_Level', 'H7'), ('Satisfaction_Level', 'H8')]:
+        groups = groups_of(data, outcome, 'Digital_Literacy_Level')
+        registry.record_scipy('f_oneway', f_oneway(*groups), outcome=outcome, predictor='Digital_Literacy_Level',
+                              hypothesis=hypothesis, df=len(groups) - 1, n=len(data))
+
+    # H9: infrastructure limitations
+    limited = df.loc[df['Infrastructure_Limitation'] == 1, 'Effectiveness_Perception'].dropna()
+    adequate = df.loc[df['Infrastructure_Limitation'] == 0, 'Effectiveness_Perception'].dropna()
+    registry.record_scipy('ttest_ind', ttest_ind(limited, adequate), outcome='Effectiveness_Perception',
+                          predictor='Infrastructure_Limitation', hypothesis='H9', n=len(limited) + len(adequate))
+
+    # H10: fairness perception across economic segments
+    table = pd.crosstab(df['Economic_Segment'], df['Fairness_Perception'])
+    if table.shape[0] > 1 and table.shape[1] > 1:
+        registry.record_scipy('chi2_contingency', chi2_contingency(table), outcome='Fairness_Perception',
+                              predictor='Economic_Segment', hypothesis='H10', n=int(table.to_numpy().sum()))
+
+    # TPB and TAM regressions, and the complexity-theory MANOVA
+    for hypothesis, (outcome, predictors) in REGRESSION_MODELS.items():
+        data = df[[outcome] + predictors].dropna()
+        model = _cached(store, f'ols_{hypothesis}', _fit_ols, data, outcome=outcome, predictors=predictors)
+        registry.record_regression(model, outcome, hypothesis=hypothesis)
+        tables[f'regression_{hypothesis.lower()}'] = pd.DataFrame({
+            'coefficient': model.params, 'std_error': model.bse, 't_value': model.tvalues, 'p_value': model.pvalues})
+
+    manova_columns = ['Satisfaction_Level', 'Relevance_Score', 'Economic_Relevance', 'Cultural_Relevance', 'Infrastructure_Limitation']
+    data = df[manova_columns].dropna()
+    formula = 'Satisfaction_Level + Relevance_Score ~ Economic_Relevance + Cultural_Relevance + Infrastructure_Limitation'
+    manova = _cached(store, 'manova_complexity', _fit_manova, data, formula=formula)
+    registry.record_manova(manova, 'Satisfaction_Level + Relevance_Score', hypothesis='H17')
+    return registry, tables
+
+
+# Holm-adjusted results with Benjamini-Hochberg p-values alongside
+def corrected_results(registry, family=None):
+    results = registry.table(method='holm', family=family)
+    results['p_bh'] = registry.table(method='bh', family=family)['p_adjusted']
+    return results
+
+
+# The hypothesis battery run on every multiply-imputed copy of the survey (see
+# missing.py) and pooled: tests by pool_registries, regression tables by Rubin's
+# rules and the effect-size tables averaged over the imputations
+def imputed_hypothesis_tests(datasets, store=None):
+    import pandas as pd
+
+    from .missing import pool_registries, pooled_ols
+
+    runs = [hypothesis_tests(data, store) for data in datasets]
+    registry = pool_registries([registry for registry, _ in runs])
+    effects = pd.concat([tables['median_split_effect_sizes'] for _, tables in runs])
+    effects = effects.groupby([effects.index, effects['split']], sort=False).mean(numeric_only=True)
+    tables = {'median_split_effect_sizes': effects.reset_index(level='split')}
+    for hypothesis, (outcome, predictors) in REGRESSION_MODELS.items():
+        tables[f'regression_{hypothesis.lower()}'] = pooled_ols(datasets, outcome, predictors)
+    return registry, tables
+
+
+# Hypothesis tests collected in a results registry with multiple-testing corrections.
+# With `imputations`, missing answers are multiply imputed instead of dropped and the
+# results pooled; the missingness summary and Little's MCAR test are written too.
+def run_hypotheses(df, output, store=None, imputations=0):
+    if imputations:
+        from .missing import IMPUTATION_COLUMNS, little_mcar_test, missingness_summary, multiple_imputation
+
+        columns = [c for c in IMPUTATION_COLUMNS if c in df.columns]
+        output.table('missingness', missingness_summary(df, columns))
+        output.table('little_mcar_test', little_mcar_test(df, columns).to_frame())
+        registry, tables = imputed_hypothesis_tests(multiple_imputation(df, m=imputations), store)
+    else:
+        registry, tables = hypothesis_tests(df, store)
+    for name, table in tables.items():
+        output.table(name, table)
+    output.table('hypothesis_tests', corrected_results(registry))
+
+
+# Free-text questions and the short names used for their output files
+TEXT_NAMES = {
+    codebook.BETTER_CATER: 'better_cater',
+    codebook.DATA_CONCERNS: 'data_concerns',
+    codebook.ADDITIONAL_COMMENTS: 'additional_comments',
+}
+
+
+# Word-cloud figure of word frequencies, or None when wordcloud is not installed
+def wordcloud_figure(frequencies):
+    try:
+        from wordcloud import WordCloud
+    except ImportError:
+        return None
+    plt = _pyplot()
+    cloud = WordCloud(width=800, height=400, background_color='white', max_words=100)
+    cloud.generate_from_frequencies(frequencies.head(100).to_dict())
+    figure, axis = plt.subplots(figsize=(10, 5))
+    axis.imshow(cloud, interpolation='bilinear')
+    axis.axis('off')
+    return figure
+
+
+# Thematic analysis of the free-text questions (Section 5 of the notebook)
+def run_text(df, output, store=None):
+    import pandas as pd
+
+    from .sentiment import encode_sentiment, sentiment_correlations
+    from .text import document_term_matrix, lda_topics
+
+    sentiment = encode_sentiment(df)
+    output.table('text_sentiment', sentiment)
+    output.table('sentiment_correlations', sentiment_correlations(df, sentiment=sentiment))
+
+    for column, name in TEXT_NAMES.items():
+        if column not in df.columns:
+            continue
+        dtm = document_term_matrix(df[column], store)
+        frequencies = dtm.frequencies()
+        output.table(f'themes_{name}', frequencies.head(50).to_frame())
+        output.table(f'cooccurrence_{name}', dtm.cooccurrence())
+
+        if frequencies.sum() > 0:
+            # LDA needs scikit-learn; without it the topic table is skipped and the rest of the stage still runs
+            try:
+                topics = _cached(store, f'lda_{name}', lambda data: lda_topics(document_term_matrix(data)), df[column])
+            except ImportError as error:
+                print(f'warning: skipped topics_{name}: {error}', file=sys.stderr)
+            else:
+                output.table(f'topics_{name}',
+                             pd.DataFrame(topics, index=[f'Topic {i + 1}' for i in range(len(topics))]))
+
+        figure = wordcloud_figure(frequencies) if len(frequencies) else None
+        if figure is not None:
+            output.figure(f'wordcloud_{name}', figure)
+
+
+# Multi-wave comparison: per-wave chart distributions and outcome summaries,
+# differences from the first wave and the hypothesis tests within every wave
+def run_wave_comparison(comparison, output, store=None, n_jobs=None):
+    output.table('wave_summary', comparison.summary())
+    output.table('wave_differences', comparison.differences())
+    output.table('wave_distribution_tests', comparison.distribution_tests())
+    output.table('wave_hypothesis_tests', comparison.tests(store, n_jobs=n_jobs))
+
+    plt = _pyplot()
+    for name, (column, title) in CHARTS.items():
+        if column not in comparison.combined.columns:
+            continue
+        distribution = comparison.distribution(column)
+        output.table(f'wave_{name}', distribution)
+        figure, axis = plt.subplots(figsize=(12, 6))
+        distribution.T.plot(kind='bar', ax=axis)
+        axis.set_title(f'{title} by Wave')
+        axis.set_ylabel('Share of Respondents')
+        output.figure(f'wave_{name}', figure)
+    figure, axis = plt.subplots(figsize=(12, 6))
+    comparison.cube.table('Wave').reindex(comparison.waves).T.plot(kind='bar', ax=axis)
+    axis.set_title('Average Outcomes by Wave')
+    output.figure('wave_outcomes', figure)
+
+
+STAGES = {
+    'eda': run_eda,
+    'segments': run_segments,
+    'hypotheses': run_hypotheses,
+    'text': run_text,
+}
+
+# Stages that accept response weights (run --quality-weights)
+WEIGHTED_STAGES = ['segments']
@@ -0,0 +1,148 @@
+# Content-addressed on-disk store for fitted models and test results.
+# Keys are hashes of the input column data and the parameters of a stage, so an
+# unchanged stage (same data, same settings) is loaded from disk instead of being
+# refitted. The store is bounded in size and evicts least recently used entries.
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Bumped whenever the serialized layout of stored results changes
+STORE_VERSION = 1
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'ai_personalisation')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+SUFFIX = '.pkl'
+
+
+def _update(digest, value):
+    if isinstance(value, pd.DataFrame):
+        digest.update(b'frame')
+        digest.update(json.dumps([str(c) for c in value.columns]).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(b'series')
+        digest.update(str(value.name).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(b'array')
+        digest.update(str(value.dtype).encode() + str(value.shape).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b'dict')
+        for key in sorted(value, key=str):
+            _update(digest, str(key))
+            _update(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'list')
+        for item in value:
+            _update(digest, item)
+    else:
+        digest.update(repr(value).encode())
+
+
+# Hash of stage inputs: DataFrames/Series are hashed by content, everything else by value
+def fingerprint(*inputs, **params):
+    digest = hashlib.sha256(f'v{STORE_VERSION}'.encode())
+    for value in inputs:
+        _update(digest, value)
+    _update(digest, params)
+    return digest.hexdigest()
+
+
+class ResultStore:
+    # One pickle file per key. Reading an entry refreshes its modification time,
+    # which is what eviction uses to find the least recently used entries.
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or os.environ.get('AI_PERSONALISATION_CACHE', DEFAULT_DIRECTORY)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    # Stored value for the key, or `default` when it is missing or unreadable. An
+    # entry pickled by an older version of the code can refer to classes or modules
+    # that no longer exist; it is treated as a miss and overwritten on the next put.
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as handle:
+                value = pickle.load(handle)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError, ValueError):
+            self.misses += 1
+            return default
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    # Store a value; the file is written to a temporary name first so readers never see partial entries
+    def put(self, key, value):
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                pickle.dump(value, output, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        self.evict()
+        return value
+
+    # Return the stored result of a stage, computing and storing it on a miss.
+    # `inputs` are the data the stage reads and `params` its settings, e.g.
+    #     store.fetch('tam_ols', fit_tam, df[['Engagement_Level', 'Relevance_Score']], add_constant=True)
+    # calls fit_tam(df[[...]], add_constant=True) only when that data or setting changed.
+    def fetch(self, stage, compute, *inputs, **params):
+        key = fingerprint(stage, *inputs, **params)
+        marker = object()
+        value = self.get(key, marker)
+        if value is marker:
+            value = self.put(key, compute(*inputs, **params))
+        return value
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(SUFFIX):
+                    info = entry.stat()
+                    entries.append((info.st_mtime, info.st_size, entry.path))
+        return entries
+
+    # Total size of the stored entries in bytes
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    # Remove least recently used entries until the store fits in max_bytes
+    def evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            os.remove(path)
@@ -0,0 +1,275 @@
+# Tokenization and indexing of the free-text answers.
+# A column of answers is tokenized exactly once into flat token-ID arrays (the row
+# position of every token, its ID in the vocabulary, and the vocabulary itself)
+# and a CSR document-term matrix built from them. Theme counts, LDA, word-cloud
+# frequencies, keyword search, co-occurrence and sentiment all read from the same
+# cached object instead of re-tokenizing the answers.
+
+import re
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .lazy import lazy_import
+from .store import fingerprint
+
+sparse = lazy_import('scipy.sparse')
+
+# Words are runs of letters; apostrophes are dropped first so "don't" becomes "dont"
+TOKEN_PATTERN = r'[a-z]+'
+_APOSTROPHES = r"['’`]"
+
+# English stop words left out of theme counts, topics and co-occurrence (tokens keep them,
+# since negations matter for sentiment)
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing dont down during each even few for from further get got
+had has have having he her here hers herself him himself his how i if in into is it its itself just
+let me more most much my myself no nor not now of off on once only or other our ours ourselves out over
+own same she should so some such than that the their theirs them themselves then there these they this
+those through to too under until up us very was we were what when where which while who whom why will
+with would you your yours yourself yourselves im ive id youre dont doesnt didnt isnt cant wont
+""".split())
+
+# Document-term matrices kept in memory, keyed by the fingerprint of the answers
+CACHE_SIZE = 32
+_CACHE = OrderedDict()
+
+
+# (rows, token_ids, vocabulary) for a Series of answers. `rows` are positions in the
+# Series (0..len-1), tokens keep their order within each answer, and missing answers
+# have no tokens.
+def tokenize(texts):
+    lowered = texts.reset_index(drop=True).astype('string').str.lower().str.replace(_APOSTROPHES, '', regex=True)
+    tokens = lowered.str.findall(TOKEN_PATTERN).explode().dropna()
+    token_ids, vocabulary = pd.factorize(tokens.to_numpy(dtype='object'))
+    return tokens.index.to_numpy(dtype='int64'), token_ids.astype('int64'), np.asarray(vocabulary, dtype='object')
+
+
+class DocumentTermMatrix:
+    # Answers x vocabulary counts in CSR form, plus the token-ID arrays they were
+    # built from (kept for order-sensitive uses such as negation and phrases).
+
+    def __init__(self, texts, stop_words=STOP_WORDS):
+        self.index = texts.index
+        self.rows, self.token_ids, self.vocabulary = tokenize(texts)
+        self.matrix = sparse.csr_matrix((np.ones(len(self.token_ids)), (self.rows, self.token_ids)),
+                                        shape=(len(texts), len(self.vocabulary)))
+        self.matrix.sum_duplicates()
+        self.stop = np.isin(self.vocabulary, list(stop_words))
+        self._ids = None
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    # Vocabulary ID of a term, or -1 when it never occurs
+    def term_id(self, term):
+        if self._ids is None:
+            self._ids = {term: i for i, term in enumerate(self.vocabulary)}
+        return self._ids.get(term, -1)
+
+    # Total count of every term (stop words removed unless asked for), most frequent first
+    def frequencies(self, stop_words=False):
+        counts = np.asarray(self.matrix.sum(axis=0)).ravel()
+        keep = np.ones(len(counts), dtype=bool) if stop_words else ~self.stop
+        series = pd.Series(counts[keep], index=self.vocabulary[keep], name='count').astype('int64')
+        return series[series > 0].sort_values(ascending=False, kind='mergesort')
+
+    # Number of answers containing each term
+    def document_frequencies(self, stop_words=False):
+        counts = np.diff(self.matrix.tocsc().indptr)
+        keep = np.ones(len(counts), dtype=bool) if stop_words else ~self.stop
+        return pd.Series(counts[keep], index=self.vocabulary[keep], name='documents').sort_values(
+            ascending=False, kind='mergesort')
+
+    # Index labels of the answers containing any of the terms
+    def search(self, *terms):
+        ids = [i for i in (self.term_id(t.lower()) for t in terms) if i >= 0]
+        if not ids:
+            return self.index[:0]
+        rows = np.unique(self.matrix[:, ids].nonzero()[0])
+        return self.index[rows]
+
+    # Terms (stop words removed) with at least `min_count` occurrences, as a column
+    # subset of the matrix and the matching term labels; `max_features` keeps the most frequent
+    def features(self, max_features=None, min_count=1):
+        counts = np.asarray(self.matrix.sum(axis=0)).ravel()
+        ids = np.flatnonzero(~self.stop & (counts >= min_count))
+        ids = ids[np.argsort(-counts[ids], kind='mergesort')]
+        if max_features is not None:
+            ids = ids[:max_features]
+        return self.matrix[:, ids], self.vocabulary[ids]
+
+    # Number of answers in which each pair of the top terms appear together
+    def cooccurrence(self, top=30):
+        matrix, terms = self.features(max_features=top)
+        present = (matrix > 0).astype('int64')
+        counts = (present.T @ present).toarray()
+        return pd.DataFrame(counts, index=terms, columns=terms)
+
+
+# Cached document-term matrix of a column of answers. The key is the fingerprint of
+# the answers, so the column is tokenized once per dataset version; with a result
+# store the matrix is also kept on disk between runs.
+def document_term_matrix(texts, store=None):
+    key = fingerprint('document_term_matrix', texts)
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key]
+    if store is not None:
+        dtm = store.fetch('document_term_matrix', DocumentTermMatrix, texts)
+    else:
+        dtm = DocumentTermMatrix(texts)
+    _CACHE[key] = dtm
+    if len(_CACHE) > CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return dtm
+
+
+# Top words of each LDA topic, fitted on the cached document-term matrix
+def lda_topics(dtm, n_topics=4, n_words=10, max_features=500, seed=42):
+    from sklearn.decomposition import LatentDirichletAllocation
+
+    matrix, terms = dtm.features(max_features=max_features)
+    lda = LatentDirichletAllocation(n_components=n_topics, random_state=seed).fit(matrix)
+    return [[terms[i] for i in topic.argsort()[-n_words:]] for topic in lda.components_]
+
+
+# Occurrences are keyed as (document * MAX_POSITION + position) for phrase matching
+MAX_POSITION = 1 << 20
+
+_QUERY_TOKEN = r'"[^"]*"|\(|\)|[^\s()"]+'
+_OPERATORS = {'AND', 'OR', 'NOT'}
+
+
+class QueryError(ValueError):
+    pass
+
+
+class InvertedIndex:
+    # Term -> postings over the free-text columns. Every added row gets a row ID
+    # (0, 1, 2, ... in order of addition) and each (row, column) answer is a document.
+    # A posting list holds, for every occurrence, its document and its position in
+    # the answer; postings added later are kept as chunks and merged on first use,
+    # when the term's row IDs are also cached.
+    # Queries combine terms with AND, OR, NOT and parentheses ("privacy price" means
+    # privacy AND price), and "quoted phrases" match consecutive words in one answer.
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self._labels = []
+        self._n_rows = 0
+        self._chunks = {}
+        self._merged = {}
+        self._rows = {}
+
+    def __len__(self):
+        return self._n_rows
+
+    # Index the free-text columns of new rows; returns their row IDs
+    def add(self, df):
+        base = self._n_rows
+        n_columns = len(self.columns)
+        for c, column in enumerate(self.columns):
+            if column not in df.columns:
+                continue
+            dtm = document_term_matrix(df[column])
+            if len(dtm.token_ids) == 0:
+                continue
+            positions = np.arange(len(dtm.rows)) - np.searchsorted(dtm.rows, dtm.rows)
+            keys = ((base + dtm.rows) * n_columns + c) * MAX_POSITION + positions
+            order = np.argsort(dtm.token_ids, kind='stable')
+            bounds = np.flatnonzero(np.diff(dtm.token_ids[order])) + 1
+            for term_id, segment in zip(np.unique(dtm.token_ids), np.split(keys[order], bounds)):
+                term = dtm.vocabulary[term_id]
+                self._chunks.setdefault(term, []).append(segment)
+                self._merged.pop(term, None)
+                self._rows.pop(term, None)
+        self._labels.append(np.asarray(df.index))
+        self._n_rows += len(df)
+        return np.arange(base, self._n_rows)
+
+    @property
+    def labels(self):
+        if len(self._labels) > 1:
+            self._labels = [np.concatenate(self._labels)]
+        return self._labels[0] if self._labels else np.array([])
+
+    # Sorted occurrence keys of a term
+    def _postings(self, term):
+        if term not in self._merged:
+            chunks = self._chunks.get(term)
+            self._merged[term] = np.sort(np.concatenate(chunks)) if chunks else np.array([], dtype='int64')
+        return self._merged[term]
+
+    def _rows_of(self, keys):
+        return np.unique(keys // MAX_POSITION // len(self.columns))
+
+    # Row IDs of answers containing the words consecutively
+    def phrase_rows(self, words):
+        keys = self._postings(words[0])
+        for offset, word in enumerate(words[1:], start=1):
+            keys = np.intersect1d(keys, self._postings(word) - offset, assume_unique=True)
+        return self._rows_of(keys)
+
+    def term_rows(self, term):
+        if term not in self._rows:
+            self._rows[term] = self._rows_of(self._postings(term))
+        return self._rows[term]
+
+    # Row IDs matching a boolean query
+    def rows(self, query):
+        tokens = re.findall(_QUERY_TOKEN, query)
+        if not tokens:
+            raise QueryError('Empty query')
+        result, position = self._parse_or(tokens, 0)
+        if position != len(tokens):
+            raise QueryError(f'Unexpected {tokens[position]!r} in query')
+        return result
+
+    # Index labels (of the DataFrames that were added) of the rows matching a query
+    def search(self, query):
+        return self.labels[self.rows(query)]
+
+    def _parse_or(self, tokens, position):
+        result, position = self._parse_and(tokens, position)
+        while position < len(tokens) and tokens[position] == 'OR':
+            right, position = self._parse_and(tokens, position + 1)
+            result = np.union1d(result, right)
+        return result, position
+
+    def _parse_and(self, tokens, position):
+        result, position = self._parse_not(tokens, position)
+        while position < len(tokens) and tokens[position] not in ('OR', ')'):
+            if tokens[position] == 'AND':
+                position += 1
+            right, position = self._parse_not(tokens, position)
+            result = np.intersect1d(result, right, assume_unique=True)
+        return result, position
+
+    def _parse_not(self, tokens, position):
+        if position >= len(tokens):
+            raise QueryError('Query ends with an operator')
+        token = tokens[position]
+        if token == 'NOT':
+            operand, position = self._parse_not(tokens, position + 1)
+            return np.setdiff1d(np.arange(self._n_rows), operand, assume_unique=True), position
+        if token == '(':
+            result, position = self._parse_or(tokens, position + 1)
+            if position >= len(tokens) or tokens[position] != ')':
+                raise QueryError('Unbalanced parentheses in query')
+            return result, position + 1
+        if token == ')' or token in _OPERATORS:
+            raise QueryError(f'Unexpected {token!r} in query')
+        words = _query_words(token.strip('"'))
+        if not words:
+            return np.array([], dtype='int64'), position + 1
+        if len(words) == 1:
+            return self.term_rows(words[0]), position + 1
+        return self.phrase_rows(words), position + 1
+
+
+# Query words normalized the same way as the indexed answers
+def _query_words(text):
+    return re.findall(TOKEN_PATTERN, re.sub(_APOSTROPHES, '', text.lower()))
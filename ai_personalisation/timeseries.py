@@ -0,0 +1,123 @@
+# Time-bucketed monitoring of responses during live data collection.
+# Responses are aggregated per hour, day and week from 'Start time', and rolling
+# means of the core levels are kept up to date as new batches arrive.
+
+import numpy as np
+import pandas as pd
+
+from . import codebook
+from .loading import WEEKDAYS, parse_start_time
+
+# Bucket name -> pandas period frequency
+BUCKETS = {'hour': 'h', 'day': 'D', 'week': 'W'}
+
+# Levels tracked by default (encoded with encoding.encode_levels)
+MONITORED_LEVELS = ['Satisfaction_Level', 'Engagement_Level', 'Trust_Level']
+
+
+class CollectionMonitor:
+    # Per-bucket running sums and counts are stored instead of raw rows, so a new
+    # batch (including late submissions that land in old buckets) is merged with a
+    # single groupby over the batch. Rolling means are cached per bucket and only the
+    # buckets at or after the earliest changed one are recomputed.
+
+    def __init__(self, levels=None, window=3, buckets=None):
+        self.levels = list(levels or MONITORED_LEVELS)
+        self.window = window
+        self.buckets = list(buckets or BUCKETS)
+        for bucket in self.buckets:
+            if bucket not in BUCKETS:
+                raise ValueError(f"Unknown bucket '{bucket}', expected one of {list(BUCKETS)}")
+        self._totals = {}
+        self._rolling = {}
+        self._dirty = {}
+
+    # Merge a batch of encoded responses into the running totals
+    def update(self, df):
+        times = parse_start_time(df[codebook.START_TIME])
+        valid = times.notna().to_numpy()
+        if not valid.any():
+            return self
+        times = times[valid]
+        values = df.loc[valid, self.levels]
+
+        # Sums and non-missing counts per level, plus one response per row
+        frame = pd.concat([
+            values.fillna(0).add_suffix('_sum'),
+            values.notna().astype('int64').add_suffix('_n'),
+        ], axis=1)
+        frame['responses'] = 1
+
+        for bucket in self.buckets:
+            keys = times.dt.to_period(BUCKETS[bucket])
+            batch = frame.groupby(keys.to_numpy()).sum()
+            totals = self._totals.get(bucket)
+            totals = batch if totals is None else totals.add(batch, fill_value=0)
+
+            # Keep a contiguous index so empty buckets show up as zero responses
+            full_range = pd.period_range(totals.index.min(), totals.index.max(), freq=BUCKETS[bucket])
+            self._totals[bucket] = totals.reindex(full_range, fill_value=0)
+
+            earliest = batch.index.min()
+            dirty = self._dirty.get(bucket)
+            self._dirty[bucket] = earliest if dirty is None else min(dirty, earliest)
+        return self
+
+    def _get_totals(self, bucket):
+        if bucket not in self._totals:
+            raise KeyError(f"No responses collected for bucket '{bucket}'")
+        return self._totals[bucket]
+
+    # Number of responses per bucket
+    def counts(self, bucket='day'):
+        return self._get_totals(bucket)['responses'].astype('int64').rename('Responses')
+
+    # Mean of each level within each bucket (NaN for empty buckets)
+    def means(self, bucket='day'):
+        totals = self._get_totals(bucket)
+        return self._ratio(totals[[f'{l}_sum' for l in self.levels]], totals[[f'{l}_n' for l in self.levels]])
+
+    def _ratio(self, sums, counts):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = sums.to_numpy() / counts.to_numpy().astype('float64')
+        result[counts.to_numpy() == 0] = np.nan
+        return pd.DataFrame(result, index=sums.index, columns=self.levels)
+
+    # Rolling mean of each level over the last `window` buckets, weighted by responses
+    def rolling(self, bucket='day'):
+        totals = self._get_totals(bucket)
+        cached = self._rolling.get(bucket)
+        dirty = self._dirty.get(bucket)
+        if cached is not None and dirty is None:
+            return cached
+
+        if cached is None or dirty <= totals.index[0]:
+            start = 0
+            keep = None
+        else:
+            # Only buckets from the earliest change onwards can differ from the cache
+            start = totals.index.get_loc(dirty)
+            keep = cached.loc[cached.index < dirty]
+
+        lookback = max(start - self.window + 1, 0)
+        window_totals = totals.iloc[lookback:].rolling(self.window, min_periods=1).sum().iloc[start - lookback:]
+        fresh = self._ratio(window_totals[[f'{l}_sum' for l in self.levels]],
+                            window_totals[[f'{l}_n' for l in self.levels]])
+        result = fresh if keep is None else pd.concat([keep, fresh])
+
+        self._rolling[bucket] = result
+        self._dirty[bucket] = None
+        return result
+
+    # Rolling means relative to the overall mean of everything collected so far
+    def drift(self, bucket='day'):
+        totals = self._get_totals(bucket)
+        overall = totals[[f'{l}_sum' for l in self.levels]].sum().to_numpy() / \
+            totals[[f'{l}_n' for l in self.levels]].sum().to_numpy()
+        return self.rolling(bucket) - overall
+
+    # Response counts by day of week, as in the collection-trend countplot
+    def weekday_counts(self):
+        counts = self.counts('day')
+        by_weekday = counts.groupby(counts.index.dayofweek).sum()
+        return pd.Series(by_weekday.reindex(range(7), fill_value=0).to_numpy(), index=WEEKDAYS, name='Responses')
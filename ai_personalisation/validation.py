@@ -0,0 +1,170 @@
+# Schema validation of a loaded survey.
+# The codebook mappings are plain dictionaries, so an answer spelled differently
+# from its key (a non-breaking space, a curly quote, "Very Satisfied") silently
+# maps to NaN and the respondent drops out of every later statistic. Answers are
+# therefore normalized once at ingestion (load_survey and clean_survey call
+# normalize_survey): Unicode NFKC, straight quotes, runs of whitespace collapsed,
+# and, for questions with known options, the codebook spelling of an answer that
+# only differs in case. validate_survey() then reports what still doesn't match
+# the codebook, with counts, before the expensive analyses run:
+#
+#     df = load_survey('export.xlsx')
+#     problems = validate_survey(df)        # or validate_survey(df, strict=True)
+#
+# Both work on the distinct answers of each column (factorized codes are broadcast
+# back), so the cost is one pass over the rows per column.
+
+import numpy as np
+import pandas as pd
+
+from . import codebook
+from .schema import MULTI, QUESTIONS, RANKING, TEXT
+
+# Typographic quotes replaced by their ASCII forms
+QUOTES = str.maketrans({'‘': "'", '’': "'", '‚': "'", '“': '"', '”': '"', '„': '"'})
+
+# Separator of multiple-answer and ranking items
+SEPARATOR = ';'
+
+# Unknown answers listed per column in the SchemaError message
+MESSAGE_LIMIT = 5
+
+
+class SchemaError(ValueError):
+
+    def __init__(self, problems):
+        self.problems = problems
+        lines = []
+        for question, group in problems.groupby('question', sort=False):
+            values = [f'{value!r} ({count})' for value, count in zip(group['value'], group['count'])]
+            more = f', ... {len(values) - MESSAGE_LIMIT} more' if len(values) > MESSAGE_LIMIT else ''
+            lines.append(f'{question}: {group["issue"].iloc[0]} {", ".join(values[:MESSAGE_LIMIT])}{more}')
+        super().__init__('survey does not match the codebook:\n  ' + '\n  '.join(lines))
+
+
+# Categorical questions: every question with a closed answer list
+def _categorical():
+    return [question for question in QUESTIONS.values() if question.kind != TEXT]
+
+
+def _normalize_strings(values):
+    values = pd.Series(values, dtype='string')
+    values = values.str.normalize('NFKC').str.translate(QUOTES)
+    values = values.str.replace(r'\s+', ' ', regex=True).str.strip()
+    return values.mask(values == '')
+
+
+# Normalized distinct answers, mapped to the option spelling where they only differ in case
+def _canonical(uniques, options=None):
+    normalized = _normalize_strings(uniques)
+    if options:
+        spelling = {option.casefold(): option for option in _normalize_strings(list(options)).dropna()}
+        folded = normalized.str.casefold()
+        normalized = folded.map(spelling).fillna(normalized).astype('string')
+    return normalized
+
+
+# Normalized distinct ';'-separated answers: every item normalized on its own and
+# joined back, keeping the trailing ';' only on answers that had one
+def _canonical_items(uniques, options=None):
+    answers = pd.Series(uniques, dtype='string')
+    items = answers.str.split(SEPARATOR).explode()
+    items = _canonical(items.to_numpy(), options).set_axis(items.index).dropna()
+    joined = items.groupby(level=0).agg(SEPARATOR.join).reindex(range(len(uniques))).astype('string')
+    trailing = answers.str.rstrip().str.endswith(SEPARATOR).fillna(False).to_numpy(dtype=bool)
+    return joined.mask(trailing & joined.notna(), joined + SEPARATOR)
+
+
+# A column of answers normalized (see the header comment). Only distinct values are
+# normalized; the result is broadcast back with the factorized codes.
+def normalize_answers(values, options=None, items=False):
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    normalized = (_canonical_items if items else _canonical)(uniques, options).to_numpy(dtype=object, na_value=None)
+    result = np.full(len(codes), None, dtype=object)
+    present = codes >= 0
+    result[present] = normalized[codes[present]]
+    return pd.Series(result, index=values.index, name=values.name)
+
+
+# Options accepted for a question, normalized like the answers: the codebook options,
+# plus the labels gender_mapping harmonises them to (clean_survey replaces 'Man' by 'Male')
+def accepted_answers(question):
+    if question.options is None:
+        return None
+    options = list(question.options)
+    if question.id == codebook.GENDER:
+        options += list(codebook.gender_mapping.values())
+    return set(_normalize_strings(options).dropna())
+
+
+# The survey with the answers to every categorical question normalized.
+# Normalizing an already normalized survey leaves it unchanged.
+def normalize_survey(df):
+    questions = [question for question in _categorical() if question.id in df.columns]
+    if not questions:
+        return df
+    df = df.copy()
+    for question in questions:
+        if pd.api.types.is_object_dtype(df[question.id]) or pd.api.types.is_string_dtype(df[question.id]):
+            df[question.id] = normalize_answers(df[question.id], accepted_answers(question),
+                                                items=question.kind in (MULTI, RANKING))
+    return df
+
+
+# Answers (or ';'-separated items) outside the codebook options of each question, as
+# rows of question, kind, issue, value and count, most frequent first. The issue is
+# 'unknown answer', or 'write-in answer' for questions with an "Other" option; a
+# categorical question without codebook options is reported once as 'no codebook
+# options' (count: answered rows), since none of its answers can be checked.
+def unknown_answers(df):
+    rows = []
+    for question in _categorical():
+        if question.id not in df.columns:
+            continue
+        answers = df[question.id].dropna().astype('string')
+        accepted = accepted_answers(question)
+        if accepted is None:
+            rows.append((question.id, question.kind, 'no codebook options', None, len(answers)))
+            continue
+        if question.kind in (MULTI, RANKING):
+            answers = answers.str.split(SEPARATOR).explode().str.strip()
+            answers = answers[answers.fillna('') != '']
+        counts = answers.value_counts()
+        counts = counts[~counts.index.isin(list(accepted))]
+        issue = 'write-in answer' if question.write_in else 'unknown answer'
+        rows.extend((question.id, question.kind, issue, value, int(count)) for value, count in counts.items())
+    return pd.DataFrame(rows, columns=['question', 'kind', 'issue', 'value', 'count'])
+
+
+# Problems of a loaded survey, one row per issue:
+#   'missing column'       a questionnaire column absent from the export (count: rows)
+#   'unknown answer'       an answer with no codebook entry (value and count)
+#   'no codebook options'  a categorical question whose answers can't be checked
+#   'write-in answer'      an "Other" answer in the respondent's own wording
+#   'unparsed time'        start times missing or not parsed (count)
+# With strict=True a SchemaError listing them is raised instead of returning a
+# non-empty report; write-in answers are reported but never fail validation.
+def validate_survey(df, strict=False):
+    missing = [question for question in codebook.QUESTION_COLUMNS if question not in df.columns]
+    parts = [pd.DataFrame({'question': missing, 'issue': 'missing column', 'value': None, 'count': len(df)})]
+
+    unknown = unknown_answers(df)
+    parts.append(unknown.drop(columns='kind'))
+
+    if codebook.START_TIME in df.columns and pd.api.types.is_datetime64_any_dtype(df[codebook.START_TIME]):
+        unparsed = int(df[codebook.START_TIME].isna().sum())
+        if unparsed:
+            parts.append(pd.DataFrame({'question': [codebook.START_TIME], 'issue': 'unparsed time',
+                                       'value': None, 'count': unparsed}))
+
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        problems = pd.DataFrame(columns=['question', 'issue', 'value', 'count'])
+    else:
+        problems = pd.concat(parts, ignore_index=True)[['question', 'issue', 'value', 'count']]
+        problems['count'] = problems['count'].astype('int64')
+    if strict and (problems['issue'] != 'write-in answer').any():
+        raise SchemaError(problems[problems['issue'] != 'write-in answer'])
+    return problems
@@ -0,0 +1,113 @@
+# Columnar warehouse of the derived scores.
+# The encoded columns (levels, ranking scores and segments) are written to a
+# Parquet dataset partitioned by wave and collection date, one row per respondent,
+#     <root>/wave=2024Q2/date=2024-06-03/part-0.parquet
+# so dashboards and other consumers can read them with partition pruning and
+# predicate pushdown (pyarrow, DuckDB, Spark ...) instead of re-running the analysis.
+
+import os
+import shutil
+
+import pandas as pd
+
+from . import codebook
+from .lazy import lazy_import
+
+pa = lazy_import('pyarrow')
+ds = lazy_import('pyarrow.dataset')
+
+RESPONDENT = 'Respondent'
+WAVE = 'wave'
+DATE = 'date'
+
+# Response number column of the Forms export, used as the respondent key when present
+ID_COLUMN = 'ID'
+
+SEGMENT_COLUMNS = ['Economic_Segment', 'Infrastructure_Limitation', 'Fairness_Perception']
+
+# Derived columns written to the warehouse, as created by encoding.encode_survey
+DERIVED_COLUMNS = list(codebook.ORDINAL_LEVELS) + list(codebook.RANKINGS) + SEGMENT_COLUMNS
+
+
+# Stable respondent keys: the export's ID column when present, otherwise a hash of the
+# start time and every answer, so re-encoding the same export gives the same keys
+def respondent_keys(df):
+    if ID_COLUMN in df.columns and pd.api.types.is_integer_dtype(df[ID_COLUMN]):
+        return df[ID_COLUMN].astype('int64').rename(RESPONDENT)
+    columns = [c for c in [codebook.START_TIME] + codebook.QUESTION_COLUMNS if c in df.columns]
+    keys = pd.util.hash_pandas_object(df[columns], index=False).astype('int64')
+    return keys.rename(RESPONDENT)
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([(WAVE, pa.string()), (DATE, pa.date32())]), flavor='hive')
+
+
+class ScoreWarehouse:
+
+    def __init__(self, root):
+        self.root = root
+
+    def _wave_directory(self, wave):
+        return os.path.join(self.root, f'{WAVE}={wave}')
+
+    # Rows of the derived scores for an encoded survey, keyed by respondent
+    @staticmethod
+    def scores(df, wave):
+        columns = [c for c in DERIVED_COLUMNS if c in df.columns]
+        frame = df[columns].copy()
+        frame.insert(0, RESPONDENT, respondent_keys(df).to_numpy())
+        if codebook.START_TIME in df.columns:
+            start = pd.to_datetime(df[codebook.START_TIME])
+            frame.insert(1, codebook.START_TIME, start.to_numpy())
+            frame[DATE] = start.dt.date.to_numpy()
+        else:
+            frame[DATE] = None
+        frame[WAVE] = str(wave)
+        return frame.reset_index(drop=True)
+
+    # Write (or replace) one wave. Existing partitions of the wave are removed first,
+    # so rewriting a wave never leaves stale respondents behind.
+    def write(self, df, wave):
+        frame = self.scores(df, wave)
+        duplicated = frame[RESPONDENT].duplicated()
+        if duplicated.any():
+            raise ValueError(f'{int(duplicated.sum())} duplicate respondent keys in wave {wave!r}')
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.set_column(table.schema.get_field_index(DATE), DATE, table.column(DATE).cast(pa.date32()))
+        shutil.rmtree(self._wave_directory(wave), ignore_errors=True)
+        ds.write_dataset(table, self.root, format='parquet', partitioning=_partitioning(),
+                         basename_template='part-{i}.parquet', existing_data_behavior='overwrite_or_ignore')
+        return len(frame)
+
+    # Waves currently in the warehouse
+    def waves(self):
+        if not os.path.isdir(self.root):
+            return []
+        prefix = f'{WAVE}='
+        return sorted(name[len(prefix):] for name in os.listdir(self.root) if name.startswith(prefix))
+
+    def dataset(self):
+        return ds.dataset(self.root, format='parquet', partitioning=_partitioning())
+
+    # Read scores as a DataFrame. Wave and date bounds prune partitions; `where` is any
+    # further pyarrow expression, e.g. ds.field('Satisfaction_Level') >= 4, and is
+    # pushed down to the Parquet row groups.
+    def read(self, columns=None, waves=None, start=None, end=None, where=None):
+        expression = None
+        conditions = []
+        if waves is not None:
+            conditions.append(ds.field(WAVE).isin([str(w) for w in waves]))
+        if start is not None:
+            conditions.append(ds.field(DATE) >= pd.Timestamp(start).date())
+        if end is not None:
+            conditions.append(ds.field(DATE) <= pd.Timestamp(end).date())
+        if where is not None:
+            conditions.append(where)
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return self.dataset().to_table(columns=columns, filter=expression).to_pandas()
+
+    # Remove a wave from the warehouse
+    def drop(self, wave):
+        shutil.rmtree(self._wave_directory(wave), ignore_errors=True)
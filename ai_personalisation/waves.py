@@ -0,0 +1,177 @@
+# Comparison of several survey datasets (quarterly waves, or the same instrument
+# fielded in other cities) that share the codebook.
+# Column headers are aligned to the codebook questions first, since the question
+# text names the city ("... the cultural realities of living in Lagos?"). Exports
+# are read and cleaned in parallel worker processes; encoding then goes through one
+# cached encoder shared by all waves, so ranking answers seen in an earlier wave
+# are not parsed again. Every chart distribution and hypothesis test is computed
+# per wave, together with the differences between waves.
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+from . import codebook
+from .effect_sizes import cohens_d, cramers_v
+from .encoding import encode_levels, encode_segments, ranking_matrix, ranking_score
+from .lazy import lazy_import
+from .loading import clean_survey, load_survey
+from .results import ResultsRegistry
+from .segments import OUTCOMES, SegmentCube
+
+stats = lazy_import('scipy.stats')
+
+WAVE = 'Wave'
+
+# Minimum similarity for a column header to be matched to a codebook question
+ALIGNMENT_CUTOFF = 0.8
+
+
+# Rename columns whose header differs from a codebook question text only in detail
+# (city name, punctuation) to the question ID. Each question is matched at most
+# once, best matches first.
+def align_columns(df, questions=None, cutoff=ALIGNMENT_CUTOFF):
+    questions = [q for q in (questions or codebook.QUESTION_COLUMNS) if q not in df.columns]
+    columns = [c for c in df.columns if isinstance(c, str) and c not in codebook.QUESTION_COLUMNS]
+    candidates = []
+    for question in questions:
+        text = codebook.QUESTION_TEXTS[question]
+        for column in columns:
+            ratio = SequenceMatcher(None, text, column).ratio()
+            if ratio >= cutoff:
+                candidates.append((ratio, question, column))
+    renames = {}
+    for _, question, column in sorted(candidates, reverse=True):
+        if question not in renames.values() and column not in renames:
+            renames[column] = question
+    return df.rename(columns=renames)
+
+
+def _load_clean(path):
+    return clean_survey(align_columns(load_survey(path)))
+
+
+class CachedEncoder:
+    # encoding.encode_survey with the ranking scores memoized per distinct answer.
+    # Parsing the ';'-separated rankings is the expensive part of encoding, and the
+    # same few hundred orderings recur in every wave.
+
+    def __init__(self):
+        self._scores = {name: {} for name in codebook.RANKINGS}
+
+    def _ranking_scores(self, name, responses):
+        _, labels = codebook.RANKINGS[name]
+        cache = self._scores[name]
+        codes, uniques = pd.factorize(responses)
+        missing = [answer for answer in uniques if answer not in cache]
+        if missing:
+            scores = ranking_score(ranking_matrix(pd.Series(missing, dtype='object'), labels))
+            cache.update(zip(missing, scores.to_numpy()))
+        values = np.array([cache[answer] for answer in uniques] + [np.nan], dtype='float64')
+        return pd.Series(values[codes], index=responses.index)
+
+    def encode(self, df):
+        scores = {name: self._ranking_scores(name, df[question])
+                  for name, (question, _) in codebook.RANKINGS.items() if question in df.columns}
+        derived = pd.concat([encode_levels(df), pd.DataFrame(scores, index=df.index), encode_segments(df)], axis=1)
+        df = df.drop(columns=[c for c in derived.columns if c in df.columns])
+        return pd.concat([df, derived], axis=1)
+
+
+# Load, clean, align and encode several exports. `sources` maps wave names to paths
+# (a list of paths is named by file name). Files are read in parallel processes.
+def load_waves(sources, n_jobs=None, encoder=None):
+    if not isinstance(sources, dict):
+        sources = {os.path.splitext(os.path.basename(path))[0]: path for path in sources}
+    encoder = encoder or CachedEncoder()
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(sources))
+    if n_jobs == 1:
+        frames = list(map(_load_clean, sources.values()))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            frames = list(pool.map(_load_clean, sources.values()))
+    return {name: encoder.encode(frame) for name, frame in zip(sources, frames)}
+
+
+class WaveComparison:
+    # All waves are stacked into one frame with a Wave column, so per-wave summaries
+    # are one segment cube over that dimension rather than one groupby per wave.
+
+    def __init__(self, waves, outcomes=None):
+        self.waves = list(waves)
+        frames = [frame.assign(**{WAVE: name}) for name, frame in waves.items()]
+        self.combined = pd.concat(frames, ignore_index=True)
+        self.combined[WAVE] = pd.Categorical(self.combined[WAVE], categories=self.waves, ordered=True)
+        self.outcomes = [o for o in (outcomes or OUTCOMES) if o in self.combined.columns]
+        self._frames = waves
+        self._cube = None
+        self._tests = {}
+
+    @property
+    def cube(self):
+        if self._cube is None:
+            self._cube = SegmentCube(self.combined, dimensions={WAVE: WAVE}, outcomes=self.outcomes)
+        return self._cube
+
+    # Respondents, mean and standard deviation of every outcome in every wave
+    def summary(self):
+        tables = {stat: self.cube.table(WAVE, stat=stat).reindex(self.waves) for stat in ['n', 'mean', 'std']}
+        return pd.concat({stat: table.stack() for stat, table in tables.items()}, axis=1).rename_axis([WAVE, 'outcome'])
+
+    # Share of each answer to a question in every wave (the per-wave version of a notebook chart)
+    def distribution(self, column, normalize=True):
+        table = pd.crosstab(self.combined[WAVE], self.combined[column], normalize='index' if normalize else False)
+        return table.reindex(self.waves)
+
+    # Difference of every outcome mean from a reference wave (the first by default),
+    # with Welch's t-test and Cohen's d
+    def differences(self, reference=None):
+        reference = reference if reference is not None else self.waves[0]
+        n = self.cube.table(WAVE, stat='n').reindex(self.waves).to_numpy(dtype='float64')
+        mean = self.cube.table(WAVE, stat='mean').reindex(self.waves).to_numpy()
+        var = self.cube.table(WAVE, stat='std').reindex(self.waves).to_numpy() ** 2
+        r = self.waves.index(reference)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            se2 = var / n + var[r] / n[r]
+            t = (mean - mean[r]) / np.sqrt(se2)
+            dof = se2 ** 2 / ((var / n) ** 2 / (n - 1) + (var[r] / n[r]) ** 2 / (n[r] - 1))
+            d = cohens_d(n, mean, var, n[r], mean[r], var[r])
+        p = 2 * stats.t.sf(np.abs(t), dof)
+        others = [i for i in range(len(self.waves)) if i != r]
+        index = pd.MultiIndex.from_product([[self.waves[i] for i in others], self.outcomes], names=[WAVE, 'outcome'])
+        return pd.DataFrame({
+            'difference': (mean - mean[r])[others].ravel(), 't_value': t[others].ravel(),
+            'df': dof[others].ravel(), 'p_value': p[others].ravel(), 'cohens_d': d[others].ravel(),
+        }, index=index).assign(reference=reference)
+
+    # Chi-square test of whether the answer distribution of each question differs between waves
+    def distribution_tests(self, columns=None):
+        columns = [c for c in (columns or codebook.QUESTION_COLUMNS) if c in self.combined.columns
+                   and c not in codebook.TEXT_COLUMNS and c not in (codebook.CHALLENGES, codebook.RELEVANCE_RANKING,
+                                                                    codebook.IMPROVEMENT_RANKING)]
+        rows = []
+        for column in columns:
+            table = pd.crosstab(self.combined[WAVE], self.combined[column])
+            if table.shape[0] < 2 or table.shape[1] < 2:
+                continue
+            chi2, p, dof, _ = stats.chi2_contingency(table)
+            rows.append({'question': column, 'chi2': chi2, 'df': dof, 'p_value': p, 'cramers_v': cramers_v(table)})
+        return pd.DataFrame(rows).set_index('question')
+
+    # The hypothesis battery run in every wave, with corrections within each wave.
+    # Waves are tested on a thread pool; fits go through the result store when given.
+    def tests(self, store=None, n_jobs=None):
+        from .stages import corrected_results, hypothesis_tests
+
+        pending = [name for name in self.waves if name not in self._tests]
+        if pending:
+            with ThreadPoolExecutor(max_workers=n_jobs or os.cpu_count() or 1) as pool:
+                results = pool.map(lambda name: hypothesis_tests(self._frames[name], store)[0], pending)
+                self._tests.update(zip(pending, results))
+        registry = ResultsRegistry()
+        for name in self.waves:
+            registry.merge(self._tests[name], segment=name)
+        return corrected_results(registry, family='segment')
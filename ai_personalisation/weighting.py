@@ -0,0 +1,134 @@
+# Survey weighting by raking (iterative proportional fitting).
+# The Lagos sample over-represents 25-34 year olds and women, so respondent weights
+# are fitted to target margins for age, gender and income and the weighted
+# summaries below are used in place of the unweighted ones.
+
+import numpy as np
+import pandas as pd
+
+from .segments import DIMENSIONS
+
+
+class RakingError(RuntimeError):
+    pass
+
+
+# Resolve a target key to a column: either a segment dimension name or a column name
+def _column(key):
+    return DIMENSIONS.get(key, key)
+
+
+# Normalise a margin to proportions that sum to one
+def _shares(margin):
+    margin = pd.Series(margin, dtype='float64')
+    if (margin < 0).any() or margin.sum() <= 0:
+        raise ValueError('Target margins must be non-negative and not all zero')
+    return margin / margin.sum()
+
+
+class Raker:
+    # The integer codes of each respondent on every raking dimension are computed
+    # once per dataset, so each raking iteration is one np.bincount and one gather
+    # per dimension. Weights are cached per target set, which makes re-raking on a
+    # refresh with unchanged targets free.
+
+    def __init__(self, df, max_iter=100, tol=1e-6):
+        self.df = df
+        self.max_iter = max_iter
+        self.tol = tol
+        self._codes = {}
+        self._cache = {}
+
+    def _dimension_codes(self, column, levels):
+        key = (column, tuple(levels))
+        if key not in self._codes:
+            codes = pd.Index(list(levels)).get_indexer(self.df[column]).astype('int64')
+            self._codes[key] = codes
+        return self._codes[key]
+
+    # Raked weights (mean one) for targets like {'Gender': {'Male': 0.5, 'Female': 0.5}}.
+    # Respondents whose answer is missing or not in a margin are left out of that
+    # margin's adjustment.
+    def weights(self, targets):
+        cache_key = tuple(sorted((str(k), tuple(sorted(_shares(v).items()))) for k, v in targets.items()))
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+
+        margins = []
+        for key, margin in targets.items():
+            shares = _shares(margin)
+            codes = self._dimension_codes(_column(key), shares.index)
+            missing = [level for level, count in zip(shares.index, np.bincount(codes[codes >= 0], minlength=len(shares)))
+                       if count == 0 and shares[level] > 0]
+            if missing:
+                raise RakingError(f"No respondents in target level(s) {missing} of '{key}'")
+            margins.append((codes, shares.to_numpy()))
+
+        weights = np.ones(len(self.df))
+        for iteration in range(self.max_iter):
+            worst = 0.0
+            for codes, shares in margins:
+                covered = codes >= 0
+                totals = np.bincount(codes[covered], weights=weights[covered], minlength=len(shares))
+                target = shares * totals.sum()
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    factors = np.where(totals > 0, target / totals, 1.0)
+                weights[covered] *= factors[codes[covered]]
+                worst = max(worst, np.abs(totals / totals.sum() - shares).max())
+            if worst < self.tol:
+                break
+        else:
+            raise RakingError(f'Raking did not converge in {self.max_iter} iterations (max deviation {worst:.2e})')
+
+        result = pd.Series(weights * len(weights) / weights.sum(), index=self.df.index, name='Weight')
+        self._cache[cache_key] = result
+        return result
+
+
+# Weighted counterpart of Series.value_counts
+def weighted_value_counts(series, weights, normalize=False):
+    counts = pd.Series(np.asarray(weights, dtype='float64'), index=series.index).groupby(series).sum()
+    counts = counts.sort_values(ascending=False)
+    return counts / counts.sum() if normalize else counts
+
+
+# Weighted mean of each column, ignoring missing values
+def weighted_mean(df, weights):
+    values = df.to_numpy(dtype='float64')
+    present = ~np.isnan(values)
+    w = np.asarray(weights, dtype='float64')[:, None] * present
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = (np.where(present, values, 0.0) * w).sum(axis=0) / w.sum(axis=0)
+    return pd.Series(means, index=df.columns)
+
+
+# Weighted Pearson correlation matrix with pairwise deletion, like DataFrame.corr.
+# All pairwise sums come from a handful of matrix products.
+def weighted_corr(df, weights):
+    values = df.to_numpy(dtype='float64')
+    present = (~np.isnan(values)).astype('float64')
+    x = np.where(present > 0, values, 0.0)
+    w = np.asarray(weights, dtype='float64')[:, None]
+
+    total = (w * present).T @ present          # weight where both columns are present
+    sum_x = (w * x).T @ present                # sum of column i where column j is present
+    sum_xx = (w * x * x).T @ present
+    sum_xy = (w * x).T @ x
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_i = sum_x / total
+        mean_j = sum_x.T / total
+        var_i = sum_xx / total - mean_i ** 2
+        var_j = sum_xx.T / total - mean_j ** 2
+        cov = sum_xy / total - mean_i * mean_j
+        corr = cov / np.sqrt(var_i * var_j)
+    return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=df.columns, columns=df.columns)
+
+
+# Weighted least squares fit of y on the given predictors (with intercept), dropping
+# incomplete rows as the notebook does before each regression
+def weighted_ols(df, y, X, weights):
+    import statsmodels.api as sm
+
+    weights = pd.Series(np.asarray(weights, dtype='float64'), index=df.index)
+    data = df[[y] + list(X)].dropna()
+    return sm.WLS(data[y], sm.add_constant(data[list(X)]), weights=weights.loc[data.index]).fit()
@@ -0,0 +1,39 @@
+# Shared fixtures: a synthetic raw survey export in the shape of the Forms export
+# (short question IDs, codebook answer options), for tests that need whole surveys.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_personalisation import codebook
+
+
+def make_survey(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {codebook.START_TIME: (pd.Timestamp('2024-06-03')
+                                  + pd.to_timedelta(rng.integers(0, 14 * 24 * 3600, n), unit='s')
+                                  ).strftime('%m/%d/%y %H:%M:%S')}
+    data[codebook.INCOME] = rng.choice(list(codebook.income_mapping), n)
+    data[codebook.SHOPPING_FREQUENCY] = rng.choice(list(codebook.shopping_mapping), n)
+    for question, mapping in codebook.ORDINAL_LEVELS.values():
+        if question not in data:
+            data[question] = rng.choice(list(mapping), n)
+    for question, options in codebook.ANSWER_OPTIONS.items():
+        if question == codebook.CHALLENGES:
+            data[question] = [';'.join(rng.choice(options[:4], rng.integers(1, 3), replace=False)) + ';'
+                              for _ in range(n)]
+        else:
+            data[question] = rng.choice(options, n)
+    data[codebook.RELEVANCE_RANKING] = [';'.join(rng.permutation(codebook.relevance_labels)) + ';' for _ in range(n)]
+    data[codebook.IMPROVEMENT_RANKING] = [';'.join(rng.permutation(codebook.improvement_labels)) + ';'
+                                          for _ in range(n)]
+    words = ('price privacy repetitive good bad cheap expensive love hate slow fast data trust '
+             'recommendations better more relevant products delivery discount').split()
+    for question in codebook.TEXT_COLUMNS:
+        data[question] = [' '.join(rng.choice(words, rng.integers(3, 15))) for _ in range(n)]
+    return pd.DataFrame(data)[[codebook.START_TIME] + codebook.QUESTION_COLUMNS]
+
+
+@pytest.fixture
+def survey():
+    return make_survey()
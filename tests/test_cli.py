@@ -0,0 +1,77 @@
+import pytest
+
+from ai_personalisation import schema, stages
+from ai_personalisation.cli import main
+from ai_personalisation.segments import DIMENSIONS
+
+
+@pytest.fixture
+def export(survey, tmp_path):
+    path = tmp_path / 'export.csv'
+    schema.original_columns(survey).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+# Replaces the eda and text stages: eda always fails and text records that it ran
+@pytest.fixture
+def failing_eda(monkeypatch, calls):
+    def fail(df, output, store=None):
+        raise RuntimeError('stage failed')
+
+    def record(df, output, store=None):
+        calls.append(output.directory)
+
+    monkeypatch.setitem(stages.STAGES, 'eda', fail)
+    monkeypatch.setitem(stages.STAGES, 'text', record)
+
+
+def _run(export, out, *options):
+    return main(['run', '--input', str(export), '--no-cache', '--out', str(out), *options])
+
+
+def _segment_files():
+    return sorted(f'{kind}_by_{name.lower()}.csv' for name in DIMENSIONS for kind in ['outcomes', 'respondents'])
+
+
+def test_only_the_selected_stages_run(export, tmp_path, failing_eda, calls):
+    out = tmp_path / 'out'
+    assert _run(export, out, '--stages', 'segments') == 0
+    assert sorted(path.name for path in out.iterdir()) == _segment_files()
+    assert calls == []
+
+    with pytest.raises(SystemExit) as error:
+        _run(export, out, '--stages', 'segments,plots')
+    assert error.value.code == 2
+
+
+@pytest.mark.parametrize('name', ['missing.csv', 'export.txt'])
+def test_load_errors_exit_with_1(tmp_path, name, capsys):
+    path = tmp_path / name
+    if name.endswith('.txt'):
+        path.write_text('not a survey')
+    assert _run(path, tmp_path / 'out', '--stages', 'segments') == 1
+    assert 'error:' in capsys.readouterr().err
+    assert not (tmp_path / 'out').exists()
+
+
+def test_failing_stage_stops_the_run_unless_keep_going(export, tmp_path, failing_eda, calls, capsys):
+    out = tmp_path / 'stopped'
+    assert _run(export, out, '--stages', 'eda,segments,text') == 1
+    assert list(out.iterdir()) == [] and calls == []
+    assert 'failed stages: eda' in capsys.readouterr().err
+
+    out = tmp_path / 'kept_going'
+    assert _run(export, out, '--stages', 'eda,segments,text', '--keep-going') == 1
+    assert sorted(path.name for path in out.iterdir()) == _segment_files()
+    assert calls == [str(out)]
+
+
+def test_compare_names_must_match_the_inputs(export, tmp_path, capsys):
+    assert main(['compare', '--input', str(export), str(export), '--names', 'Lagos', '--no-cache',
+                 '--out', str(tmp_path / 'out')]) == 2
+    assert 'one name per --input file' in capsys.readouterr().err
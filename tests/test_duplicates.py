@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_personalisation import codebook
+from ai_personalisation.duplicates import (BANDS, ROWS, _permutations, _shingles, answer_differences,
+                                           drop_duplicate_responses, duplicate_flags, lsh_candidates,
+                                           minhash_signatures, near_duplicate_clusters, normalize_texts,
+                                           pair_similarity)
+
+
+@pytest.fixture
+def texts():
+    rng = np.random.default_rng(2)
+    words = 'the price of data privacy is too high and recommendations are repetitive or not relevant'.split()
+    base = [' '.join(rng.choice(words, 12)) for _ in range(40)]
+    # Variants of the first texts with one word changed, and unrelated texts
+    variants = []
+    for text in base[:20]:
+        tokens = text.split()
+        tokens[rng.integers(len(tokens))] = rng.choice(words)
+        variants.append(' '.join(tokens))
+    return base + variants
+
+
+def _jaccard(first, second, k=5):
+    a = {first[i:i + k] for i in range(len(first) - k + 1)}
+    b = {second[i:i + k] for i in range(len(second) - k + 1)}
+    return len(a & b) / len(a | b)
+
+
+def test_signatures_are_minima_of_permuted_shingle_hashes(texts):
+    signatures = minhash_signatures(texts, n_permutations=8, seed=5)
+    documents, hashes = _shingles(texts)
+    a, b = _permutations(8, 5)
+    for document in range(len(texts)):
+        mine = hashes[documents == document]
+        for j in range(8):
+            permuted = ((mine * a[j] + b[j]) >> np.uint64(32)).astype(np.uint32)
+            assert signatures[document, j] == permuted.min()
+
+
+def test_shingles_match_python_substrings(texts):
+    documents, hashes = _shingles(texts[:5])
+    for document, text in enumerate(texts[:5]):
+        distinct = {text[i:i + 5] for i in range(len(text) - 4)}
+        assert len(set(hashes[documents == document].tolist())) == len(distinct)
+        assert (documents == document).sum() == len(text) - 4
+
+
+def test_minhash_similarity_estimates_jaccard(texts):
+    signatures = minhash_signatures(texts, n_permutations=256)
+    pairs = np.array([(i, j) for i in range(len(texts)) for j in range(i + 1, len(texts))])
+    exact = np.array([_jaccard(texts[i], texts[j]) for i, j in pairs])
+    estimated = pair_similarity(signatures, pairs)
+    assert np.abs(estimated - exact).mean() < 0.02
+    assert np.abs(estimated - exact).max() < 0.12
+
+
+# Components of a graph with the given edges, as the smallest member of each node's component
+def _components(n, pairs):
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        first, second = find(int(i)), find(int(j))
+        parent[max(first, second)] = min(first, second)
+    return [find(i) for i in range(n)]
+
+
+def test_lsh_candidates_link_every_pair_sharing_a_band(texts):
+    signatures = minhash_signatures(texts)
+    candidates = lsh_candidates(signatures)
+    assert (candidates[:, 0] < candidates[:, 1]).all()
+
+    def shares_band(i, j):
+        bands = signatures[[i, j]].reshape(2, BANDS, ROWS)
+        return (bands[0] == bands[1]).all(axis=1).any()
+
+    assert all(shares_band(i, j) for i, j in candidates)
+    brute_force = [(i, j) for i in range(len(texts)) for j in range(i + 1, len(texts)) if shares_band(i, j)]
+    assert _components(len(texts), candidates) == _components(len(texts), brute_force)
+
+
+def test_near_duplicate_clusters_match_exact_jaccard(texts):
+    clusters = near_duplicate_clusters(texts, similarity=0.8)
+    normalized = normalize_texts(pd.Series(texts)).tolist()
+    similar = [(i, j) for i in range(len(texts)) for j in range(i + 1, len(texts))
+               if _jaccard(normalized[i], normalized[j]) >= 0.9]
+    for i, j in similar:
+        assert clusters[i] == clusters[j] >= 0
+    # No false clusters: every clustered text has a truly similar text in its cluster
+    for i in np.flatnonzero(clusters >= 0):
+        members = np.flatnonzero(clusters == clusters[i])
+        assert max(_jaccard(normalized[i], normalized[j]) for j in members if j != i) >= 0.65
+    assert (clusters[clusters >= 0] <= np.flatnonzero(clusters >= 0)).all()
+    assert (near_duplicate_clusters(['nil', 'nil', 'no comment']) == -1).all()
+
+
+def test_answer_differences_match_brute_force(survey):
+    positions = np.random.default_rng(0).integers(0, len(survey), len(survey))
+    closed = [c for c in codebook.QUESTION_COLUMNS if c not in codebook.TEXT_COLUMNS]
+    expected = [sum(survey[c].iloc[i] != survey[c].iloc[p] for c in closed) for i, p in enumerate(positions)]
+    assert answer_differences(survey, positions).tolist() == expected
+
+
+def test_copied_responses_need_matching_closed_answers(survey):
+    df = survey.copy()
+    text = codebook.TEXT_COLUMNS
+    df.loc[50] = df.loc[10]                                     # exact duplicate
+    df.loc[60, text] = df.loc[10, text].to_numpy()              # same text, different closed answers
+    df.loc[70] = df.loc[20]
+    df.loc[70, codebook.AGE] = '55+' if df.loc[20, codebook.AGE] != '55+' else '18-24'   # copy with one change
+    df.loc[70, codebook.DATA_CONCERNS] += ' really'
+
+    flags = duplicate_flags(df)
+    assert flags.index[flags['Exact_Duplicate']].tolist() == [50]
+    assert flags.index[flags['Near_Duplicate']].tolist() == [50, 60, 70]
+    assert flags.index[flags['Copied_Response']].tolist() == [50, 70]
+    assert flags.loc[70, 'Answer_Differences'] == 1
+    assert flags.loc[60, 'Answer_Differences'] > 2
+
+    kept, dropped = drop_duplicate_responses(df, flags)
+    assert dropped == 2 and 60 in kept.index
+    kept, dropped = drop_duplicate_responses(df, flags, text_only=True)
+    assert dropped == 3 and 60 not in kept.index
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from ai_personalisation.effect_sizes import BOOTSTRAP_BATCH, GroupEffects, cramers_v, cramers_v_interval, median_split
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(21)
+    n = 240
+    group = rng.choice(['A', 'B', 'C'], n)
+    shift = pd.Series(group).map({'A': 0.0, 'B': 0.5, 'C': 1.0}).to_numpy()
+    df = pd.DataFrame({
+        'group': group,
+        'likert': np.clip(np.round(3 + shift + rng.normal(size=n)), 1, 5),
+        'score': shift + rng.normal(size=n),
+    })
+    df.loc[rng.random(n) < 0.05, 'likert'] = np.nan
+    return df
+
+
+def _cliffs_delta(first, second):
+    differences = np.sign(first[:, None] - second[None, :])
+    return differences.mean()
+
+
+def _eta_squared(values, groups):
+    grand = values.mean()
+    between = sum(len(v) * (v.mean() - grand) ** 2 for v in (values[groups == g] for g in np.unique(groups)))
+    return between / ((values - grand) ** 2).sum()
+
+
+def test_compare_matches_raw_formulas(data):
+    effects = GroupEffects(data, 'group', ['likert', 'score']).compare('C', 'A')
+    for outcome in ['likert', 'score']:
+        first = data.loc[data['group'] == 'C', outcome].dropna().to_numpy()
+        second = data.loc[data['group'] == 'A', outcome].dropna().to_numpy()
+        n1, n2 = len(first), len(second)
+        pooled = np.sqrt(((n1 - 1) * first.var(ddof=1) + (n2 - 1) * second.var(ddof=1)) / (n1 + n2 - 2))
+        d = (first.mean() - second.mean()) / pooled
+        row = effects.loc[outcome]
+        assert row['cohens_d'] == pytest.approx(d)
+        assert row['hedges_g'] == pytest.approx(d * (1 - 3 / (4 * (n1 + n2) - 9)))
+        assert row['cliffs_delta'] == pytest.approx(_cliffs_delta(first, second))
+        # Rank-biserial correlation from the Mann-Whitney U statistic
+        u = stats.mannwhitneyu(first, second).statistic
+        assert row['rank_biserial'] == pytest.approx(2 * u / (n1 * n2) - 1)
+        assert (row['n1'], row['n2']) == (n1, n2)
+
+
+def test_anova_matches_raw_formulas(data):
+    table = GroupEffects(data, 'group', ['likert', 'score']).anova()
+    for outcome in ['likert', 'score']:
+        present = data[outcome].notna()
+        values, groups = data.loc[present, outcome].to_numpy(), data.loc[present, 'group'].to_numpy()
+        assert table.loc[outcome, 'eta_squared'] == pytest.approx(_eta_squared(values, groups))
+        f = stats.f_oneway(*(values[groups == g] for g in np.unique(groups))).statistic
+        k, n = 3, len(values)
+        omega = (k - 1) * (f - 1) / ((k - 1) * (f - 1) + n)
+        assert table.loc[outcome, 'omega_squared'] == pytest.approx(omega)
+
+
+def test_bootstrap_matches_per_replicate_loop(data):
+    n_boot, seed = 110, 4
+    result = GroupEffects(data, 'group', ['score']).bootstrap('C', 'A', n_boot=n_boot, seed=seed)
+
+    # The same resamples: BOOTSTRAP_BATCH replicates from each spawned seed
+    sizes = np.diff(np.append(np.arange(0, n_boot, BOOTSTRAP_BATCH), n_boot))
+    rows = np.concatenate([np.random.default_rng(batch_seed).integers(0, len(data), size=(size, len(data)))
+                           for size, batch_seed in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes)))])
+    etas, deltas = [], []
+    for sample in rows:
+        resample = data.iloc[sample]
+        etas.append(_eta_squared(resample['score'].to_numpy(), resample['group'].to_numpy()))
+        deltas.append(_cliffs_delta(resample.loc[resample['group'] == 'C', 'score'].to_numpy(),
+                                    resample.loc[resample['group'] == 'A', 'score'].to_numpy()))
+    np.testing.assert_allclose(result.loc[('score', 'eta_squared'), ['lower', 'upper']].to_numpy(dtype='float64'),
+                               np.percentile(etas, [2.5, 97.5]))
+    np.testing.assert_allclose(result.loc[('score', 'cliffs_delta'), ['lower', 'upper']].to_numpy(dtype='float64'),
+                               np.percentile(deltas, [2.5, 97.5]))
+
+
+def test_cramers_v_matches_scipy():
+    table = np.array([[20, 15, 5], [10, 25, 30]])
+    expected = stats.contingency.association(table, method='cramer', correction=False)
+    assert cramers_v(table) == pytest.approx(expected)
+    interval = cramers_v_interval(table, n_boot=500, seed=0)
+    assert interval['lower'] <= interval['cramers_v'] <= interval['upper']
+
+
+def test_median_split_keeps_missing_values():
+    split = median_split(pd.Series([1.0, 2.0, 3.0, np.nan, 5.0]))
+    assert split.tolist()[:3] == ['Low', 'Low', 'High'] and split.iloc[4] == 'High' and pd.isna(split.iloc[3])
@@ -0,0 +1,131 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from ai_personalisation import factors
+from ai_personalisation.factors import (bivariate_normal_cdf, confirmatory_factor_analysis,
+                                        exploratory_factor_analysis, parallel_analysis, polychoric,
+                                        polychoric_matrix)
+
+# Two-factor simple structure: items 0-2 load on the first factor, 3-5 on the second
+LOADINGS = np.array([[0.8, 0.0], [0.7, 0.0], [0.6, 0.0], [0.0, 0.75], [0.0, 0.5], [0.0, 0.65]])
+FACTOR_CORRELATION = 0.3
+
+
+def _population_corr():
+    phi = np.array([[1.0, FACTOR_CORRELATION], [FACTOR_CORRELATION, 1.0]])
+    corr = LOADINGS @ phi @ LOADINGS.T
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def _ordinal_pair(rho, n, seed):
+    rng = np.random.default_rng(seed)
+    latent = rng.multivariate_normal([0, 0], [[1, rho], [rho, 1]], size=n)
+    cuts = [[-1.2, -0.3, 0.4, 1.1], [-0.8, 0.0, 0.9]]
+    return pd.Series(np.digitize(latent[:, 0], cuts[0]) + 1), pd.Series(np.digitize(latent[:, 1], cuts[1]) + 1)
+
+
+@pytest.mark.parametrize('rho', [-0.7, 0.0, 0.35, 0.9])
+def test_bivariate_normal_cdf_matches_scipy(rho):
+    grid = np.array([-2.5, -1.0, 0.0, 0.4, 1.7])
+    h, k = np.meshgrid(grid, grid, indexing='ij')
+    expected = stats.multivariate_normal([0, 0], [[1, rho], [rho, 1]]).cdf(np.dstack([h, k]))
+    np.testing.assert_allclose(bivariate_normal_cdf(h, k, rho), expected, atol=1e-6)
+
+
+# Maximum-likelihood polychoric correlation by brute force: thresholds from the margins,
+# cell probabilities from scipy's bivariate normal CDF and a grid search over rho
+def _reference_polychoric(x, y):
+    table = pd.crosstab(x, y).to_numpy(dtype='float64')
+    row_tau = stats.norm.ppf(np.cumsum(table.sum(axis=1))[:-1] / table.sum()).clip(-8, 8)
+    col_tau = stats.norm.ppf(np.cumsum(table.sum(axis=0))[:-1] / table.sum()).clip(-8, 8)
+    row_tau, col_tau = np.r_[-8, row_tau, 8], np.r_[-8, col_tau, 8]
+    best, best_likelihood = None, -np.inf
+    for rho in np.arange(-0.99, 0.99, 0.002):
+        cdf = stats.multivariate_normal([0, 0], [[1, rho], [rho, 1]]).cdf
+        corners = cdf(np.dstack(np.meshgrid(row_tau, col_tau, indexing='ij')))
+        probabilities = corners[1:, 1:] - corners[:-1, 1:] - corners[1:, :-1] + corners[:-1, :-1]
+        likelihood = (table * np.log(np.maximum(probabilities, 1e-300))).sum()
+        if likelihood > best_likelihood:
+            best, best_likelihood = rho, likelihood
+    return best
+
+
+@pytest.mark.parametrize('rho', [0.0, 0.6])
+def test_polychoric_matches_brute_force_maximum_likelihood(rho):
+    x, y = _ordinal_pair(rho, 800, seed=1)
+    estimate = polychoric(x, y)
+    assert estimate == pytest.approx(_reference_polychoric(x, y), abs=0.004)
+    assert estimate == pytest.approx(rho, abs=0.08)
+
+
+@pytest.fixture
+def ordinal_items():
+    x, y = _ordinal_pair(0.5, 400, seed=2)
+    z, _ = _ordinal_pair(0.0, 400, seed=3)
+    return pd.DataFrame({'x': x, 'y': y, 'z': z})
+
+
+def test_polychoric_matrix_is_the_same_in_worker_processes(ordinal_items, monkeypatch):
+    df = ordinal_items
+    monkeypatch.setattr(factors, '_CACHE', OrderedDict())
+    serial = polychoric_matrix(df, items=['x', 'y', 'z'], n_jobs=1)
+    factors._CACHE.clear()
+    monkeypatch.setattr(factors, 'PARALLEL_MIN_TABLES', 1)
+    parallel = polychoric_matrix(df, items=['x', 'y', 'z'], n_jobs=2)
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert serial.loc['x', 'y'] == pytest.approx(polychoric(df['x'], df['y']))
+    np.testing.assert_allclose(np.diag(serial), 1.0)
+
+
+def test_polychoric_matrix_fits_only_uncached_tables(ordinal_items, monkeypatch):
+    monkeypatch.setattr(factors, '_CACHE', OrderedDict())
+    fitted = []
+
+    def fit(table):
+        fitted.append(table)
+        return factors._fit_polychoric(*table)
+
+    monkeypatch.setattr(factors, '_fit_table', fit)
+    first = polychoric_matrix(ordinal_items, items=['x', 'y'], n_jobs=4)
+    assert len(fitted) == 1
+    second = polychoric_matrix(ordinal_items, items=['x', 'y', 'z'], n_jobs=4)
+    assert len(fitted) == 3
+    assert second.loc['x', 'y'] == first.loc['x', 'y']
+    polychoric_matrix(ordinal_items, items=['x', 'y', 'z'], n_jobs=4)
+    assert len(fitted) == 3
+
+
+def test_parallel_analysis_matches_batched_reference():
+    corr, n_obs, n_iter = _population_corr(), 150, 30
+    n_factors, table = parallel_analysis(corr, n_obs, n_iter=n_iter, seed=7)
+
+    # All random samples drawn at once, as one (n_iter, n_obs, k) array
+    samples = np.random.default_rng(7).standard_normal((n_iter, n_obs, corr.shape[0]))
+    random_eigen = np.array([np.linalg.eigvalsh(np.corrcoef(s, rowvar=False))[::-1] for s in samples])
+    np.testing.assert_allclose(table['random'], np.percentile(random_eigen, 95, axis=0))
+    np.testing.assert_allclose(table['observed'], np.linalg.eigvalsh(corr)[::-1])
+    assert n_factors == 2
+
+
+def test_efa_recovers_simple_structure():
+    corr = pd.DataFrame(_population_corr(), index=list('abcdef'), columns=list('abcdef'))
+    result = exploratory_factor_analysis(corr, n_obs=500, seed=0)
+    assert result['n_factors'] == 2
+    np.testing.assert_allclose(result['communalities'], (LOADINGS ** 2).sum(axis=1), atol=1e-3)
+    loadings = result['loadings'].to_numpy()
+    primary = np.abs(loadings).argmax(axis=1)
+    assert len(set(primary[:3])) == 1 and len(set(primary[3:])) == 1 and primary[0] != primary[3]
+
+
+def test_cfa_reproduces_population_model():
+    corr = pd.DataFrame(_population_corr(), index=list('abcdef'), columns=list('abcdef'))
+    result = confirmatory_factor_analysis(corr, n_obs=500, model={'F1': ['a', 'b', 'c'], 'F2': ['d', 'e', 'f']})
+    np.testing.assert_allclose(result['loadings'].to_numpy(), LOADINGS, atol=1e-3)
+    assert result['factor_correlations'].loc['F1', 'F2'] == pytest.approx(FACTOR_CORRELATION, abs=1e-3)
+    assert result['fit']['chi2'] == pytest.approx(0.0, abs=1e-3)
+    assert result['fit']['df'] == 8
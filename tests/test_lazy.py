@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+from ai_personalisation import lazy
+
+
+def test_every_package_module_has_an_import_budget():
+    assert lazy.unbudgeted_modules() == []
+
+
+def test_lazy_module_imports_on_first_use():
+    assert lazy.lazy_import('os') is sys.modules['os']
+    proxy = lazy.LazyModule('json')
+    assert 'not loaded' in repr(proxy)
+    assert proxy.dumps([1]) == '[1]'
+    assert 'not loaded' not in repr(proxy)
+
+
+# Imports every package module in a fresh interpreter and reports which heavy
+# libraries are loaded before and after a lazily bound attribute is used
+_IMPORT_SCRIPT = '''
+import importlib, json, sys
+from ai_personalisation import lazy
+heavy = ['scipy', 'statsmodels', 'sklearn', 'matplotlib']
+for name in lazy.IMPORT_BUDGETS:
+    importlib.import_module(name)
+before = [name for name in heavy if name in sys.modules]
+from ai_personalisation import factors
+factors.optimize.minimize_scalar
+print(json.dumps([before, [name for name in heavy if name in sys.modules]]))
+'''
+
+
+def test_heavy_libraries_load_on_first_attribute_access():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run([sys.executable, '-c', _IMPORT_SCRIPT], capture_output=True, text=True, cwd=root,
+                               check=True)
+    before, after = json.loads(completed.stdout)
+    assert before == []
+    assert after == ['scipy']
+
+
+def test_entry_point_imports_stay_within_budget():
+    entry_points = ['ai_personalisation', 'ai_personalisation.cli', 'ai_personalisation.stages']
+    assert lazy.over_budget({name: lazy.IMPORT_BUDGETS[name] for name in entry_points}) == {}
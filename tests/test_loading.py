@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_personalisation.loading import detect_time_format, parse_start_time
+
+
+@pytest.mark.parametrize('fmt', ['%m/%d/%y %H:%M:%S', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M'])
+def test_parse_start_time_matches_pandas(fmt):
+    rng = np.random.default_rng(1)
+    times = pd.Timestamp('2024-06-13') + pd.to_timedelta(rng.integers(0, 30 * 24 * 3600, 500), unit='s')
+    values = pd.Series(times.strftime(fmt), index=np.arange(500) * 3)
+    values.iloc[::7] = None
+
+    assert detect_time_format(values) == fmt
+    parsed = parse_start_time(values)
+    expected = pd.to_datetime(values, format=fmt).astype('datetime64[ns]')
+    pd.testing.assert_series_equal(parsed.astype('datetime64[ns]'), expected)
+
+
+def test_parse_start_time_unparseable_values_are_nat():
+    parsed = parse_start_time(pd.Series(['06/03/24 10:00:00', 'not a time', ' 06/03/24 10:00:00 ']))
+    assert parsed.iloc[0] == parsed.iloc[2] == pd.Timestamp('2024-06-03 10:00:00')
+    assert pd.isna(parsed.iloc[1])
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from ai_personalisation.missing import (em_estimates, little_mcar_test, multiple_imputation, pool_chi2,
+                                        pool_registries, pooled_ols, rubin)
+from ai_personalisation.results import ResultsRegistry
+
+sm = pytest.importorskip('statsmodels.api')
+
+
+def _bivariate(n, seed, mechanism):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=n)
+    y = 0.6 * x + rng.normal(size=n) * 0.8
+    if mechanism == 'mcar':
+        missing = rng.random(n) < 0.3
+    else:
+        missing = rng.random(n) < stats.norm.cdf(2 * x - 0.5)
+    y[missing] = np.nan
+    return pd.DataFrame({'x': x, 'y': y})
+
+
+# Closed-form maximum-likelihood estimates for a monotone pattern (x complete, y
+# partly missing): regression of y on x over the complete rows, combined with the
+# moments of x over all rows (Anderson 1957)
+def _monotone_estimates(df):
+    complete = df.dropna()
+    x, y = complete['x'].to_numpy(), complete['y'].to_numpy()
+    slope = np.cov(x, y, ddof=0)[0, 1] / x.var()
+    intercept = y.mean() - slope * x.mean()
+    residual = (y - intercept - slope * x).var()
+    mu_x, var_x = df['x'].mean(), df['x'].var(ddof=0)
+    mu = np.array([mu_x, intercept + slope * mu_x])
+    sigma = np.array([[var_x, slope * var_x], [slope * var_x, residual + slope ** 2 * var_x]])
+    return mu, sigma
+
+
+def test_em_matches_closed_form_monotone_estimates():
+    df = _bivariate(400, 0, 'mar')
+    mu, sigma = em_estimates(df.to_numpy())
+    expected_mu, expected_sigma = _monotone_estimates(df)
+    np.testing.assert_allclose(mu, expected_mu, atol=1e-6)
+    np.testing.assert_allclose(sigma, expected_sigma, atol=1e-6)
+
+    complete = df.dropna().to_numpy()
+    mu, sigma = em_estimates(complete)
+    np.testing.assert_allclose(mu, complete.mean(axis=0))
+    np.testing.assert_allclose(sigma, np.cov(complete, rowvar=False, ddof=0))
+
+
+def test_little_statistic_matches_hand_computation():
+    df = _bivariate(400, 1, 'mar')
+    result = little_mcar_test(df, columns=['x', 'y'])
+    mu, sigma = _monotone_estimates(df)
+
+    complete = df.dropna()
+    incomplete = df[df['y'].isna()]
+    difference = complete.mean().to_numpy() - mu
+    statistic = len(complete) * difference @ np.linalg.solve(sigma, difference)
+    statistic += len(incomplete) * (incomplete['x'].mean() - mu[0]) ** 2 / sigma[0, 0]
+    assert result['statistic'] == pytest.approx(statistic, rel=1e-6)
+    assert result['df'] == 1 and result['patterns'] == 2 and result['n'] == len(df)
+    assert result['p_value'] == pytest.approx(stats.chi2.sf(statistic, 1), rel=1e-5)
+
+
+def test_little_test_separates_mcar_from_mar():
+    assert little_mcar_test(_bivariate(500, 2, 'mar'), columns=['x', 'y'])['p_value'] < 1e-4
+    p_values = [little_mcar_test(_bivariate(300, seed, 'mcar'), columns=['x', 'y'])['p_value'] for seed in range(40)]
+    # Under MCAR the p-values are uniform: about 5% below 0.05
+    assert np.mean(np.array(p_values) < 0.05) <= 0.15
+    assert 0.3 < np.mean(p_values) < 0.7
+
+
+def test_rubin_matches_textbook_formulas():
+    estimates = np.array([[1.10, -0.40], [1.25, -0.35], [0.95, -0.52], [1.05, -0.41], [1.20, -0.30]])
+    variances = np.array([[0.020, 0.010], [0.022, 0.011], [0.019, 0.009], [0.021, 0.012], [0.020, 0.010]])
+    pooled = rubin(estimates, variances, dof=50)
+
+    m = len(estimates)
+    q_bar, u_bar = estimates.mean(axis=0), variances.mean(axis=0)
+    b = ((estimates - q_bar) ** 2).sum(axis=0) / (m - 1)
+    t = u_bar + (1 + 1 / m) * b
+    r = (1 + 1 / m) * b / u_bar
+    df_old = (m - 1) * (1 + 1 / r) ** 2
+    gamma = (1 + 1 / m) * b / t
+    df_observed = (50 + 1) / (50 + 3) * 50 * (1 - gamma)
+    df = df_old * df_observed / (df_old + df_observed)
+    np.testing.assert_allclose(pooled['estimate'], q_bar)
+    np.testing.assert_allclose(pooled['std_error'], np.sqrt(t))
+    np.testing.assert_allclose(pooled['riv'], r)
+    np.testing.assert_allclose(pooled['df'], df)
+    np.testing.assert_allclose(pooled['p_value'], 2 * stats.t.sf(np.abs(q_bar / np.sqrt(t)), df))
+    np.testing.assert_allclose(pooled['fmi'], (r + 2 / (df + 3)) / (r + 1))
+
+
+def test_pool_chi2_matches_d2_formula():
+    statistics, k = np.array([8.2, 11.5, 9.1, 13.0, 7.4]), 3
+    statistic, denominator, p_value, riv = pool_chi2(statistics, k)
+
+    m = len(statistics)
+    r = (1 + 1 / m) * np.sqrt(statistics).var(ddof=1)
+    d2 = (statistics.mean() / k - (m + 1) / (m - 1) * r) / (1 + r)
+    df2 = k ** (-3 / m) * (m - 1) * (1 + 1 / r) ** 2
+    assert (statistic, denominator, riv) == pytest.approx((d2, df2, r))
+    assert p_value == pytest.approx(stats.f.sf(d2, k, df2))
+
+    # Identical statistics reduce to the complete-data chi-square test
+    statistic, _, p_value, riv = pool_chi2([9.0] * 4, 3)
+    assert riv == 0 and p_value == pytest.approx(stats.chi2.sf(9.0, 3))
+
+
+def test_pooled_ols_of_identical_datasets_is_ols():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame(rng.normal(size=(120, 2)), columns=['a', 'b'])
+    df['y'] = df['a'] - 0.5 * df['b'] + rng.normal(size=120)
+    fit = sm.OLS(df['y'], sm.add_constant(df[['a', 'b']])).fit()
+    pooled = pooled_ols([df, df.copy(), df.copy()], 'y', ['a', 'b'])
+    np.testing.assert_allclose(pooled['coefficient'], fit.params)
+    np.testing.assert_allclose(pooled['std_error'], fit.bse)
+    np.testing.assert_allclose(pooled['riv'], 0.0, atol=1e-12)
+
+
+def test_pool_registries_pools_each_test():
+    registries = []
+    for r in [0.30, 0.35, 0.25]:
+        registry = ResultsRegistry()
+        registry.record('pearsonr', 0.01, statistic=r, outcome='y', predictor='x', n=100)
+        registry.record('chi2_contingency', 0.02, statistic=10.0, outcome='y', predictor='g', df=4, n=100)
+        registries.append(registry)
+    pooled = pool_registries(registries).frame().set_index('test')
+
+    z = np.arctanh([0.30, 0.35, 0.25])
+    expected = rubin(z[:, None], np.full((3, 1), 1 / 97)).iloc[0]
+    assert pooled.loc['pearsonr', 'statistic'] == pytest.approx(np.tanh(expected['estimate']))
+    assert pooled.loc['pearsonr', 'p_value'] == pytest.approx(expected['p_value'])
+    assert pooled.loc['chi2_contingency', 'p_value'] == pytest.approx(stats.chi2.sf(10.0, 4))
+
+    registries[1].record('pearsonr', 0.5, statistic=0.1)
+    with pytest.raises(ValueError):
+        pool_registries(registries)
+
+
+def test_multiple_imputation_draws_observed_values():
+    rng = np.random.default_rng(4)
+    df = pd.DataFrame(np.clip(np.round(3 + rng.normal(size=(150, 3)) @ [[1, 0.5, 0.3], [0, 1, 0.5], [0, 0, 1]]), 1, 5),
+                      columns=['a', 'b', 'c'])
+    df = df.mask(rng.random(df.shape) < 0.15)
+    datasets = multiple_imputation(df, m=3, columns=['a', 'b', 'c'], iterations=3, seed=1, n_jobs=1)
+    assert len(datasets) == 3
+    for completed in datasets:
+        assert completed.notna().all().all()
+        pd.testing.assert_frame_equal(completed.where(df.notna()), df)
+        for column in df.columns:
+            assert set(completed[column]) <= set(df[column].dropna())
+    parallel = multiple_imputation(df, m=3, columns=['a', 'b', 'c'], iterations=3, seed=1, n_jobs=2)
+    for serial, other in zip(datasets, parallel):
+        pd.testing.assert_frame_equal(serial, other)
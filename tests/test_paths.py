@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_personalisation.paths import BOOTSTRAP_BATCH, PathModel
+
+sm = pytest.importorskip('statsmodels.api')
+
+MODEL = {'m': ['x'], 'y': ['m', 'x']}
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(11)
+    n = 250
+    x = rng.normal(size=n)
+    m = 0.6 * x + rng.normal(size=n)
+    y = 0.5 * m + 0.2 * x + rng.normal(size=n)
+    df = pd.DataFrame({'x': x, 'm': m, 'y': y})
+    df.loc[rng.random(n) < 0.05, 'm'] = np.nan
+    return df
+
+
+def _ols(df, outcome, predictors):
+    return sm.OLS(df[outcome], sm.add_constant(df[predictors])).fit()
+
+
+def test_coefficients_match_statsmodels_ols(data):
+    table = PathModel(data, MODEL).coefficients().set_index(['outcome', 'predictor'])
+    complete = data.dropna()
+    for outcome, predictors in MODEL.items():
+        fit = _ols(complete, outcome, predictors)
+        for predictor in predictors:
+            row = table.loc[(outcome, predictor)]
+            assert row['estimate'] == pytest.approx(fit.params[predictor])
+            assert row['std_error'] == pytest.approx(fit.bse[predictor])
+            assert row['t_value'] == pytest.approx(fit.tvalues[predictor])
+            assert row['p_value'] == pytest.approx(fit.pvalues[predictor])
+            assert row['r_squared'] == pytest.approx(fit.rsquared)
+
+
+def test_effects_are_products_along_paths(data):
+    path_model = PathModel(data, MODEL)
+    complete = data.dropna()
+    a = _ols(complete, 'm', ['x']).params['x']
+    b, c = _ols(complete, 'y', ['m', 'x']).params[['m', 'x']]
+    effects = path_model.effects()
+    assert effects.loc[('x', 'y'), 'direct'] == pytest.approx(c)
+    assert effects.loc[('x', 'y'), 'indirect'] == pytest.approx(a * b)
+    assert effects.loc[('x', 'y'), 'total'] == pytest.approx(c + a * b)
+    # The total effect of x on y is also the slope of y on x alone
+    assert effects.loc[('x', 'y'), 'total'] == pytest.approx(_ols(complete, 'y', ['x']).params['x'])
+    assert path_model.mediation('x', 'm', 'y')['indirect'] == pytest.approx(a * b)
+
+
+def test_bootstrap_matches_per_replicate_ols(data):
+    n_boot, seed = 150, 3
+    result = PathModel(data, MODEL).bootstrap(n_boot=n_boot, seed=seed, n_jobs=1)
+
+    # The same resamples, one OLS fit per equation and replicate
+    values = data[['x', 'm', 'y']].dropna().to_numpy()
+    sizes = np.diff(np.append(np.arange(0, n_boot, BOOTSTRAP_BATCH), n_boot))
+    indirect = []
+    for size, batch_seed in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))):
+        for rows in np.random.default_rng(batch_seed).integers(0, len(values), size=(size, len(values))):
+            sample = pd.DataFrame(values[rows], columns=['x', 'm', 'y'])
+            a = _ols(sample, 'm', ['x']).params['x']
+            b = _ols(sample, 'y', ['m', 'x']).params['m']
+            indirect.append(a * b)
+    lower, upper = np.percentile(indirect, [2.5, 97.5])
+    assert result.loc[('x', 'y'), 'indirect_lower'] == pytest.approx(lower)
+    assert result.loc[('x', 'y'), 'indirect_upper'] == pytest.approx(upper)
+
+
+def test_bootstrap_in_worker_processes_brackets_the_estimates(data):
+    result = PathModel(data, MODEL).bootstrap(n_boot=300, seed=0, n_jobs=2)
+    for effect in ['direct', 'total']:
+        assert (result[f'{effect}_lower'] <= result[effect]).all()
+        assert (result[effect] <= result[f'{effect}_upper']).all()
+    # The same seed gives the same intervals whatever the number of workers
+    pd.testing.assert_frame_equal(result, PathModel(data, MODEL).bootstrap(n_boot=300, seed=0, n_jobs=1))
+    pd.testing.assert_frame_equal(result, PathModel(data, MODEL).bootstrap(n_boot=300, seed=0, n_jobs=3))
+
+
+def test_non_recursive_model_is_rejected(data):
+    with pytest.raises(ValueError):
+        PathModel(data, {'m': ['y'], 'y': ['m']})
+    with pytest.raises(KeyError):
+        PathModel(data, {'y': ['z']})
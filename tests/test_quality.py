@@ -0,0 +1,126 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_personalisation import codebook, quality, schema
+from ai_personalisation.cli import main
+from ai_personalisation.duplicates import LIKERT_BATTERY
+from ai_personalisation.encoding import encode_survey
+from ai_personalisation.loading import clean_survey, load_survey
+from ai_personalisation.quality import (DEFAULT_EXCLUDE, MAX_READING_RATE, MAX_TYPING_RATE, SPEED_RATIO, QualityFlag,
+                                        characters_typed, compute_quality, decode_flags, failed_attention_checks,
+                                        inconsistent_answers, quality_flags, quality_weights, screen, words_read)
+from ai_personalisation.segments import SegmentCube
+
+
+@pytest.fixture
+def timed(survey):
+    # Completion times from 20 seconds to 15 minutes after the start
+    start = pd.to_datetime(survey[codebook.START_TIME], format='%m/%d/%y %H:%M:%S')
+    seconds = np.random.default_rng(3).uniform(20, 900, len(survey)).round()
+    survey[codebook.COMPLETION_TIME] = (start + pd.to_timedelta(seconds, unit='s')).dt.strftime('%m/%d/%y %H:%M:%S')
+    return survey, seconds
+
+
+def test_timing_flags_follow_the_thresholds(timed):
+    survey, seconds = timed
+    survey.loc[5, codebook.TEXT_COLUMNS[0]] = 'x' * 5000
+    flags = decode_flags(compute_quality(survey, duplicates=False))
+
+    median = np.median(seconds)
+    reading = np.array([sum(len(codebook.QUESTION_TEXTS[c].split()) for c in codebook.QUESTION_COLUMNS
+                            if c not in codebook.TEXT_COLUMNS and pd.notna(row[c])) for _, row in survey.iterrows()])
+    typing = np.array([sum(len(str(row[c]).strip()) for c in codebook.TEXT_COLUMNS) for _, row in survey.iterrows()])
+    assert flags['SPEEDING'].tolist() == (seconds < SPEED_RATIO * median).tolist()
+    assert flags['FAST_READING'].tolist() == (reading / seconds > MAX_READING_RATE).tolist()
+    assert flags['FAST_TYPING'].tolist() == (typing / seconds > MAX_TYPING_RATE).tolist()
+    assert flags['SPEEDING'].any() and flags.loc[5, 'FAST_TYPING']
+    np.testing.assert_allclose(words_read(survey), reading)
+    np.testing.assert_allclose(characters_typed(survey), typing)
+
+
+def test_untimed_exports_raise_no_timing_flags(survey):
+    flags = decode_flags(compute_quality(survey, duplicates=False))
+    assert not flags[['SPEEDING', 'FAST_READING', 'FAST_TYPING']].any().any()
+
+
+def test_answer_checks(survey):
+    for name in LIKERT_BATTERY:
+        question, mapping = codebook.ORDINAL_LEVELS[name]
+        survey.loc[0, question] = next(answer for answer, level in mapping.items() if level == 3)
+    survey.loc[1, codebook.CHALLENGES] = 'No challenges encountered;Irrelevant recommendations;'
+    survey.loc[2, codebook.CHALLENGES] = 'No challenges encountered;'
+    labels = codebook.relevance_labels
+    survey.loc[3, codebook.RELEVANCE_RANKING] = ';'.join(labels[:-1] + [labels[0]]) + ';'
+    survey.loc[10] = survey.loc[4]
+
+    flags = decode_flags(compute_quality(survey))
+    assert flags.loc[0, 'STRAIGHT_LINING']
+    assert inconsistent_answers(survey)[[1, 2, 3]].tolist() == [True, False, True]
+    assert flags.index[flags['INCONSISTENT']].tolist() == [1, 3]
+    assert flags.loc[10, 'DUPLICATE'] and not flags.loc[4, 'DUPLICATE']
+
+    failed = failed_attention_checks(survey, checks={codebook.NOTICE_HABITS: ['Always', 'Often']})
+    assert failed.tolist() == (~survey[codebook.NOTICE_HABITS].isin(['Always', 'Often'])).tolist()
+    assert not failed_attention_checks(survey).any()
+
+
+def test_decode_flags_round_trips_the_bit_field():
+    bits = np.arange(256, dtype=np.uint8)
+    frame = pd.DataFrame({'Quality_Flags': bits}, index=np.arange(256) + 1000)
+    decoded = decode_flags(frame)
+    assert list(decoded.columns) == [flag.name for flag in QualityFlag]
+    assert decoded.index.equals(frame.index)
+    encoded = sum(decoded[flag.name].to_numpy(dtype=np.uint8) * np.uint8(flag) for flag in QualityFlag)
+    np.testing.assert_array_equal(encoded, bits)
+    assert decoded.loc[1000 + QualityFlag.SPEEDING].sum() == 1
+
+
+def test_screen_and_weights():
+    flags = pd.DataFrame({'Quality_Flags': np.array([
+        0,
+        QualityFlag.SPEEDING,
+        QualityFlag.NEAR_DUPLICATE,
+        QualityFlag.FAST_TYPING | QualityFlag.INCONSISTENT,
+        QualityFlag.DUPLICATE | QualityFlag.NEAR_DUPLICATE,
+        QualityFlag.ATTENTION_CHECK,
+    ], dtype=np.uint8)}, index=list('abcdef'))
+    df = pd.DataFrame({'x': range(6)}, index=list('abcdef'))
+
+    assert screen(df, flags).index.tolist() == ['a', 'c', 'd']
+    assert screen(df, flags, exclude=DEFAULT_EXCLUDE | QualityFlag.INCONSISTENT).index.tolist() == ['a', 'c']
+    weights = quality_weights(flags)
+    assert weights.index.equals(df.index)
+    np.testing.assert_allclose(weights, [1.0, 0.5, 1.0, 0.75 * 0.75, 0.0, 0.0])
+    np.testing.assert_allclose(quality_weights(flags, penalties={QualityFlag.NEAR_DUPLICATE: 0.5}),
+                               [1.0, 1.0, 0.5, 1.0, 0.5, 1.0])
+
+
+def test_quality_flags_are_cached_per_dataset(survey, monkeypatch):
+    monkeypatch.setattr(quality, '_CACHE', OrderedDict())
+    first = quality_flags(survey, duplicates=False)
+    assert quality_flags(survey.copy(), duplicates=False) is first
+    changed = survey.copy()
+    changed.loc[0, codebook.SATISFACTION] = 'Neutral' if survey.loc[0, codebook.SATISFACTION] != 'Neutral' \
+        else 'Satisfied'
+    assert quality_flags(changed, duplicates=False) is not first
+
+
+def test_run_applies_quality_weights_to_the_segment_tables(timed, tmp_path):
+    survey, _ = timed
+    path = tmp_path / 'export.csv'
+    schema.original_columns(survey).to_csv(path, index=False)
+    out = tmp_path / 'out'
+    assert main(['run', '--input', str(path), '--stages', 'segments', '--quality-weights', '--no-cache',
+                 '--out', str(out)]) == 0
+
+    df = encode_survey(clean_survey(load_survey(path)))
+    weights = quality_weights(compute_quality(df))
+    assert (weights < 1).any()
+    expected = SegmentCube(df, weights=weights).table('Age')
+    written = pd.read_csv(out / 'outcomes_by_age.csv', index_col=0)
+    np.testing.assert_allclose(written.to_numpy(), expected.to_numpy())
+    assert not np.allclose(written.to_numpy(), SegmentCube(df).table('Age').to_numpy())
+    assert (out / 'quality_summary.csv').exists()
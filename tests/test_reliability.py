@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_personalisation.reliability import (BOOTSTRAP_BATCH, ReliabilityAnalysis, _bootstrap_covariances,
+                                            alpha_if_deleted, cronbach_alpha, item_total_correlations,
+                                            mcdonald_omega)
+
+
+@pytest.fixture
+def items():
+    rng = np.random.default_rng(5)
+    factor = rng.normal(size=(300, 1))
+    values = np.clip(np.round(3 + factor * [0.9, 0.7, 0.8, 0.5] + rng.normal(size=(300, 4)) * 0.7), 1, 5)
+    return pd.DataFrame(values, columns=['a', 'b', 'c', 'd'])
+
+
+# Cronbach's alpha from item and total-score variances, as in the textbook definition
+def _alpha(values):
+    k = values.shape[1]
+    return k / (k - 1) * (1 - values.var(axis=0, ddof=1).sum() / values.sum(axis=1).var(ddof=1))
+
+
+def test_alpha_and_item_statistics_match_raw_formulas(items):
+    values = items.to_numpy()
+    cov = np.cov(values, rowvar=False)
+    assert cronbach_alpha(cov) == pytest.approx(_alpha(values))
+
+    rest = values.sum(axis=1, keepdims=True) - values
+    expected_r = [np.corrcoef(values[:, j], rest[:, j])[0, 1] for j in range(values.shape[1])]
+    np.testing.assert_allclose(item_total_correlations(cov), expected_r)
+
+    expected_deleted = [_alpha(np.delete(values, j, axis=1)) for j in range(values.shape[1])]
+    np.testing.assert_allclose(alpha_if_deleted(cov), expected_deleted)
+
+
+def test_omega_recovers_one_factor_model():
+    loadings = np.array([0.8, 0.7, 0.6, 0.5])
+    uniqueness = np.array([0.3, 0.5, 0.4, 0.7])
+    cov = np.outer(loadings, loadings) + np.diag(uniqueness)
+    expected = loadings.sum() ** 2 / (loadings.sum() ** 2 + uniqueness.sum())
+    assert mcdonald_omega(cov) == pytest.approx(expected, abs=1e-6)
+    # A stack of covariance matrices gives one omega each
+    np.testing.assert_allclose(mcdonald_omega(np.stack([cov, cov])), [expected, expected], atol=1e-6)
+
+
+def test_batched_bootstrap_covariances_match_numpy(items):
+    values = items.to_numpy()
+    indices = np.random.default_rng(0).integers(0, len(values), size=(5, len(values)))
+    batched = _bootstrap_covariances(values, indices)
+    for replicate, rows in zip(batched, indices):
+        np.testing.assert_allclose(replicate, np.cov(values[rows], rowvar=False))
+
+
+def test_reliability_analysis_summary_and_bootstrap(items):
+    analysis = ReliabilityAnalysis(items, constructs={'scale': ['a', 'b', 'c', 'd']})
+    summary = analysis.summary('scale')
+    assert summary['n'] == len(items)
+    assert summary['alpha'] == pytest.approx(_alpha(items.to_numpy()))
+
+    interval = analysis.bootstrap('scale', n_boot=200, seed=1, n_jobs=2)
+    assert (interval['lower'] <= interval['estimate']).all() and (interval['estimate'] <= interval['upper']).all()
+    pd.testing.assert_frame_equal(interval, analysis.bootstrap('scale', n_boot=200, seed=1, n_jobs=2))
+    with pytest.raises(ValueError):
+        analysis.summary(['a', 'b'])
+
+
+@pytest.mark.parametrize('n_jobs', [1, 3])
+def test_bootstrap_intervals_do_not_depend_on_the_workers(items, n_jobs):
+    analysis = ReliabilityAnalysis(items, constructs={'scale': ['a', 'b', 'c', 'd']})
+    interval = analysis.bootstrap('scale', n_boot=250, seed=4, n_jobs=n_jobs)
+
+    # One textbook alpha per resample, drawn batch by batch from the spawned seeds
+    values = items.to_numpy()
+    alphas = []
+    sizes = np.diff(np.append(np.arange(0, 250, BOOTSTRAP_BATCH), 250))
+    for size, seed in zip(sizes, np.random.SeedSequence(4).spawn(len(sizes))):
+        for rows in np.random.default_rng(seed).integers(0, len(values), size=(size, len(values))):
+            alphas.append(_alpha(values[rows]))
+    lower, upper = np.percentile(alphas, [2.5, 97.5])
+    assert interval.loc['alpha', 'lower'] == pytest.approx(lower)
+    assert interval.loc['alpha', 'upper'] == pytest.approx(upper)
@@ -0,0 +1,31 @@
+import re
+import time
+
+import pandas as pd
+
+from ai_personalisation.report import ReportBuilder
+
+
+def _slow_section(df, delay, label):
+    time.sleep(delay)
+    return [('text', None, f'{label}: {len(df)} rows')]
+
+
+def _failing_section(df):
+    raise RuntimeError('no data')
+
+
+def test_sections_are_written_in_order_after_the_contents(tmp_path):
+    # Later sections finish first, so they have to be held back
+    sections = [(f's{i}', f'Section {i}', _slow_section, (0.4 - 0.1 * i, f'section {i}')) for i in range(4)]
+    sections.insert(2, ('broken', 'Broken', _failing_section, ()))
+    path = tmp_path / 'report.html'
+    failed = ReportBuilder(pd.DataFrame({'a': range(3)}), str(path), sections=sections, workers=3).build_sync()
+
+    assert failed == ['broken']
+    html = path.read_text(encoding='utf-8')
+    ids = re.findall(r'<section id="([^"]+)">', html)
+    assert ids == ['s0', 's1', 'broken', 's2', 's3']
+    assert html.index('<h2>Contents</h2>') < html.index('<section id="s0">')
+    assert html.index('<section id="s3">') < html.index('Report built in')
+    assert 'section 3: 3 rows' in html and 'RuntimeError: no data' in html and 'Broken (failed)' in html
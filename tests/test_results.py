@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from ai_personalisation.results import ResultsRegistry, adjust_pvalues
+
+multitest = pytest.importorskip('statsmodels.stats.multitest')
+
+# Method names of statsmodels.stats.multitest.multipletests
+STATSMODELS_METHODS = {'bonferroni': 'bonferroni', 'holm': 'holm', 'bh': 'fdr_bh', 'by': 'fdr_by'}
+
+
+@pytest.mark.parametrize('method', list(STATSMODELS_METHODS))
+@pytest.mark.parametrize('seed', range(5))
+def test_adjust_pvalues_matches_statsmodels(method, seed):
+    rng = np.random.default_rng(seed)
+    p = np.concatenate([rng.uniform(size=40), rng.uniform(0, 0.01, size=10), [0.02, 0.02, 0.02]])
+    rng.shuffle(p)
+    expected = multitest.multipletests(p, method=STATSMODELS_METHODS[method])[1]
+    np.testing.assert_allclose(adjust_pvalues(p, method), expected, rtol=1e-12)
+
+
+def test_adjust_pvalues_keeps_missing_values():
+    p = np.array([0.01, np.nan, 0.04, 0.03, np.nan])
+    adjusted = adjust_pvalues(p, 'holm')
+    assert np.isnan(adjusted[[1, 4]]).all()
+    np.testing.assert_allclose(adjusted[[0, 2, 3]], multitest.multipletests([0.01, 0.04, 0.03], method='holm')[1])
+    assert np.isnan(adjust_pvalues([np.nan], 'bh')).all()
+    with pytest.raises(ValueError):
+        adjust_pvalues(p, 'sidak')
+
+
+def test_registry_corrects_within_families():
+    rng = np.random.default_rng(0)
+    registry = ResultsRegistry()
+    for hypothesis in ['H1', 'H2']:
+        for _ in range(6):
+            x, y = rng.normal(size=(2, 50))
+            registry.record_scipy('pearsonr', stats.pearsonr(x, x * 0.3 + y), hypothesis=hypothesis, n=50)
+    assert len(registry) == 12
+
+    table = registry.table(method='bh', family='hypothesis')
+    for _, group in table.groupby('hypothesis'):
+        np.testing.assert_allclose(group['p_adjusted'], multitest.multipletests(group['p_value'], method='fdr_bh')[1])
+    assert (table['reject'] == (table['p_adjusted'] < 0.05)).all()
+    assert table['p_value'].is_monotonic_increasing
+
+    overall = registry.table(method='holm')
+    np.testing.assert_allclose(overall['p_adjusted'], multitest.multipletests(overall['p_value'], method='holm')[1])
+
+
+def test_record_regression_matches_statsmodels():
+    sm = pytest.importorskip('statsmodels.api')
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(80, 2)), columns=['a', 'b'])
+    df['y'] = 0.5 * df['a'] + rng.normal(size=80)
+    model = sm.OLS(df['y'], sm.add_constant(df[['a', 'b']])).fit()
+
+    frame = ResultsRegistry().record_regression(model, outcome='y').frame().set_index('predictor')
+    assert list(frame.index) == ['a', 'b']
+    np.testing.assert_allclose(frame['p_value'], model.pvalues[['a', 'b']])
+    np.testing.assert_allclose(frame['effect'], model.params[['a', 'b']])
+    assert (frame['n'] == 80).all()
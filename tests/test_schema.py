@@ -0,0 +1,28 @@
+import pandas as pd
+
+from ai_personalisation import codebook, schema
+
+
+def test_headers_round_trip(survey):
+    exported = schema.original_columns(survey)
+    texts = [codebook.QUESTION_TEXTS[question] for question in codebook.QUESTION_COLUMNS]
+    assert list(exported.columns) == [codebook.START_TIME] + texts
+    pd.testing.assert_frame_equal(schema.rename_columns(exported), survey)
+
+
+def test_resolve_ignores_whitespace_changes():
+    text = codebook.QUESTION_TEXTS[codebook.RELEVANCE_RANKING]
+    assert schema.resolve(text) == codebook.RELEVANCE_RANKING
+    assert schema.resolve(' '.join(text.split())) == codebook.RELEVANCE_RANKING
+    assert schema.resolve(codebook.SATISFACTION) == codebook.SATISFACTION
+    assert schema.resolve('Respondent') == 'Respondent'
+    assert schema.question_text(codebook.TRUST) == codebook.QUESTION_TEXTS[codebook.TRUST]
+
+
+def test_every_question_has_a_kind():
+    assert list(schema.QUESTIONS) == codebook.QUESTION_COLUMNS
+    kinds = {question.id: question.kind for question in schema.QUESTIONS.values()}
+    assert kinds[codebook.CHALLENGES] == schema.MULTI
+    assert kinds[codebook.IMPROVEMENT_RANKING] == schema.RANKING
+    assert kinds[codebook.SATISFACTION] == schema.ORDINAL
+    assert [q for q, kind in kinds.items() if kind == schema.TEXT] == codebook.TEXT_COLUMNS
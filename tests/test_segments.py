@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_personalisation.segments import SegmentCube
+
+DIMENSIONS = {'Age': 'age', 'Gender': 'gender', 'Income': 'income'}
+OUTCOMES = ['Satisfaction_Level', 'Trust_Level']
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(6)
+    n = 500
+    df = pd.DataFrame({
+        'age': rng.choice(['18-24', '25-34', '35-44'], n),
+        'gender': rng.choice(['Female', 'Male'], n),
+        'income': rng.choice(['Low', 'Medium', 'High'], n),
+        'Satisfaction_Level': rng.integers(1, 6, n).astype('float64'),
+        'Trust_Level': rng.integers(1, 6, n).astype('float64'),
+    })
+    df.loc[rng.random(n) < 0.05, 'income'] = None
+    df.loc[rng.random(n) < 0.1, 'Trust_Level'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('dims', [('Income',), ('Age', 'Gender'), ('Age', 'Gender', 'Income')])
+@pytest.mark.parametrize('stat', ['n', 'mean', 'std'])
+def test_tables_match_pandas_groupby(data, dims, stat):
+    cube = SegmentCube(data, dimensions=DIMENSIONS, outcomes=OUTCOMES)
+    grouped = data.groupby([DIMENSIONS[d] for d in dims])[OUTCOMES]
+    expected = {'n': grouped.count(), 'mean': grouped.mean(), 'std': grouped.std()}[stat]
+    table = cube.table(*dims, stat=stat)
+    expected.index.names = list(dims)
+    table = table.loc[expected.index]
+    pd.testing.assert_frame_equal(table, expected, check_dtype=False, check_index_type=False)
+
+
+def test_rollups_keep_respondents_missing_a_dimension(data):
+    cube = SegmentCube(data, dimensions=DIMENSIONS, outcomes=OUTCOMES)
+    overall = cube.table(stat='n')
+    assert overall.loc['All', 'Satisfaction_Level'] == len(data)
+    assert cube.sizes().iloc[0] == len(data)
+    assert cube.sizes('Income').sum() == data['income'].notna().sum()
+
+    segment = cube.lookup(Gender='Female', Age='25-34')
+    rows = data[(data['gender'] == 'Female') & (data['age'] == '25-34')]
+    assert segment.loc['Trust_Level', 'mean'] == pytest.approx(rows['Trust_Level'].mean())
+    assert cube.size(Gender='Female', Age='25-34') == len(rows)
+    with pytest.raises(KeyError):
+        cube.lookup(Gender='Other')
+
+
+def test_weighted_cube_matches_weighted_means(data):
+    weights = np.random.default_rng(1).uniform(0.5, 2.0, len(data))
+    cube = SegmentCube(data, dimensions=DIMENSIONS, outcomes=OUTCOMES, weights=weights)
+    for level, rows in data.groupby('gender'):
+        present = rows['Trust_Level'].notna()
+        expected = np.average(rows.loc[present, 'Trust_Level'], weights=weights[rows.index[present]])
+        assert cube.lookup(Gender=level).loc['Trust_Level', 'mean'] == pytest.approx(expected)
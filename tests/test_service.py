@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from ai_personalisation import codebook
+from ai_personalisation.encoding import encode_survey
+from ai_personalisation.loading import clean_survey
+from ai_personalisation.service import BadRequest, SurveyService, group_test
+
+sm = pytest.importorskip('statsmodels.api')
+
+
+@pytest.fixture
+def service(survey):
+    service = SurveyService(encode_survey(clean_survey(survey)), workers=1)
+    yield service
+    service.close()
+
+
+def _get(service, path, query=''):
+    return asyncio.run(service.handle(path, query))
+
+
+def test_table_endpoints(service):
+    df = service.df
+    status, body = _get(service, '/value_counts', 'column=Income&normalize=true')
+    assert status == 200 and body['column'] == codebook.INCOME
+    expected = df[codebook.INCOME].value_counts(normalize=True)
+    assert body['counts'] == pytest.approx(expected.to_dict())
+
+    status, body = _get(service, '/crosstab', 'rows=Age&columns=Gender&normalize=index')
+    table = pd.DataFrame(body['table']['data'], index=body['table']['index'], columns=body['table']['columns'])
+    expected = pd.crosstab(df[codebook.AGE], df[codebook.GENDER], normalize='index')
+    np.testing.assert_allclose(table.loc[expected.index, expected.columns], expected)
+
+    status, body = _get(service, '/correlations', 'columns=Satisfaction_Level,Trust_Level&method=spearman')
+    rho = stats.spearmanr(df['Satisfaction_Level'], df['Trust_Level'], nan_policy='omit').statistic
+    assert body['matrix']['data'][0][1] == pytest.approx(rho)
+    assert _get(service, '/columns')[1]['columns'] == [str(c) for c in df.columns]
+
+
+def test_pool_endpoints_match_scipy_and_statsmodels(service):
+    df = service.df
+    status, body = _get(service, '/group_test', 'outcome=Satisfaction_Level&group=Gender')
+    data = df[['Satisfaction_Level', codebook.GENDER]].dropna()
+    groups = [values.to_numpy() for _, values in data.groupby(codebook.GENDER)['Satisfaction_Level']]
+    test = stats.f_oneway(*groups) if len(groups) > 2 else stats.ttest_ind(*groups)
+    assert status == 200 and body['n'] == len(data)
+    assert body['statistic'] == pytest.approx(test.statistic) and body['p_value'] == pytest.approx(test.pvalue)
+
+    status, body = _get(service, '/regression', 'outcome=Engagement_Level&predictors=Satisfaction_Level,Trust_Level')
+    data = df[['Engagement_Level', 'Satisfaction_Level', 'Trust_Level']].dropna()
+    fit = sm.OLS(data['Engagement_Level'], sm.add_constant(data[['Satisfaction_Level', 'Trust_Level']])).fit()
+    coefficients = body['coefficients']
+    column = coefficients['columns'].index('coefficient')
+    np.testing.assert_allclose([row[column] for row in coefficients['data']], fit.params)
+    assert body['r_squared'] == pytest.approx(fit.rsquared)
+
+
+@pytest.mark.parametrize('path, query', [
+    ('/value_counts', ''),
+    ('/value_counts', 'column=Nonexistent'),
+    ('/crosstab', 'rows=Age&columns=Gender&normalize=rows'),
+    ('/correlations', 'columns=Satisfaction_Level,Trust_Level&method=cosine'),
+    ('/correlations', 'columns=Satisfaction_Level,Income'),
+    ('/regression', 'outcome=Engagement_Level&predictors=Gender'),
+    ('/group_test', 'outcome=Satisfaction_Level&group=Satisfaction_Level'),
+])
+def test_bad_requests_are_400(service, path, query):
+    status, body = _get(service, path, query)
+    assert status == 400 and body['error']
+
+
+def test_group_test_needs_two_groups(service):
+    one_group = service.df[service.df[codebook.GENDER] == service.df[codebook.GENDER].iloc[0]]
+    with pytest.raises(BadRequest, match='fewer than two groups'):
+        group_test(one_group, 'Satisfaction_Level', 'Gender')
+
+
+def test_unknown_endpoints_and_methods(service):
+    status, body = _get(service, '/nothing')
+    assert status == 404 and '/health' in body['endpoints']
+
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request'}
+
+    async def send(message):
+        sent.append(message)
+
+    for method, status in [('POST', 405), ('GET', 200)]:
+        sent.clear()
+        scope = {'type': 'http', 'method': method, 'path': '/value_counts', 'query_string': b'column=Age'}
+        asyncio.run(service(scope, receive, send))
+        assert sent[0]['status'] == status
+        json.loads(sent[1]['body'])
+
+
+def test_identical_requests_share_one_computation(service):
+    calls = []
+
+    async def slow(query):
+        calls.append(query)
+        await asyncio.sleep(0.05)
+        if query.get('fail'):
+            raise BadRequest('failed')
+        return {'value': len(calls)}
+
+    service.routes['/slow'] = slow
+
+    async def burst(query):
+        return await asyncio.gather(*[service.handle('/slow', query) for _ in range(5)])
+
+    responses = asyncio.run(burst('x=1'))
+    assert responses == [(200, {'value': 1})] * 5
+    assert len(calls) == 1 and (service.hits, service.misses) == (4, 1)
+    assert _get(service, '/slow', 'x=1') == (200, {'value': 1})
+    assert len(calls) == 1
+
+    # A failure reaches every waiting request and is not cached
+    responses = asyncio.run(burst('fail=1'))
+    assert responses == [(400, {'error': 'failed'})] * 5
+    assert len(calls) == 2
+    assert _get(service, '/slow', 'fail=1')[0] == 400 and len(calls) == 3
+    assert _get(service, '/health')[1]['cache_entries'] == 1
@@ -0,0 +1,76 @@
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_personalisation.store import ResultStore, fingerprint
+
+
+class Stale:
+    pass
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / 'store'))
+
+
+def test_fetch_computes_once_per_input_and_setting(store):
+    calls = []
+
+    def compute(data, scale=1):
+        calls.append(scale)
+        return data.sum() * scale
+
+    data = pd.DataFrame({'a': [1.0, 2.0], 'b': [3.0, 4.0]})
+    first = store.fetch('total', compute, data, scale=2)
+    pd.testing.assert_series_equal(store.fetch('total', compute, data.copy(), scale=2), first)
+    assert calls == [2] and (store.hits, store.misses) == (1, 1)
+
+    store.fetch('total', compute, data, scale=3)
+    changed = data.copy()
+    changed.loc[0, 'a'] = 5.0
+    store.fetch('total', compute, changed, scale=2)
+    assert calls == [2, 3, 2]
+    assert fingerprint('total', data, scale=2) in store
+
+
+def test_fingerprint_depends_on_content_not_identity():
+    array = np.arange(6.0)
+    assert fingerprint(array, k=1) == fingerprint(array.copy(), k=1)
+    assert fingerprint(array, k=1) != fingerprint(array, k=2)
+    assert fingerprint(array) != fingerprint(array.reshape(2, 3))
+    assert fingerprint(pd.Series([1, 2], name='x')) != fingerprint(pd.Series([1, 2], name='y'))
+
+
+def test_evict_removes_least_recently_used_entries(tmp_path):
+    store = ResultStore(str(tmp_path), max_bytes=10 ** 9)
+    payload = np.zeros(10_000)
+    for age, key in enumerate(['old', 'used', 'new']):
+        store.put(key, payload)
+        os.utime(store._path(key), (1_000_000 + age, 1_000_000 + age))
+    store.get('old')                                    # reading refreshes the entry
+    entry = os.path.getsize(store._path('new'))
+    store.max_bytes = 2 * entry
+    store.evict()
+    assert 'used' not in store and 'old' in store and 'new' in store
+    assert store.size() == 2 * entry
+    store.clear()
+    assert store.size() == 0
+
+
+# Empty, garbage and truncated files, an entry naming a module that no longer exists
+# and one naming a removed class
+@pytest.mark.parametrize('contents', [b'', b'not a pickle', pickle.dumps([1, 2, 3])[:-4],
+                                      b'cno_such_module\nThing\n.', pickle.dumps(Stale())])
+def test_unreadable_entries_are_misses(store, monkeypatch, contents):
+    key = fingerprint('stage', 1)
+    with open(store._path(key), 'wb') as handle:
+        handle.write(contents)
+    monkeypatch.delattr(sys.modules[__name__], 'Stale')
+    assert store.get(key, 'missing') == 'missing'
+    assert store.fetch('stage', lambda value: value + 1, 1) == 2
+    assert store.get(key) == 2
@@ -0,0 +1,131 @@
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_personalisation import codebook, sentiment, stages, text
+from ai_personalisation.text import document_term_matrix
+
+
+@pytest.fixture
+def answers():
+    rng = np.random.default_rng(8)
+    words = ['price', 'privacy', "don't", 'like', 'the', 'Repetitive', 'recommendations', 'very', 'good',
+             'not', 'relevant', 'data', 'cheap', 'bad']
+    values = [' '.join(rng.choice(words, rng.integers(1, 10))) for _ in range(300)]
+    series = pd.Series(values, index=np.arange(300) * 2 + 100, dtype=object)
+    series.iloc[::9] = None
+    series.iloc[5::11] = '  '
+    return series
+
+
+# Tokens of one answer, as the tokenizer is documented to produce them
+def _tokens(answer):
+    return re.findall(r'[a-z]+', re.sub(r"['’`]", '', answer.lower())) if isinstance(answer, str) else []
+
+
+def test_document_term_matrix_counts_match_counter(answers):
+    dtm = document_term_matrix(answers)
+    counts = Counter(token for answer in answers for token in _tokens(answer))
+    frequencies = dtm.frequencies(stop_words=True)
+    assert frequencies.to_dict() == dict(counts)
+    assert set(dtm.frequencies().index) == set(counts) - text.STOP_WORDS
+
+    document_counts = Counter(token for answer in answers for token in set(_tokens(answer)))
+    assert dtm.document_frequencies(stop_words=True).to_dict() == dict(document_counts)
+
+    expected = answers.index[[('privacy' in _tokens(a)) or ('cheap' in _tokens(a)) for a in answers]]
+    assert list(dtm.search('Privacy', 'cheap', 'unknown')) == list(expected)
+    assert document_term_matrix(answers.copy()) is dtm
+
+
+def test_sentiment_chunks_match_single_pass(answers, monkeypatch):
+    expected = sentiment.score_texts(answers)
+    assert expected.index.equals(answers.index)
+    assert expected.loc[answers.fillna('').str.strip() == ''].isna().all().all()
+
+    monkeypatch.setattr(sentiment, 'CHUNK_SIZE', 37)
+    text._CACHE.clear()
+    for n_jobs in [1, 2]:
+        pd.testing.assert_frame_equal(sentiment.score_texts(answers, n_jobs=n_jobs), expected)
+
+
+def test_sentiment_of_one_answer():
+    scores = sentiment.score_texts(pd.Series(['very good', 'not good', 'good']))
+    assert scores.loc[0, 'Sentiment'] > scores.loc[2, 'Sentiment'] > 0 > scores.loc[1, 'Sentiment']
+    assert scores['Positive'].tolist() == [1, 0, 1] and scores['Negative'].tolist() == [0, 1, 0]
+
+
+def test_text_stage_runs_without_scikit_learn(answers, tmp_path, monkeypatch, capsys):
+    def missing_sklearn(*args, **kwargs):
+        raise ImportError("No module named 'sklearn'")
+
+    monkeypatch.setattr(text, 'lda_topics', missing_sklearn)
+    df = pd.DataFrame({column: answers for column in codebook.TEXT_COLUMNS})
+    df['Satisfaction_Level'] = np.arange(len(df)) % 5 + 1.0
+    df['Trust_Level'] = np.arange(len(df)) % 3 + 1.0
+    output = stages.Output(str(tmp_path))
+    stages.run_text(df, output)
+
+    names = {path.stem for path in tmp_path.iterdir()}
+    assert {'text_sentiment', 'sentiment_correlations'} <= names
+    assert not any(name.startswith('topics_') for name in names)
+    assert any(name.startswith('themes_') for name in names)
+    assert 'skipped topics_' in capsys.readouterr().err
+
+
+# Brute-force query evaluation over the tokens of every answer of a row
+def _has(answers, words):
+    for answer in answers:
+        tokens = _tokens(answer)
+        if any(tokens[i:i + len(words)] == words for i in range(len(tokens) - len(words) + 1)):
+            return True
+    return False
+
+
+QUERIES = {
+    'privacy': lambda a: _has(a, ['privacy']),
+    'privacy AND price': lambda a: _has(a, ['privacy']) and _has(a, ['price']),
+    'privacy price': lambda a: _has(a, ['privacy']) and _has(a, ['price']),
+    'privacy OR NOT cheap': lambda a: _has(a, ['privacy']) or not _has(a, ['cheap']),
+    'NOT (privacy OR price) AND data': lambda a: (not (_has(a, ['privacy']) or _has(a, ['price']))
+                                                  and _has(a, ['data'])),
+    '"very good"': lambda a: _has(a, ['very', 'good']),
+    '"not relevant" OR (data AND NOT bad)': lambda a: (_has(a, ['not', 'relevant'])
+                                                       or (_has(a, ['data']) and not _has(a, ['bad']))),
+    '"don\'t like the"': lambda a: _has(a, ['dont', 'like', 'the']),
+    'Repetitive': lambda a: _has(a, ['repetitive']),
+}
+
+
+@pytest.mark.parametrize('query', list(QUERIES))
+def test_inverted_index_matches_brute_force(answers, query):
+    columns = codebook.TEXT_COLUMNS[:2]
+    df = pd.DataFrame({columns[0]: answers, columns[1]: answers.sample(frac=1, random_state=0).to_numpy()},
+                      index=answers.index)
+    index = text.InvertedIndex(columns)
+    # Rows added in two batches are searched together
+    index.add(df.iloc[:120])
+    index.add(df.iloc[120:])
+    assert len(index) == len(df)
+
+    expected = [label for label, row in df.iterrows() if QUERIES[query](row.tolist())]
+    assert list(index.search(query)) == expected
+
+
+def test_phrases_do_not_span_answers():
+    df = pd.DataFrame({'a': ['it is very', 'very good'], 'b': ['good value', None]}, index=['r1', 'r2'])
+    index = text.InvertedIndex(['a', 'b'])
+    index.add(df)
+    assert list(index.search('"very good"')) == ['r2']
+    assert list(index.search('very good')) == ['r1', 'r2']
+
+
+@pytest.mark.parametrize('query', ['', '(privacy', 'privacy AND', 'OR price', 'privacy )'])
+def test_malformed_queries_raise(query):
+    index = text.InvertedIndex(['a'])
+    index.add(pd.DataFrame({'a': ['privacy and price']}))
+    with pytest.raises(text.QueryError):
+        index.search(query)
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_personalisation import codebook
+from ai_personalisation.encoding import encode_survey
+from ai_personalisation.loading import WEEKDAYS, clean_survey
+from ai_personalisation.timeseries import MONITORED_LEVELS, CollectionMonitor
+
+
+@pytest.fixture
+def encoded(survey):
+    df = encode_survey(clean_survey(survey))
+    df.loc[df.sample(frac=0.1, random_state=0).index, 'Trust_Level'] = np.nan
+    return df
+
+
+# Daily means and response-weighted rolling means straight from the rows
+def _reference(df, window):
+    days = df[codebook.START_TIME].dt.to_period('D')
+    full_range = pd.period_range(days.min(), days.max(), freq='D')
+    grouped = df[MONITORED_LEVELS].groupby(days.to_numpy())
+    sums, counts = grouped.sum().reindex(full_range, fill_value=0), grouped.count().reindex(full_range, fill_value=0)
+    responses = days.value_counts().reindex(full_range, fill_value=0)
+    means = (sums / counts.where(counts > 0)).astype('float64')
+    rolling = sums.rolling(window, min_periods=1).sum() / counts.rolling(window, min_periods=1).sum()
+    return responses, means, rolling.where(counts.rolling(window, min_periods=1).sum() > 0)
+
+
+def test_out_of_order_batches_match_a_full_recompute(encoded):
+    ordered = encoded.sort_values(codebook.START_TIME)
+    days = ordered[codebook.START_TIME].dt.normalize()
+    cut_early, cut_late = days.quantile(0.3), days.quantile(0.7)
+    # The middle of the collection arrives first, then its last days, then late
+    # submissions from the first days and finally stragglers spread over the middle
+    middle = ordered[(days >= cut_early) & (days < cut_late)]
+    batches = [middle.iloc[::2], ordered[days >= cut_late], ordered[days < cut_early], middle.iloc[1::2]]
+    assert sum(len(batch) for batch in batches) == len(encoded)
+
+    monitor = CollectionMonitor(window=3)
+    for batch in batches:
+        monitor.update(batch)
+        monitor.rolling('day')                          # exercises the incremental recompute
+
+    responses, means, rolling = _reference(encoded, window=3)
+    pd.testing.assert_series_equal(monitor.counts('day'), responses.rename('Responses'), check_names=False)
+    np.testing.assert_allclose(monitor.means('day').to_numpy(), means.to_numpy())
+    np.testing.assert_allclose(monitor.rolling('day').to_numpy(), rolling.to_numpy())
+    assert monitor.rolling('day').index.equals(rolling.index)
+
+    full = CollectionMonitor(window=3).update(encoded)
+    for bucket in ['hour', 'day', 'week']:
+        pd.testing.assert_frame_equal(monitor.rolling(bucket), full.rolling(bucket))
+        pd.testing.assert_series_equal(monitor.counts(bucket), full.counts(bucket))
+    pd.testing.assert_frame_equal(monitor.drift('day'), full.drift('day'))
+
+
+def test_weekday_counts_and_errors(encoded):
+    monitor = CollectionMonitor(buckets=['day'])
+    with pytest.raises(KeyError):
+        monitor.counts('day')
+    monitor.update(encoded)
+    expected = encoded[codebook.START_TIME].dt.dayofweek.value_counts().reindex(range(7), fill_value=0)
+    assert monitor.weekday_counts().tolist() == expected.tolist()
+    assert list(monitor.weekday_counts().index) == WEEKDAYS
+    with pytest.raises(ValueError):
+        CollectionMonitor(buckets=['month'])
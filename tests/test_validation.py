@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from ai_personalisation import codebook, schema
+from ai_personalisation.validation import SchemaError, normalize_answers, normalize_survey, validate_survey
+
+
+def test_every_closed_question_has_codebook_options():
+    unchecked = [question.id for question in schema.QUESTIONS.values()
+                 if question.kind != schema.TEXT and not question.options]
+    assert unchecked == []
+
+
+def test_normalize_answers_uses_codebook_spelling():
+    options = list(codebook.satisfaction_mapping)
+    answers = pd.Series(['very\xa0satisfied', '  Neutral ', 'VERY DISSATISFIED', None, 'Meh'], index=list('abcde'))
+    normalized = normalize_answers(answers, options)
+    expected = pd.Series(['Very satisfied', 'Neutral', 'Very dissatisfied', None, 'Meh'], index=list('abcde'))
+    pd.testing.assert_series_equal(normalized, expected)
+
+    answers = pd.Series(['No, they haven’t influenced my decision'])
+    assert normalize_answers(answers, codebook.ANSWER_OPTIONS[codebook.REPEAT_PURCHASE]).iloc[0] == \
+        "No, they haven't influenced my decision"
+
+
+def test_multi_select_answers_keep_their_trailing_separator():
+    options = codebook.ANSWER_OPTIONS[codebook.CHALLENGES]
+    answers = pd.Series(['privacy concerns over the use of personal data ;Other;',
+                         'Irrelevant recommendations;recommendations are repetitive', ';', None])
+    normalized = normalize_answers(answers, options, items=True)
+    expected = pd.Series(['Privacy concerns over the use of personal data;Other;',
+                          'Irrelevant recommendations;Recommendations are repetitive', None, None])
+    pd.testing.assert_series_equal(normalized, expected)
+    pd.testing.assert_series_equal(normalize_answers(normalized, options, items=True), expected)
+
+
+def test_survey_with_codebook_answers_validates(survey):
+    survey[codebook.START_TIME] = pd.to_datetime(survey[codebook.START_TIME], format='%m/%d/%y %H:%M:%S')
+    assert validate_survey(normalize_survey(survey), strict=True).empty
+
+
+def test_unknown_and_write_in_answers_are_counted(survey):
+    survey.loc[:4, codebook.NOTICE_HABITS] = 'Sometimes, maybe'
+    survey.loc[:2, codebook.GENDER] = 'Agender'
+    survey.loc[0, codebook.CHALLENGES] = 'Slow delivery;Other;'
+    survey = survey.drop(columns=codebook.LOYALTY)
+
+    problems = validate_survey(normalize_survey(survey)).set_index(['question', 'issue'])
+    assert problems.loc[(codebook.LOYALTY, 'missing column'), 'count'] == len(survey)
+    assert problems.loc[(codebook.NOTICE_HABITS, 'unknown answer'), 'value'] == 'Sometimes, maybe'
+    assert problems.loc[(codebook.NOTICE_HABITS, 'unknown answer'), 'count'] == 5
+    assert problems.loc[(codebook.GENDER, 'write-in answer'), 'count'] == 3
+    assert problems.loc[(codebook.CHALLENGES, 'write-in answer'), 'value'] == 'Slow delivery'
+
+    with pytest.raises(SchemaError) as error:
+        validate_survey(normalize_survey(survey), strict=True)
+    assert set(error.value.problems['issue']) == {'missing column', 'unknown answer'}
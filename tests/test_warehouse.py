@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_personalisation import codebook
+from ai_personalisation.encoding import encode_survey
+from ai_personalisation.loading import clean_survey
+from ai_personalisation.warehouse import DATE, RESPONDENT, WAVE, ScoreWarehouse, respondent_keys
+
+pa = pytest.importorskip('pyarrow')
+ds = pytest.importorskip('pyarrow.dataset')
+
+
+@pytest.fixture
+def encoded(survey):
+    return encode_survey(clean_survey(survey))
+
+
+def _sorted(frame):
+    return frame.sort_values(RESPONDENT).reset_index(drop=True)
+
+
+def test_write_and_read_round_trip(encoded, tmp_path):
+    warehouse = ScoreWarehouse(str(tmp_path))
+    assert warehouse.write(encoded, '2024Q2') == len(encoded)
+    assert warehouse.write(encoded.iloc[:50], '2024Q3') == 50
+    assert warehouse.waves() == ['2024Q2', '2024Q3']
+
+    expected = _sorted(ScoreWarehouse.scores(encoded, '2024Q2'))
+    stored = _sorted(warehouse.read(waves=['2024Q2']))
+    pd.testing.assert_frame_equal(stored[expected.columns], expected, check_dtype=False)
+    assert stored[RESPONDENT].tolist() == sorted(respondent_keys(encoded))
+    dates = sorted(os.listdir(tmp_path / f'{WAVE}=2024Q2'))
+    assert dates == sorted(f'{DATE}={day}' for day in encoded[codebook.START_TIME].dt.date.astype(str).unique())
+
+    # Rewriting a wave replaces it instead of appending
+    warehouse.write(encoded.iloc[:10], '2024Q2')
+    assert len(warehouse.read(waves=['2024Q2'])) == 10
+    warehouse.drop('2024Q3')
+    assert warehouse.waves() == ['2024Q2']
+
+
+def test_duplicate_respondent_keys_are_rejected(encoded, tmp_path):
+    warehouse = ScoreWarehouse(str(tmp_path))
+    with pytest.raises(ValueError, match='2 duplicate respondent keys'):
+        warehouse.write(pd.concat([encoded, encoded.iloc[[3, 7]]]), '2024Q2')
+    assert warehouse.waves() == []
+
+
+def test_reads_prune_partitions(encoded, tmp_path):
+    warehouse = ScoreWarehouse(str(tmp_path))
+    warehouse.write(encoded, '2024Q2')
+    warehouse.write(encoded, '2024Q3')
+    # Unreadable files in the partitions outside the bounds: a read only succeeds if
+    # they are never opened
+    for path in (tmp_path / f'{WAVE}=2024Q3').rglob('*.parquet'):
+        path.write_bytes(b'not parquet')
+    days = encoded[codebook.START_TIME].dt.normalize()
+    first, last = days.min(), days.min() + pd.Timedelta(days=2)
+    for path in (tmp_path / f'{WAVE}=2024Q2').glob(f'{DATE}=*'):
+        if not first <= pd.Timestamp(path.name.split('=')[1]) <= last:
+            for file in path.glob('*.parquet'):
+                file.write_bytes(b'not parquet')
+
+    window = warehouse.read(waves=['2024Q2'], start=first, end=last)
+    inside = encoded[(days >= first) & (days <= last)]
+    assert sorted(window[RESPONDENT]) == sorted(respondent_keys(inside))
+    satisfied = warehouse.read(columns=[RESPONDENT, 'Satisfaction_Level'], waves=['2024Q2'], start=first, end=last,
+                               where=ds.field('Satisfaction_Level') >= 4)
+    assert list(satisfied.columns) == [RESPONDENT, 'Satisfaction_Level']
+    assert len(satisfied) == int((inside['Satisfaction_Level'] >= 4).sum())
+    assert np.all(satisfied['Satisfaction_Level'] >= 4)
+    with pytest.raises(pa.ArrowInvalid):
+        warehouse.read(waves=['2024Q3'])
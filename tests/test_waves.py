@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from ai_personalisation import codebook, schema
+from ai_personalisation.loading import clean_survey
+from ai_personalisation.waves import WAVE, CachedEncoder, WaveComparison, align_columns
+from conftest import make_survey
+
+
+# A wave fielded in another city: the question texts name Abuja instead of Lagos,
+# the loyalty question was left out, an unrelated column was added and some
+# respondents wrote in their gender
+def _abuja_export(n=90, seed=2):
+    survey = make_survey(n, seed).drop(columns=codebook.LOYALTY)
+    survey.loc[:9, codebook.GENDER] = 'Agender'
+    exported = schema.original_columns(survey)
+    exported.columns = [column.replace('Lagos', 'Abuja') for column in exported.columns]
+    exported['Email address'] = 'someone@example.com'
+    return exported
+
+
+def test_align_columns_matches_city_specific_headers():
+    exported = _abuja_export()
+    assert codebook.QUESTION_TEXTS[codebook.CULTURAL_RELEVANCE] not in exported.columns
+    aligned = align_columns(exported)
+    expected = [codebook.START_TIME] + [q for q in codebook.QUESTION_COLUMNS if q != codebook.LOYALTY]
+    assert list(aligned.columns) == expected + ['Email address']
+    # The two relevance questions differ in one word and still go to the right column
+    for question in [codebook.CULTURAL_RELEVANCE, codebook.ECONOMIC_RELEVANCE]:
+        header = codebook.QUESTION_TEXTS[question].replace('Lagos', 'Abuja')
+        pd.testing.assert_series_equal(aligned[question], exported[header], check_names=False)
+
+
+@pytest.fixture
+def comparison():
+    encoder = CachedEncoder()
+    lagos = encoder.encode(clean_survey(make_survey(120, seed=1)))
+    abuja = encoder.encode(clean_survey(align_columns(_abuja_export())))
+    return WaveComparison({'Lagos': lagos, 'Abuja': abuja}), lagos, abuja
+
+
+def test_differences_match_welch_t_tests(comparison):
+    comparison, lagos, abuja = comparison
+    differences = comparison.differences().loc['Abuja']
+    assert (differences['reference'] == 'Lagos').all()
+    for outcome in comparison.outcomes:
+        row = differences.loc[outcome]
+        if outcome == 'Loyalty_Level':
+            # Not asked in Abuja: no difference rather than a comparison with zero respondents
+            assert row[['difference', 't_value', 'p_value', 'cohens_d']].isna().all()
+            continue
+        first, second = abuja[outcome].dropna(), lagos[outcome].dropna()
+        test = stats.ttest_ind(first, second, equal_var=False)
+        pooled = ((len(first) - 1) * first.var() + (len(second) - 1) * second.var()) / (len(first) + len(second) - 2)
+        assert row['difference'] == pytest.approx(first.mean() - second.mean())
+        assert row['t_value'] == pytest.approx(test.statistic)
+        assert row['p_value'] == pytest.approx(test.pvalue)
+        assert row['cohens_d'] == pytest.approx((first.mean() - second.mean()) / np.sqrt(pooled))
+
+    reversed_differences = comparison.differences(reference='Abuja').loc['Lagos']
+    np.testing.assert_allclose(reversed_differences['difference'], -differences['difference'])
+
+
+def test_distributions_cover_options_of_either_wave(comparison):
+    comparison, _, abuja = comparison
+    shares = comparison.distribution(codebook.GENDER)
+    assert list(shares.index) == ['Lagos', 'Abuja']
+    assert shares.loc['Lagos', 'Agender'] == 0
+    assert shares.loc['Abuja', 'Agender'] == pytest.approx((abuja[codebook.GENDER] == 'Agender').mean())
+    np.testing.assert_allclose(shares.sum(axis=1), 1.0)
+
+    # Questions answered in one wave only cannot be compared
+    tests = comparison.distribution_tests()
+    assert codebook.LOYALTY not in tests.index
+    table = pd.crosstab(comparison.combined[WAVE], comparison.combined[codebook.GENDER])
+    assert tests.loc[codebook.GENDER, 'p_value'] == pytest.approx(stats.chi2_contingency(table)[1])
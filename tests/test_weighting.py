@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_personalisation import codebook
+from ai_personalisation.weighting import Raker, RakingError, weighted_corr, weighted_mean, weighted_value_counts
+
+
+@pytest.fixture
+def sample():
+    rng = np.random.default_rng(3)
+    n = 400
+    return pd.DataFrame({
+        codebook.GENDER: rng.choice(['Male', 'Female'], n, p=[0.3, 0.7]),
+        codebook.AGE: rng.choice(['18-24', '25-34', '35+'], n, p=[0.2, 0.6, 0.2]),
+    })
+
+
+# Keyed by segment dimension name, which the raker resolves to the question column
+TARGETS = {'Gender': {'Male': 0.5, 'Female': 0.5}, 'Age': {'18-24': 0.3, '25-34': 0.4, '35+': 0.3}}
+COLUMNS = {'Gender': codebook.GENDER, 'Age': codebook.AGE}
+
+
+# Textbook iterative proportional fitting, one pandas groupby per margin
+def _reference_raking(df, targets, iterations=200):
+    weights = pd.Series(1.0, index=df.index)
+    for _ in range(iterations):
+        for key, margin in targets.items():
+            column = COLUMNS[key]
+            totals = weights.groupby(df[column]).sum()
+            factors = pd.Series(margin) * weights.sum() / totals
+            weights = weights * df[column].map(factors)
+    return weights * len(weights) / weights.sum()
+
+
+def test_raking_matches_margins_and_reference(sample):
+    weights = Raker(sample, tol=1e-10).weights(TARGETS)
+    assert weights.mean() == pytest.approx(1.0)
+    for key, margin in TARGETS.items():
+        shares = weighted_value_counts(sample[COLUMNS[key]], weights, normalize=True)
+        pd.testing.assert_series_equal(shares.sort_index(), pd.Series(margin).sort_index(), check_names=False,
+                                       check_index_type=False, atol=1e-8)
+    np.testing.assert_allclose(weights.to_numpy(), _reference_raking(sample, TARGETS).to_numpy(), rtol=1e-6)
+
+
+def test_raking_cache_and_errors(sample):
+    raker = Raker(sample)
+    assert raker.weights(TARGETS) is raker.weights({k: dict(v) for k, v in TARGETS.items()})
+    with pytest.raises(RakingError):
+        raker.weights({'Age': {'18-24': 0.5, '65+': 0.5}})
+    with pytest.raises(ValueError):
+        raker.weights({'Age': {'18-24': -1.0, '25-34': 2.0}})
+
+
+def test_weighted_mean_and_corr_match_brute_force():
+    rng = np.random.default_rng(4)
+    values = rng.normal(size=(300, 3)) @ np.array([[1.0, 0.5, 0.2], [0.0, 1.0, 0.4], [0.0, 0.0, 1.0]])
+    values[rng.random(values.shape) < 0.1] = np.nan
+    df = pd.DataFrame(values, columns=['a', 'b', 'c'])
+    weights = rng.uniform(0.2, 3.0, len(df))
+
+    means = weighted_mean(df, weights)
+    for column in df.columns:
+        present = df[column].notna().to_numpy()
+        assert means[column] == pytest.approx(np.average(df[column][present], weights=weights[present]))
+
+    corr = weighted_corr(df, weights)
+    for first in df.columns:
+        for second in df.columns:
+            present = (df[first].notna() & df[second].notna()).to_numpy()
+            cov = np.cov(df.loc[present, [first, second]].to_numpy(), rowvar=False, aweights=weights[present])
+            expected = cov[0, 1] / np.sqrt(cov[0, 0] * cov[1, 1])
+            assert corr.loc[first, second] == pytest.approx(expected, abs=1e-10)